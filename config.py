@@ -1,4 +1,6 @@
 import os
+import tempfile
+import uuid
 
 
 # default config
@@ -7,6 +9,21 @@ class BaseConfig:
     SECRET_KEY = os.environ['SECRET_KEY']
     SQLALCHEMY_DATABASE_URI = os.environ['DATABASE_URL'].replace("postgres://", "postgresql://", 1)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # directory with files used to share cache versions between workers,
+    # `cache` directory of the application instance folder by default
+    CACHE_VERSION_DIR = os.environ.get('CACHE_VERSION_DIR', None)
+    # answer employee searches from in-memory columnar engine (requires NumPy)
+    IN_MEMORY_SEARCH = os.environ.get('IN_MEMORY_SEARCH', '').lower() in ('1', 'true', 'yes')
+    # maximum number of employee records kept by search result cache, 0 disables the cache
+    SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', 100000))
+    # maximum number of pre-encoded entity fragments kept in cache, 0 disables the cache
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 100000))
+    # directory with compiled templates shared by workers, empty value disables it,
+    # by default Jinja uses private directory of the user running the application
+    JINJA_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR', None)
+    # what happens to employees of deleted department by default: 'null' leaves them
+    # without department, 'cascade' deletes them too ('reassign' needs target department)
+    DEPARTMENT_ORPHAN_POLICY = os.environ.get('DEPARTMENT_ORPHAN_POLICY', 'null')
 
 
 class TestConfig(BaseConfig):
@@ -15,6 +32,10 @@ class TestConfig(BaseConfig):
     WTF_CSRF_ENABLED = False
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     PRESERVE_CONTEXT_ON_EXCEPTION = False
+    JINJA_CACHE_DIR = ''
+    # versions of test runs aren't shared with running applications or other runs
+    CACHE_VERSION_DIR = os.path.join(tempfile.gettempdir(),
+                                     f'department_app_test_{uuid.uuid4().hex}')
 
 
 class DevelopmentConfig(BaseConfig):
@@ -9,6 +9,7 @@ Subpackages:
 - `models`: contains modules with Python classes describing database models
 - `rest`: contains modules with RESTful service implementation
 - `schemas`: contains modules with serialization/deserialization schemas for models
+- `search`: contains modules with in-memory search engines used by services
 - `service`: contains modules with classes used to work with database
 - `static`: contains web application static files (styles, images)
 - `templates`: contains web application html templates
@@ -23,6 +24,7 @@ import sys
 import logging
 
 from flask import Flask
+from jinja2 import FileSystemBytecodeCache
 
 from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
@@ -44,6 +46,16 @@ app = Flask(__name__, template_folder=TEMPLATES_DIR)
 
 app.config.from_object(os.environ['APP_SETTINGS'])
 
+# cache versions are shared only by workers of this instance of the application
+if not app.config.get('CACHE_VERSION_DIR', None):
+    app.config['CACHE_VERSION_DIR'] = os.path.join(app.instance_path, 'cache')
+
+# templates are compiled once and loaded from disk by every worker
+if app.config.get('JINJA_CACHE_DIR', None) != '':
+    if app.config.get('JINJA_CACHE_DIR', None):
+        os.makedirs(app.config['JINJA_CACHE_DIR'], mode=0o700, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config.get('JINJA_CACHE_DIR', None))
+
 db = SQLAlchemy(app)
 ma = Marshmallow(app)
 
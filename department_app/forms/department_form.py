@@ -8,20 +8,18 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, SubmitField
 from wtforms.validators import DataRequired, Length
 
-from department_app.models.department import Department
-
-from department_app.forms.validators import Unique
-
 
 class DepartmentForm(FlaskForm):
     """
     Department form
+
+    Uniqueness of the name is checked by the database on write,
+    views report `UniqueError` raised by the service as a name error
     """
     name = StringField('Name: ',
                        validators=[
                            Length(min=3, max=100,
                                   message="Name should be from 3 up to 100 symbols"),
-                           DataRequired(),
-                           Unique(Department, Department.name)
+                           DataRequired()
                        ])
     submit = SubmitField('')
@@ -9,10 +9,11 @@ from datetime import date
 from dateutil.relativedelta import relativedelta
 
 from flask_wtf import FlaskForm
-from wtforms import StringField, DecimalField, RadioField, DateField, SubmitField
+from wtforms import StringField, DecimalField, RadioField, DateField, SubmitField, BooleanField
 from wtforms.validators import DataRequired, Length, NumberRange, ValidationError, Optional
 
 from department_app.models.department import Department
+from department_app.service.department_service import DepartmentService
 
 from department_app.forms.validators import Exists
 
@@ -31,7 +32,8 @@ class EmployeeForm(FlaskForm):
                                  Length(min=3, max=50,
                                         message="Department should be from 3 up to 50 symbols"),
                                  DataRequired(),
-                                 Exists(Department, Department.name)
+                                 Exists(Department, Department.name,
+                                        lookup=DepartmentService.get_department_id_by_name)
                              ])
     salary = DecimalField('Salary: ',
                           validators=[
@@ -55,6 +57,8 @@ class FilterForm(FlaskForm):
     Filter form
     """
     name = StringField('Name', validators=[Optional()])
+    # match name tolerating typos
+    fuzzy = BooleanField('Similar names')
     department = StringField('Department', validators=[Optional()])
 
     start_salary = DecimalField('From:',
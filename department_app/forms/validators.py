@@ -1,48 +1,34 @@
 """
 Department form, this module defines the following classes:
 
-- `Unique`, custom validator that raise in case of object with given param is already exists
 - `Exists`, custom validator that raise in case of object with given param does not exist
 """
 
 from wtforms.validators import ValidationError
 
 
-class Unique:
-    """
-    Custom validator that raise in case of object with given param is already exists
-    """
-
-    # pylint: disable=too-few-public-methods
-
-    def __init__(self, model, field, message=None):
-        self.model = model
-        self.field = field
-        if not message:
-            message = f'{model.__name__} with such name already exists'
-        self.message = message
-
-    def __call__(self, form, field):
-        check = self.model.query.filter(self.field == field.data).first()
-        if check:
-            raise ValidationError(self.message)
-
-
 class Exists:
     """
     Custom validator that raise in case of object with given param does not exist
+
+    :param lookup: optional function resolving field data to the object or its id,
+    used instead of querying the model (e.g. to resolve it from a cache)
     """
 
     # pylint: disable=too-few-public-methods
 
-    def __init__(self, model, field, message=None):
+    def __init__(self, model, field, message=None, lookup=None):
         self.model = model
         self.field = field
         if not message:
             message = f'{model.__name__} with such name doesn\'t exist'
         self.message = message
+        self.lookup = lookup
 
     def __call__(self, form, field):
-        check = self.model.query.filter(self.field == field.data).first()
-        if not check:
+        if self.lookup:
+            check = self.lookup(field.data)
+        else:
+            check = self.model.query.filter(self.field == field.data).first()
+        if check is None:
             raise ValidationError(self.message)
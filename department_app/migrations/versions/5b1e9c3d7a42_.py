@@ -0,0 +1,30 @@
+"""add employee search indexes
+
+Revision ID: 5b1e9c3d7a42
+Revises: 87c42e30c9f2
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1e9c3d7a42'
+down_revision = '87c42e30c9f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_employees_name', 'employees', ['name'], unique=False)
+    op.create_index('ix_employees_salary', 'employees', ['salary'], unique=False)
+    op.create_index('ix_employees_date_of_birth', 'employees', ['date_of_birth'], unique=False)
+    op.create_index('ix_employees_department_id_salary', 'employees',
+                    ['department_id', 'salary'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_employees_department_id_salary', table_name='employees')
+    op.drop_index('ix_employees_date_of_birth', table_name='employees')
+    op.drop_index('ix_employees_salary', table_name='employees')
+    op.drop_index('ix_employees_name', table_name='employees')
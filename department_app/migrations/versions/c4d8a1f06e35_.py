@@ -0,0 +1,28 @@
+"""add entity versions
+
+Revision ID: c4d8a1f06e35
+Revises: 5b1e9c3d7a42
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d8a1f06e35'
+down_revision = '5b1e9c3d7a42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('departments', sa.Column('version', sa.Integer(), server_default='1',
+                                           nullable=False))
+    op.add_column('employees', sa.Column('version', sa.Integer(), server_default='1',
+                                         nullable=False))
+
+
+def downgrade():
+    op.drop_column('employees', 'version')
+    op.drop_column('departments', 'version')
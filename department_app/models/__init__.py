@@ -5,7 +5,9 @@ Modules:
 
 - `department.py`: defines model representing departments
 - `employee.py`: defines model representing employees
+- `rows.py`: defines read-only records of departments and employees
 """
 
 from . import department
 from . import employee
+from . import rows
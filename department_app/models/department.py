@@ -21,6 +21,13 @@ class Department(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False, unique=True)
     employees = db.relationship('Employee', lazy=True, backref=db.backref('department', lazy=True))
+    # incremented by every update in the same statement (`version + 1`), it is not
+    # the mapper version counter, so concurrent writes never fail with stale data,
+    # changes of the version invalidate cached fragments of the entity
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    # fetch server-generated values by the write itself (RETURNING where supported)
+    __mapper_args__ = {'eager_defaults': True}
 
     def __init__(self, name, employees=None):
         self.name = name
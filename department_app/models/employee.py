@@ -21,17 +21,28 @@ class Employee(db.Model):
     # pylint: disable=too-few-public-methods
 
     __tablename__ = 'employees'
+    # serves sorting of search results and top paid employees per department
+    __table_args__ = (db.Index('ix_employees_department_id_salary', 'department_id', 'salary'),)
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(255), nullable=False)
-    salary = db.Column(db.Integer, nullable=False)
-    date_of_birth = db.Column(db.Date())
+    name = db.Column(db.String(255), nullable=False, index=True)
+    salary = db.Column(db.Integer, nullable=False, index=True)
+    date_of_birth = db.Column(db.Date(), index=True)
     department_id = db.Column(db.Integer, db.ForeignKey('departments.id'))
+    # incremented by every update in the same statement (`version + 1`), it is not
+    # the mapper version counter, so concurrent writes never fail with stale data,
+    # changes of the version invalidate cached fragments of the entity
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    # fetch server-generated values by the write itself (RETURNING where supported)
+    __mapper_args__ = {'eager_defaults': True}
 
     def __init__(self, name, salary, date_of_birth, department=None):
         self.name = name
         self.salary = salary
         self.date_of_birth = date_of_birth
-        self.department = department
+        # unset relationship is not assigned, so department_id can be set directly
+        if department is not None:
+            self.department = department
 
     def __repr__(self):
         """
@@ -0,0 +1,81 @@
+"""
+Compact read-only records of departments and employees fetched with Core queries,
+they carry no ORM instance state and are accepted by department and employee schemas,
+this module defines the following classes:
+
+- `DepartmentRow`, read-only department record
+- `EmployeeRow`, read-only employee record
+"""
+
+
+class DepartmentRow:
+    """
+    Read-only department record
+
+    :param int id: id of the department
+    :param str name: name of the department
+    :param employees: employees working in the department
+    :type employees: list[EmployeeRow] or None
+    :param int version: version of the department or None if it's unknown
+    """
+
+    # pylint: disable=too-few-public-methods, redefined-builtin, invalid-name
+
+    __slots__ = ('id', 'name', 'employees', 'version')
+
+    def __init__(self, id, name, employees=None, version=None):
+        self.id = id
+        self.name = name
+        self.employees = employees if employees is not None else []
+        self.version = version
+
+    def __repr__(self):
+        """
+        Returns string representation of department record
+
+        :return: string representation of department record
+        """
+        return f'DepartmentRow({self.name}, {len(self.employees)})'
+
+
+class EmployeeRow:
+    """
+    Read-only employee record
+
+    :param int id: id of the employee
+    :param str name: employee's name
+    :param int salary: employee's salary
+    :param date date_of_birth: employee's date of birth
+    :param department: department employee works in
+    :type department: DepartmentRow or None
+    :param int version: version of the employee or None if it's unknown
+    """
+
+    # pylint: disable=too-few-public-methods, redefined-builtin, invalid-name, too-many-arguments
+
+    __slots__ = ('id', 'name', 'salary', 'date_of_birth', 'department', 'version')
+
+    def __init__(self, id, name, salary, date_of_birth, department=None, version=None):
+        self.id = id
+        self.name = name
+        self.salary = salary
+        self.date_of_birth = date_of_birth
+        self.department = department
+        self.version = version
+
+    @property
+    def department_id(self):
+        """
+        Returns id of the department employee works in
+
+        :return: id of the department or None
+        """
+        return self.department.id if self.department else None
+
+    def __repr__(self):
+        """
+        Returns string representation of employee record
+
+        :return: string representation of employee record
+        """
+        return f'EmployeeRow({self.name}, {self.salary})'
@@ -3,8 +3,11 @@ This package contains modules defining department and employee REST APIs and
 functions to initialize respective API endpoints:
 
 Modules:
+- `autocomplete_api.py`: defines autocomplete api
+- `batch_api.py`: defines batch api
 - `department_api.py`: defines department api
 - `employee_api.py`: defines employee api
+- `fragments.py`: assembles JSON responses from cached fragments of entities
 
 Functions:
 - `init_api`: register REST API endpoints
@@ -12,6 +15,8 @@ Functions:
 
 # pylint: disable=cyclic-import
 
+from . import autocomplete_api
+from . import batch_api
 from . import department_api
 from . import employee_api
 
@@ -48,3 +53,39 @@ def init_api(api):
         '/api/employees/search',
         strict_slashes=False
     )
+    api.add_resource(
+        employee_api.EmployeeTopApi,
+        '/api/employees/top',
+        strict_slashes=False
+    )
+    api.add_resource(
+        employee_api.EmployeeTransferApi,
+        '/api/employees/transfer',
+        strict_slashes=False
+    )
+    api.add_resource(
+        employee_api.EmployeeSalaryAdjustmentApi,
+        '/api/employees/salary-adjustment',
+        strict_slashes=False
+    )
+    api.add_resource(
+        employee_api.EmployeeReconcileApi,
+        '/api/employees/reconcile',
+        strict_slashes=False
+    )
+
+    api.add_resource(
+        autocomplete_api.DepartmentAutocompleteApi,
+        '/api/autocomplete/departments',
+        strict_slashes=False
+    )
+    api.add_resource(
+        autocomplete_api.EmployeeAutocompleteApi,
+        '/api/autocomplete/employees',
+        strict_slashes=False
+    )
+    api.add_resource(
+        batch_api.BatchApi,
+        '/api/batch',
+        strict_slashes=False
+    )
@@ -0,0 +1,83 @@
+"""
+Autocomplete REST API, this module defines the following classes:
+
+- `AutocompleteApiBase`, autocomplete API base class
+- `DepartmentAutocompleteApi`, department name autocomplete API class
+- `EmployeeAutocompleteApi`, employee name autocomplete API class
+"""
+
+from flask_restful import Resource, reqparse
+
+from department_app import app
+from department_app.service.department_service import DepartmentService
+from department_app.service.employee_service import EmployeeService
+
+
+class AutocompleteApiBase(Resource):
+    """
+    Autocomplete API base class
+    """
+
+    # number of suggestions returned by default
+    default_limit = 10
+
+    # maximum number of suggestions returned
+    max_limit = 50
+
+    parser = reqparse.RequestParser()
+    parser.add_argument('q', type=str, default='')
+    parser.add_argument('limit', type=int, default=default_limit)
+
+    def parse_args(self) -> tuple:
+        """
+        Parses prefix and limit of suggestions from request arguments,
+        the limit is kept between 1 and `max_limit`
+
+        :return: tuple of prefix and limit
+        """
+        data = self.parser.parse_args()
+        app.logger.debug(f'Received: {data}')
+        return data['q'] or '', max(1, min(data['limit'], self.max_limit))
+
+
+class DepartmentAutocompleteApi(AutocompleteApiBase):
+    """
+    Department name autocomplete API class
+    """
+
+    def get(self):
+        """
+        GET request handler of department name autocomplete API
+
+        Fetches names of the departments starting with given prefix (`q`) via service
+        Returns at most `limit` of them ordered alphabetically in a JSON format
+        with a status code 200(OK)
+
+        :return: list of department names JSON and a status code 200
+        """
+        prefix, limit = self.parse_args()
+        names = DepartmentService.complete_department_name(prefix, limit)
+        app.logger.debug(f'Returned: {names}')
+        return names, 200
+
+
+class EmployeeAutocompleteApi(AutocompleteApiBase):
+    """
+    Employee name autocomplete API class
+    """
+
+    def get(self):
+        """
+        GET request handler of employee name autocomplete API
+
+        Fetches employees which names start with given prefix (`q`) via service
+        Returns at most `limit` of them ordered alphabetically by name in a JSON format
+        with a status code 200(OK)
+
+        :return: list of employee ids and names JSON and a status code 200
+        """
+        prefix, limit = self.parse_args()
+        employees = [{'id': employee_id, 'name': name} for employee_id, name in
+                     EmployeeService.complete_employee_name(prefix, limit)]
+        app.logger.debug(f'Returned: {employees}')
+        return employees, 200
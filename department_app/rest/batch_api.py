@@ -0,0 +1,147 @@
+"""
+Batch REST API, this module defines the following classes:
+
+- `BatchAbort`, exception that rolls back the batch after failed operation
+- `BatchApi`, batch API class
+"""
+
+from flask import request
+from flask_restful import Resource
+from marshmallow import ValidationError
+
+from department_app import app
+from department_app.schemas.department_schema import DepartmentSchema
+from department_app.schemas.employee_schema import EmployeeSchema
+from department_app.search.columnar import employee_search
+from department_app.service.cache import department_names, employee_names, request_cache
+from department_app.service.cache import search_results
+from department_app.service.department_service import DepartmentService
+from department_app.service.employee_service import EmployeeService
+
+from department_app.service.exceptions import ExistsError, PolicyError, UniqueError
+from department_app.service.session import single_transaction
+
+
+class BatchAbort(Exception):
+    """
+    Exception that rolls back the batch after failed operation
+    """
+
+
+class BatchApi(Resource):
+    """
+    Batch API class
+    """
+
+    # maximum number of operations in one batch
+    max_operations = 1000
+
+    # services and schemas of entities operations can be applied to
+    entities = {
+        'employee': (EmployeeService, EmployeeSchema()),
+        'department': (DepartmentService, DepartmentSchema())
+    }
+
+    actions = ('get', 'create', 'update', 'patch', 'delete')
+
+    def post(self):
+        """
+        POST request handler of batch API
+
+        Runs the list of operations (`operations`) in order in one transaction,
+        each operation is an object with `action` (get, create, update, patch or delete),
+        `entity` (employee or department), `id` of the entity unless it's created
+        and `data` of created, updated or patched entity
+        Returns the status code and the data or error message of every operation
+        in a JSON format with a status code 200(OK) if all of them succeeded or
+        with a status code 400(Bad Request) if one of them failed, in this case
+        the batch is rolled back and the failed operation is the last one in results
+
+        :return: committed flag and results of the operations JSON and a status code 200 or
+        a status code 400 in case of failed operation or invalid request data
+        """
+        data = request.get_json(silent=True)
+        operations = data.get('operations', None) if isinstance(data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return 'operations should be non-empty list', 400
+        if len(operations) > self.max_operations:
+            return f'batch should have at most {self.max_operations} operations', 400
+
+        results = []
+        try:
+            with single_transaction():
+                for operation in operations:
+                    status, body = self.run_operation(operation)
+                    results.append({'status': status, 'data': body})
+                    if status >= 400:
+                        raise BatchAbort()
+        except BatchAbort:
+            app.logger.error(f'Batch rolled back at operation {len(results) - 1}')
+            return {'committed': False, 'results': results}, 400
+        finally:
+            self.invalidate_caches()
+        app.logger.debug(f'Batch committed: {len(results)} operations')
+        return {'committed': True, 'results': results}, 200
+
+    def run_operation(self, operation) -> tuple:
+        """
+        Runs the operation via service of its entity
+
+        :param operation: operation object (see `post`)
+        :return: tuple of status code and serialized entity, error message or None
+        """
+
+        # pylint: disable=too-many-return-statements
+
+        if not isinstance(operation, dict):
+            return 400, 'operation should be an object'
+        action, entity = operation.get('action', None), operation.get('entity', None)
+        if action not in self.actions:
+            return 400, f'action should be one of: {", ".join(self.actions)}'
+        if entity not in self.entities:
+            return 400, f'entity should be one of: {", ".join(self.entities)}'
+        service, schema = self.entities[entity]
+        entity_id, entity_json = operation.get('id', None), operation.get('data', None)
+        if action != 'create' and entity_id is None:
+            return 400, 'id should be given'
+        if action in ('create', 'update') and not isinstance(entity_json, dict):
+            return 400, 'data should be an object'
+
+        not_found = f'{entity.capitalize()} not found'
+        try:
+            if action == 'get':
+                result = getattr(service, f'get_{entity}_by_id')(entity_id)
+                return (200, schema.dump(result)) if result is not None else (404, not_found)
+            if action == 'create':
+                return 201, schema.dump(getattr(service, f'add_{entity}')(entity_json))
+            if action == 'update':
+                return 200, schema.dump(
+                    getattr(service, f'update_{entity}')(entity_id, entity_json)
+                )
+            if action == 'patch':
+                getattr(service, f'patch_{entity}')(entity_id, entity_json)
+            else:
+                getattr(service, f'delete_{entity}')(entity_id)
+            return 204, None
+        except ValidationError as error:
+            return 400, error.messages
+        except ValueError:
+            return 404, not_found
+        except (ExistsError, PolicyError, TypeError, UniqueError) as error:
+            return 400, str(error)
+
+    @staticmethod
+    def invalidate_caches() -> None:
+        """
+        Invalidates in-process indexes and caches once after the batch was committed
+        or rolled back, services don't update them per operation inside the batch
+        (see `in_single_transaction`) and the indexes reloaded during the batch
+        might reflect changes that were rolled back
+
+        :return: None
+        """
+        request_cache.clear()
+        department_names.invalidate()
+        employee_names.invalidate()
+        employee_search.invalidate()
+        search_results.invalidate()
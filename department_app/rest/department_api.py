@@ -7,14 +7,16 @@ Departments REST API, this module defines the following classes:
 """
 
 from flask import request
-from flask_restful import Resource
+from flask_restful import Resource, reqparse
 from marshmallow import ValidationError
 
 from department_app import app
+from department_app.rest.employee_api import get_ids
+from department_app.rest.fragments import dump_many, dump_one, get_department_key, json_response
 from department_app.schemas.department_schema import DepartmentSchema
 from department_app.service.department_service import DepartmentService
 
-from department_app.service.exceptions import UniqueError
+from department_app.service.exceptions import ExistsError, PolicyError, UniqueError
 
 
 class DepartmentApiBase(Resource):
@@ -32,20 +34,31 @@ class DepartmentListApi(DepartmentApiBase):
     """
     Department list API class
     """
+    ids_parser = reqparse.RequestParser()
+    ids_parser.add_argument('ids', type=get_ids, location='args')
 
     def get(self):
         """
         GET request handler of department list API
 
-        Fetches all departments via service
-        Returns them in a JSON format with a status code 200(OK)
+        Fetches all departments or departments with ids given by comma-separated `ids` param
+        via service
+        Returns them in a JSON format with a status code 200(OK), ids of requested
+        departments that don't exist are returned in `X-Missing-Ids` header,
+        departments that didn't change since they were serialized are taken from cache
 
-        :return: list of all departments JSON and a status code 200
+        :return: list of departments JSON response with a status code 200
         """
-        departments = self.service.get_departments()
-        departments = self.schema.dump(departments, many=True)
+        ids = self.ids_parser.parse_args()['ids']
+        headers = {}
+        if ids is None:
+            departments = self.service.get_department_rows()
+        else:
+            departments, missing_ids = self.service.get_department_rows_by_ids(ids)
+            headers['X-Missing-Ids'] = ','.join(map(str, missing_ids))
+        departments = dump_many(self.schema, departments, get_department_key)
         app.logger.debug(f'Returned: {departments}')
-        return departments, 200
+        return json_response(departments, headers=headers)
 
     def post(self):
         """
@@ -91,7 +104,7 @@ class DepartmentApi(DepartmentApiBase):
         in case of department with given id not being found
 
         :param int department_id: id of the department
-        :return: department with given id in JSON and a status code 200 or
+        :return: department with given id in JSON response with a status code 200 or
         error message and a status code 404 in case of department with given id not being found
         """
         try:
@@ -100,9 +113,9 @@ class DepartmentApi(DepartmentApiBase):
         except ValueError:
             app.logger.error('Department not found')
             return 'Department not found', 404
-        department = self.schema.dump(department)
+        department = dump_one(self.schema, department, get_department_key)
         app.logger.debug(f'Returned: {department}')
-        return department, 200
+        return json_response(department)
 
     def put(self, department_id: int):
         """
@@ -137,22 +150,67 @@ class DepartmentApi(DepartmentApiBase):
             return 'Department not found', 404
         return self.schema.dump(department), 200
 
+    def patch(self, department_id: int):
+        """
+        PATCH request handler of department API
+
+        Uses service to update only the fields present in request data
+        of the department with given id
+        Returns no content message with a status code 204(No Content) or
+        error messages with a status code 400(Bad Request)
+        in case of validation error during deserialization or
+        error message with a status code 404(Not Found)
+        in case of department with given id not being found
+
+        :param int department_id: id of the department to be updated
+        :return: no content message and status code 204 or
+        error message and status code 400 in case of validation error or
+        error message and a status code 404 in case of department with given id not being found
+        """
+        try:
+            app.logger.debug(f'Department id: {department_id}')
+            data = request.get_json(silent=True)
+            app.logger.debug(f'Received: {data}')
+            self.service.patch_department(department_id, data)
+        except ValidationError as error:
+            app.logger.error(error.messages)
+            return error.messages, 400
+        except (UniqueError, TypeError) as error:
+            app.logger.error(str(error))
+            return str(error), 400
+        except ValueError:
+            app.logger.error('Department not found')
+            return 'Department not found', 404
+        return '', 204
+
     def delete(self, department_id: int):
         """
         DELETE request handler of department API
 
-        Uses service to delete the department with given id
+        Uses service to delete the department with given id, its employees are
+        left without department, moved to department named by `reassign_to` query param
+        or deleted according to `orphans` query param (see `orphan_policies` of service)
         Returns no content message with a status code 204(No Content) or
-        error message with a status code 404(Not Found)
+        error message with a status code 400(Bad Request) in case of invalid policy
+        or reassignment or error message with a status code 404(Not Found)
         in case of department with given id not being found
 
         :param int department_id: id of the department to be deleted
         :return: no content message and status code 204 or
+        error message and a status code 400 in case of invalid policy or reassignment or
         error message and a status code 404 in case of department with given id not being found
         """
+        orphans = request.args.get('orphans', None)
+        reassign_to = request.args.get('reassign_to', None)
+        if orphans is not None and orphans not in self.service.orphan_policies:
+            app.logger.error(f'Invalid orphan policy: {orphans}')
+            return f'orphans should be one of: {", ".join(self.service.orphan_policies)}', 400
         try:
-            app.logger.debug(f'Department id: {department_id}')
-            self.service.delete_department(department_id)
+            app.logger.debug(f'Department id: {department_id}, orphans: {orphans}')
+            self.service.delete_department(department_id, orphans, reassign_to)
+        except (ExistsError, PolicyError, TypeError) as error:
+            app.logger.error(str(error))
+            return str(error), 400
         except ValueError:
             app.logger.error('Department not found')
             return 'Department not found', 404
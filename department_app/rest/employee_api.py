@@ -3,18 +3,34 @@ Departments REST API, this module defines the following classes:
 
 - `EmployeeApiBase`, employee API base class
 - `EmployeeSearchApi`, employee search API class
+- `EmployeeTopApi`, highest paid employees API class
 - `EmployeeListApi`, employee list API class
 - `EmployeeApi`, employee API class
+- `EmployeeTransferApi`, employee transfer API class
+- `EmployeeSalaryAdjustmentApi`, employee salary adjustment API class
+- `EmployeeReconcileApi`, employee roster reconcile API class
+
+and the following functions:
+
+- `get_date_or_none`: converts date string into date object
+- `get_ids`: converts comma-separated ids into list of integers
+- `get_filter_params`: converts search filter of request body into filter params
+- `get_write_filter_params`: converts filter of set-based write into filter params
 """
 
+import codecs
+import json
 from datetime import datetime
 
-from flask_restful import Resource, reqparse
+from flask import request
+from flask_restful import Resource, inputs, reqparse
 from marshmallow import ValidationError
 
 from department_app import app
+from department_app.rest.fragments import dump_many, dump_one, get_employee_key, json_response
 from department_app.schemas.employee_schema import EmployeeSchema
 from department_app.service.employee_service import EmployeeService
+from department_app.service.roster_service import RosterService
 
 from department_app.service.exceptions import ExistsError
 
@@ -35,6 +51,68 @@ def get_date_or_none(date_str, date_format='%d.%m.%Y'):
         return None
 
 
+def get_ids(ids_str, max_count=1000) -> list[int]:
+    """
+    Converts comma-separated ids (e.g. `ids` query param) into list of integers
+
+    :param ids_str: comma-separated ids
+    :param max_count: maximum number of ids
+    :raise ValueError: in case of invalid id or more than `max_count` ids
+    :return: list of ids
+    """
+    ids = [int(id_str) for id_str in str(ids_str).split(',') if id_str.strip()]
+    if not ids or len(ids) > max_count:
+        raise ValueError(f'ids should have from 1 to {max_count} ids')
+    return ids
+
+
+def get_filter_params(filter_json) -> dict:
+    """
+    Converts search filter of request body (in the same shape as employee search
+    query params) into filter params of employee service, unlike search query params,
+    invalid values are rejected instead of being ignored
+
+    :param filter_json: search filter of request body
+    :raise ValueError: in case of filter not being an object or having invalid values
+    :return: filter params
+    """
+    if not isinstance(filter_json, dict):
+        raise ValueError('filter should be an object')
+
+    filter_params = {}
+    for name in ('name', 'department'):
+        if filter_json.get(name, None) is not None:
+            if not isinstance(filter_json[name], str):
+                raise ValueError(f'{name} should be string')
+            filter_params[name] = filter_json[name]
+    filter_params['fuzzy'] = inputs.boolean(filter_json.get('fuzzy', False))
+    for name in ('start_salary', 'end_salary'):
+        if filter_json.get(name, None) is not None:
+            filter_params[name] = float(filter_json[name])
+    for name in ('start_date', 'end_date', 'in_date'):
+        if filter_json.get(name, None) is not None:
+            filter_params[name] = get_date_or_none(filter_json[name])
+            if filter_params[name] is None:
+                raise ValueError(f'{name} should be date in format dd.mm.yyyy')
+    return filter_params
+
+
+def get_write_filter_params(filter_json) -> dict:
+    """
+    Converts filter selecting employees changed or deleted by set-based write
+    into filter params of employee service, fuzzy name matching is rejected,
+    as it would select employees with similar names as well
+
+    :param filter_json: filter of request body (see `get_filter_params`)
+    :raise ValueError: in case of invalid filter or fuzzy name matching
+    :return: filter params
+    """
+    filter_params = get_filter_params(filter_json)
+    if filter_params.pop('fuzzy'):
+        raise ValueError('fuzzy filter cannot select employees to change')
+    return filter_params
+
+
 class EmployeeApiBase(Resource):
     """
     Employee API base class
@@ -57,19 +135,33 @@ class EmployeeListApi(EmployeeApiBase):
     parser.add_argument('date_of_birth',
                         type=lambda date_str: get_date_or_none(date_str).strftime('%d.%m.%Y'))
 
+    ids_parser = reqparse.RequestParser()
+    ids_parser.add_argument('ids', type=get_ids, location='args')
+
     def get(self):
         """
         GET request handler of employee list API
 
-        Fetches all employees via service
+        Fetches all employees or employees with ids given by comma-separated `ids` param
+        via service
         Returns them in a JSON format with a status code 200(OK)
+        and their number in `X-Total-Count` header, ids of requested employees
+        that don't exist are returned in `X-Missing-Ids` header,
+        employees that didn't change since they were serialized are taken from cache
 
-        :return: list of all employees JSON and a status code 200
+        :return: list of employees JSON response with a status code 200
         """
-        employees = self.service.get_employees()
-        employees = self.schema.dump(employees, many=True)
+        ids = self.ids_parser.parse_args()['ids']
+        headers = {}
+        if ids is None:
+            employees = self.service.get_employee_rows()
+        else:
+            employees, missing_ids = self.service.get_employee_rows_by_ids(ids)
+            headers['X-Missing-Ids'] = ','.join(map(str, missing_ids))
+        headers['X-Total-Count'] = str(len(employees))
+        employees = dump_many(self.schema, employees, get_employee_key)
         app.logger.debug(f'Returned: {employees}')
-        return employees, 200
+        return json_response(employees, headers=headers)
 
     def post(self):
         """
@@ -98,6 +190,30 @@ class EmployeeListApi(EmployeeApiBase):
         app.logger.debug(f'Returned: {employee}')
         return employee, 201
 
+    def delete(self):
+        """
+        DELETE request handler of employee list API
+
+        Deletes the employees given by list of ids (`ids`) or by search filter (`filter`)
+        via service with one DELETE
+        Returns number of deleted employees in a JSON format with a status code 200(OK) or
+        error message with a status code 400(Bad Request) in case of invalid request data
+
+        :return: number of deleted employees JSON and a status code 200 or
+        error message and a status code 400 in case of invalid request data
+        """
+        try:
+            data = request.get_json(silent=True) or {}
+            app.logger.debug(f'Received: {data}')
+            filter_params = (get_write_filter_params(data['filter'])
+                             if data.get('filter', None) is not None else None)
+            count = self.service.delete_employees(data.get('ids', None), filter_params)
+        except (TypeError, ValueError) as error:
+            app.logger.error(str(error))
+            return str(error), 400
+        app.logger.debug(f'Deleted: {count}')
+        return {'deleted': count}, 200
+
 
 class EmployeeApi(EmployeeApiBase):
     """
@@ -119,7 +235,7 @@ class EmployeeApi(EmployeeApiBase):
         error message with a status code 404(Not Found)
         in case of employee with given id not being found
 
-        :return: employee with given id in JSON and a status code 200 or
+        :return: employee with given id in JSON response with a status code 200 or
         error message and a status code 404 in case of employee with given id not being found
         """
         try:
@@ -128,9 +244,9 @@ class EmployeeApi(EmployeeApiBase):
         except ValueError:
             app.logger.error('Employee not found')
             return 'Employee not found', 404
-        employee = self.schema.dump(employee)
+        employee = dump_one(self.schema, employee, get_employee_key)
         app.logger.debug(f'Returned: {employee}')
-        return employee, 200
+        return json_response(employee)
 
     def put(self, employee_id: int):
         """
@@ -166,6 +282,38 @@ class EmployeeApi(EmployeeApiBase):
         app.logger.debug(f'Returned: {employee}')
         return employee, 200
 
+    def patch(self, employee_id: int):
+        """
+        PATCH request handler of employee API
+
+        Uses service to update only the fields present in request data
+        of the employee with given id, department is given by its name
+        Returns no content message with a status code 204(No Content) or
+        error message with a status code 400(Bad Request)
+        in case of validation error during deserialization or
+        error message with a status code 404(Not Found)
+        in case of employee with given id not being found
+
+        :return: no content message and status code 204 or
+        error message and status code 400 in case of validation error or
+        error message and a status code 404 in case of employee with given id not being found
+        """
+        try:
+            app.logger.debug(f'Employee id: {employee_id}')
+            data = request.get_json(silent=True)
+            app.logger.debug(f'Received: {data}')
+            self.service.patch_employee(employee_id, data)
+        except ValidationError as error:
+            app.logger.error(error.messages)
+            return error.messages, 400
+        except ValueError:
+            app.logger.error('Employee not found')
+            return 'Employee not found', 404
+        except (ExistsError, TypeError) as error:
+            app.logger.error(str(error))
+            return str(error), 400
+        return '', 204
+
     def delete(self, employee_id: int):
         """
         DELETE request handler of employee API
@@ -201,6 +349,11 @@ class EmployeeSearchApi(EmployeeApiBase):
     parser.add_argument('start_date', type=lambda date_str: get_date_or_none(date_str))
     parser.add_argument('end_date', type=lambda date_str: get_date_or_none(date_str))
     parser.add_argument('in_date', type=lambda date_str: get_date_or_none(date_str))
+    parser.add_argument('fuzzy', type=inputs.boolean, default=False)
+    parser.add_argument('facets', type=inputs.boolean, default=False)
+    parser.add_argument('sort', type=str)
+    parser.add_argument('limit', type=int)
+    parser.add_argument('count', choices=EmployeeService.count_modes)
 
     def get(self):
         """
@@ -208,21 +361,193 @@ class EmployeeSearchApi(EmployeeApiBase):
 
         Fetches the employees filtered by given params via service
         Unspecified parameters will not filter the result
+        If `fuzzy` is true, name is matched tolerating typos and
+        the employees are ordered from the most similar name
+        If `sort` is specified (name, salary, date_of_birth or department,
+        prefixed with '-' for descending order), the employees are ordered by it
+        If `limit` is specified, at most `limit` employees are returned
+        If `facets` is true, the employees are returned together with their counts
+        per department and salary band, the counts are made by the database
+        and include employees beyond the limit
+        If `count` is specified (exact, estimated or capped), number of the employees
+        ignoring the limit is returned in `X-Total-Count` header, it's counted
+        by a separate query only if the limit cuts the employees off
         Returns them in a JSON format with a status code 200(OK) or
         error message with a status code 400(Bad Request)
-        in case of both the exact date and the period being specified
+        in case of both the exact date and the period being specified or
+        in case of invalid sort or limit
 
-        :return: list of the employees filtered by given params in JSON and a status code 200 or
-        error message and a status code 400
+        :return: list of the employees filtered by given params in JSON response
+        with a status code 200 or error message and a status code 400
         in case of both the exact date and the period being specified
         """
         try:
             data = self.parser.parse_args()
             app.logger.debug(f'Received: {data}')
-            employees = self.service.get_filtered_employees(data)
+            facets = data.pop('facets')
+            count = data.pop('count')
+            limit = self.service.get_limit(data)
+            employees = self.service.get_filtered_employee_rows(data)
+            facets = self.service.count_facets(data) if facets else None
+
+            headers = {}
+            if count and facets:
+                # every employee is counted once by department facets
+                total = sum(department['count'] for department in facets['departments'])
+                headers['X-Total-Count'] = self.service.format_count(total, count)
+            elif count and (limit is None or len(employees) < limit):
+                # all the employees were fetched, so counting them costs nothing
+                headers['X-Total-Count'] = self.service.format_count(len(employees), count)
+            elif count:
+                headers['X-Total-Count'] = self.service.count_filtered_employees(data, count)
         except ValueError as error:
             app.logger.error(str(error))
             return str(error), 400
-        employees = self.schema.dump(employees, many=True)
+        if facets:
+            result = (f'{{"employees": {dump_many(self.schema, employees, get_employee_key)}'
+                      f', "facets": {json.dumps(facets)}}}')
+        else:
+            result = dump_many(self.schema, employees, get_employee_key)
+        app.logger.debug(f'Returned: {result}')
+        return json_response(result, headers=headers)
+
+
+class EmployeeTopApi(EmployeeApiBase):
+    """
+    Highest paid employees API class
+    """
+    parser = reqparse.RequestParser()
+    parser.add_argument('n', type=int, default=10)
+    parser.add_argument('department', type=str)
+
+    def get(self):
+        """
+        GET request handler of highest paid employees API
+
+        Fetches `n` highest paid employees of every department
+        (of departments which names contain `department` if it's specified) via service
+        Returns them ordered by department name and salary in a JSON format
+        with a status code 200(OK) or error message with a status code 400(Bad Request)
+        in case of `n` not being positive
+
+        :return: list of the highest paid employees in JSON response with a status code 200 or
+        error message and a status code 400 in case of `n` not being positive
+        """
+        try:
+            data = self.parser.parse_args()
+            app.logger.debug(f'Received: {data}')
+            employees = self.service.get_top_paid_employee_rows(data['n'], data['department'])
+        except ValueError as error:
+            app.logger.error(str(error))
+            return str(error), 400
+        employees = dump_many(self.schema, employees, get_employee_key)
         app.logger.debug(f'Returned: {employees}')
-        return employees, 200
+        return json_response(employees)
+
+
+class EmployeeTransferApi(EmployeeApiBase):
+    """
+    Employee transfer API class
+    """
+
+    def post(self):
+        """
+        POST request handler of employee transfer API
+
+        Moves the employees given by list of ids (`ids`) or by search filter (`filter`)
+        to the department with given name (`department`) via service with one UPDATE
+        Returns number of moved employees in a JSON format with a status code 200(OK) or
+        error message with a status code 400(Bad Request)
+        in case of invalid request data or department with given name not existing
+
+        :return: number of moved employees JSON and a status code 200 or
+        error message and a status code 400 in case of invalid request data
+        """
+        try:
+            data = request.get_json(silent=True) or {}
+            app.logger.debug(f'Received: {data}')
+            filter_params = (get_write_filter_params(data['filter'])
+                             if data.get('filter', None) is not None else None)
+            count = self.service.transfer_employees(data.get('department', None),
+                                                    data.get('ids', None), filter_params)
+        except (ExistsError, TypeError, ValueError) as error:
+            app.logger.error(str(error))
+            return str(error), 400
+        app.logger.debug(f'Transferred: {count}')
+        return {'transferred': count}, 200
+
+
+class EmployeeSalaryAdjustmentApi(EmployeeApiBase):
+    """
+    Employee salary adjustment API class
+    """
+
+    def post(self):
+        """
+        POST request handler of employee salary adjustment API
+
+        Raises salaries of the employees given by list of ids (`ids`) or by search filter
+        (`filter`) by percent (`percent`) or by fixed amount (`delta`) via service
+        with one UPDATE, nothing is changed if `dry_run` is true
+        Returns number of employees and their total salary before and after adjustment
+        in a JSON format with a status code 200(OK) or
+        error message with a status code 400(Bad Request) in case of invalid request data
+
+        :return: adjustment impact JSON and a status code 200 or
+        error message and a status code 400 in case of invalid request data
+        """
+        try:
+            data = request.get_json(silent=True) or {}
+            app.logger.debug(f'Received: {data}')
+            filter_params = (get_write_filter_params(data['filter'])
+                             if data.get('filter', None) is not None else None)
+            impact = self.service.adjust_salaries(
+                data.get('percent', None), data.get('delta', None),
+                data.get('ids', None), filter_params,
+                dry_run=inputs.boolean(data.get('dry_run', False))
+            )
+        except (TypeError, ValueError) as error:
+            app.logger.error(str(error))
+            return str(error), 400
+        app.logger.debug(f'Adjusted: {impact}')
+        return impact, 200
+
+
+class EmployeeReconcileApi(Resource):
+    """
+    Employee roster reconcile API class
+    """
+    # roster database service
+    service = RosterService()
+
+    parser = reqparse.RequestParser()
+    parser.add_argument('dry_run', type=inputs.boolean, default=False, location='args')
+    parser.add_argument('delete_missing', type=inputs.boolean, default=True, location='args')
+
+    def post(self):
+        """
+        POST request handler of employee roster reconcile API
+
+        Streams roster snapshot CSV from request body (columns `name`, `salary`,
+        `date_of_birth` and `department`) and makes employees match it via service,
+        nothing is changed if `dry_run` param is true and employees missing from the roster
+        are kept if `delete_missing` param is false
+        Returns numbers of inserted, updated, deleted and unchanged employees,
+        skipped ambiguous keys and created departments in a JSON format
+        with a status code 200(OK) or
+        error message with a status code 400(Bad Request) in case of invalid roster
+
+        :return: numbers of changed employees JSON and a status code 200 or
+        error message and a status code 400 in case of invalid roster
+        """
+        data = self.parser.parse_args()
+        app.logger.debug(f'Received: {data}')
+        try:
+            rows = self.service.read_csv(codecs.iterdecode(request.stream, 'utf-8'))
+            report = self.service.reconcile(rows, data['dry_run'], data['delete_missing'])
+        except (UnicodeDecodeError, ValueError) as error:
+            app.logger.error(str(error))
+            return str(error), 400
+        app.logger.debug(f'Reconciled: {report}')
+        return report, 200
+
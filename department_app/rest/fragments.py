@@ -0,0 +1,81 @@
+"""
+Assembly of JSON responses from cached pre-encoded fragments of entities,
+every entity is serialized once per version and list responses are built by
+concatenating the fragments, this module defines the following functions:
+
+- `get_employee_key`: returns cache key of JSON fragment of the employee
+- `get_department_key`: returns cache key of JSON fragment of the department
+- `dump_many`: returns JSON array of the entities built from their fragments
+- `dump_one`: returns JSON of the entity using its cached fragment
+- `json_response`: wraps pre-encoded JSON into a response
+"""
+
+import json
+
+from department_app import app
+from department_app.service.cache import fragment_cache
+
+
+def get_employee_key(employee):
+    """
+    Returns cache key of JSON fragment of the employee
+
+    :param employee: employee or employee record
+    :return: hashable key or None if the fragment can't be cached
+    """
+    key = fragment_cache.get_employee_key(employee)
+    return ('json', key) if key is not None else None
+
+
+def get_department_key(department):
+    """
+    Returns cache key of JSON fragment of the department
+
+    :param department: department or department record
+    :return: hashable key or None if the fragment can't be cached
+    """
+    key = fragment_cache.get_department_key(department)
+    return ('json', key) if key is not None else None
+
+
+def dump_many(schema, items: list, key) -> str:
+    """
+    Returns JSON array of the entities, only the entities which fragments
+    aren't cached are serialized, with one schema call
+
+    :param schema: schema serializing the entities
+    :param items: entities or records to serialize
+    :param key: function returning cache key of the entity fragment
+    :return: JSON array of serialized entities
+    """
+    fragments = fragment_cache.render(
+        items, key, lambda missing: [json.dumps(data) for data in schema.dump(missing, many=True)]
+    )
+    return f'[{", ".join(fragments)}]'
+
+
+def dump_one(schema, item, key) -> str:
+    """
+    Returns JSON of the entity, it's serialized only if its fragment isn't cached
+
+    :param schema: schema serializing the entity
+    :param item: entity or record to serialize
+    :param key: function returning cache key of the entity fragment
+    :return: JSON of serialized entity
+    """
+    return fragment_cache.render(
+        [item], key, lambda missing: [json.dumps(schema.dump(missing[0]))]
+    )[0]
+
+
+def json_response(body: str, status: int = 200, headers: dict = None):
+    """
+    Wraps pre-encoded JSON into a response, REST resources return it as is
+
+    :param body: JSON to respond with
+    :param status: status code of the response
+    :param headers: headers of the response
+    :return: response with JSON body
+    """
+    return app.response_class(body, status=status, headers=headers,
+                              mimetype='application/json')
@@ -24,6 +24,7 @@ class DepartmentSchema(ma.SQLAlchemyAutoSchema):
         Department schema metadata
         """
         model = Department
+        exclude = ('version',)
         load_instance = True
         include_fk = True
         dump_only = ('id', 'employees')  # fields to provide only on serialization
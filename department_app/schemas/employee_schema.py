@@ -25,7 +25,7 @@ class EmployeeSchema(ma.SQLAlchemyAutoSchema):
         Employee schema metadata
         """
         model = Employee
-        exclude = ('department_id',)
+        exclude = ('department_id', 'version')
         load_instance = True
         include_fk = True
         dateformat = '%d.%m.%Y'
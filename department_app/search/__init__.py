@@ -0,0 +1,10 @@
+"""
+This package contains modules defining in-memory search engines used by services,
+they are imported by the services, as caches used by services index names with them:
+
+Modules:
+- `columnar.py`: defines columnar employee search engine backed by NumPy arrays
+- `ngram.py`: defines n-gram inverted index answering substring queries on names
+- `prefix.py`: defines sorted prefix index answering autocomplete queries on names
+- `snapshot.py`: defines memory-mapped snapshots of indexes shared by processes
+"""
@@ -0,0 +1,524 @@
+"""
+In-memory columnar employee search engine, it keeps employees as NumPy arrays
+with sorted indexes on salary and date of birth and answers the same filters
+as `EmployeeService.get_filtered_employees` without database queries.
+
+The arrays are stored in a memory-mapped snapshot shared by all application processes,
+so they are built from the database once per generation of employees
+instead of once per process. Employee writes are appended to the delta log
+of the generation, which processes merge into the snapshot while searching,
+the log is compacted into the snapshot of the next generation once it grows too big.
+
+NumPy is an optional dependency, the engine is used only if it is installed
+and `IN_MEMORY_SEARCH` is enabled in the application config.
+
+This module defines the following classes:
+
+- `EmployeeColumns`, columnar employee search engine
+
+and the following objects:
+
+- `employee_search`, columnar employee search engine used by employee service
+"""
+
+import glob
+import json
+import os
+import threading
+import uuid
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from sqlalchemy import select
+
+from department_app import app, db
+from department_app.models.employee import Employee
+from department_app.models.rows import DepartmentRow, EmployeeRow
+from department_app.search.snapshot import Snapshot
+from department_app.service.cache import SharedVersion, department_names, employee_names
+
+
+class EmployeeColumns:
+    """
+    Columnar employee search engine
+
+    Employees are kept in arrays ordered by id (`ids`, `salaries`, `dates` as ordinal days,
+    `departments`) and a string table of their names with sorted indexes on salary
+    and date of birth, so range filters are answered with `searchsorted`,
+    name filter by searching the string table and other filters with vectorized masks.
+
+    The arrays are memory-mapped from the snapshot of the current generation,
+    the snapshot is built from the database by the first process that needs it.
+    Employee writes of any process are appended to the delta log of the generation
+    and the shared version (`<generation>.<size of the delta log>`) is changed,
+    processes read only the new part of the log into the overlay of changed employees,
+    which replaces their records of the snapshot. Once the log exceeds `max_delta_size`
+    it's compacted into the snapshot of the next generation. Writes the engine
+    didn't see change the generation without the snapshot, so it's built from
+    the database again. Files of the previous generation are kept for processes
+    still loading it.
+    """
+
+    # ordinal of missing date of birth, real ordinals start from 1
+    NO_DATE = 0
+
+    # id of missing department, real ids start from 1
+    NO_DEPARTMENT = 0
+
+    # arrays storing employee columns, ordered as the fields of employee records
+    columns = ('ids', 'salaries', 'dates', 'departments')
+
+    # size of the delta log in bytes the log is compacted into the next generation after
+    max_delta_size = 256 * 1024
+
+    # number of the latest generations which files are kept
+    kept_generations = 2
+
+    # number of attempts to load the current generation without the lock
+    load_attempts = 3
+
+    def __init__(self):
+        self.version = SharedVersion('employees')
+        self._snapshot = None
+        self._overlay = {}
+        self._delta_size = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def is_available() -> bool:
+        """
+        Checks if NumPy is installed
+
+        :return: True if NumPy is installed, False otherwise
+        """
+        return np is not None
+
+    def is_enabled(self) -> bool:
+        """
+        Checks if the engine should be used instead of database queries
+
+        :return: True if NumPy is installed and the engine is enabled in config
+        """
+        return self.is_available() and app.config.get('IN_MEMORY_SEARCH', False)
+
+    @classmethod
+    def to_record(cls, employee) -> tuple:
+        """
+        Converts the employee to the record stored by the engine
+
+        :param employee: employee to convert
+        :return: tuple of id, name, salary, date of birth ordinal and department id
+        """
+        return (
+            employee.id,
+            employee.name,
+            employee.salary,
+            employee.date_of_birth.toordinal() if employee.date_of_birth else cls.NO_DATE,
+            employee.department_id or cls.NO_DEPARTMENT
+        )
+
+    @staticmethod
+    def _get_path(generation: str, kind: str = 'snapshot') -> str:
+        """
+        Returns path of the snapshot or the delta log of given generation
+
+        :param generation: generation of the snapshot
+        :param kind: 'snapshot' or 'delta'
+        :return: path of the file
+        """
+        return os.path.join(app.config['CACHE_VERSION_DIR'], f'employees.{generation}.{kind}')
+
+    @staticmethod
+    def _parse_version(version: str) -> tuple:
+        """
+        Splits shared version into generation and size of its delta log
+
+        :param version: shared version (`<generation>.<size of the delta log>`)
+        :return: tuple of generation and size of the delta log
+        """
+        generation, _, delta_size = version.partition('.')
+        return generation, int(delta_size or 0)
+
+    @staticmethod
+    def _index(columns: dict) -> dict:
+        """
+        Adds sorted indexes on salary and date of birth to the columns
+
+        :param columns: employee columns by their names
+        :return: employee columns and sorted indexes by their names
+        """
+        arrays = dict(columns)
+        for column in ('salaries', 'dates'):
+            order = np.argsort(columns[column], kind='stable')
+            arrays[f'{column}_order'] = order
+            arrays[f'sorted_{column}'] = columns[column][order]
+        return arrays
+
+    def _publish(self, generation: str, records: list) -> Snapshot:
+        """
+        Writes the snapshot of given generation from records ordered by id and maps it,
+        files of generations older than `kept_generations` latest ones are removed,
+        processes that mapped them keep using them until they swap to the new generation,
+        must be called holding the shared version lock
+
+        :param generation: generation of the snapshot
+        :param records: employee records ordered by id (see `to_record`)
+        :return: snapshot of the generation
+        """
+        columns = {
+            column: np.fromiter((record[field] for record in records),
+                                dtype=np.int64, count=len(records))
+            for column, field in zip(self.columns, (0, 2, 3, 4))
+        }
+        strings, string_offsets = Snapshot.encode_strings(record[1] for record in records)
+
+        path = self._get_path(generation)
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        Snapshot.write(path, generation, self._index(columns), strings, string_offsets)
+        snapshot = Snapshot(path)
+
+        def modified(old_path):
+            try:
+                return os.path.getmtime(old_path)
+            except OSError:
+                return 0
+
+        old_paths = sorted((old_path for old_path in glob.glob(self._get_path('*'))
+                            if old_path != path), key=modified, reverse=True)
+        for old_path in old_paths[self.kept_generations - 1:]:
+            for old_file in (old_path, old_path[:-len('snapshot')] + 'delta'):
+                try:
+                    os.remove(old_file)
+                except OSError:
+                    # the snapshot is still mapped on platforms not allowing to remove it
+                    pass
+        return snapshot
+
+    def _open(self, generation: str) -> Snapshot:
+        """
+        Maps the snapshot of given generation, builds it from the database
+        with one query if no process did it yet, the build is done holding the shared
+        version lock, so the generation is built by one process only
+
+        :param generation: generation of the snapshot
+        :raise FileNotFoundError: in case of the generation being replaced by the next one
+        :return: snapshot of the generation
+        """
+        path = self._get_path(generation)
+        try:
+            return Snapshot(path)
+        except FileNotFoundError:
+            pass
+
+        with self.version.lock():
+            try:
+                # another process could build it while the lock was awaited
+                return Snapshot(path)
+            except FileNotFoundError:
+                if self._parse_version(self.version.get())[0] != generation:
+                    raise
+
+            statement = (
+                select(Employee.id, Employee.name, Employee.salary,
+                       Employee.date_of_birth, Employee.department_id)
+                .order_by(Employee.id)
+            )
+            records = [self.to_record(row) for row in db.session.execute(statement)]
+            return self._publish(generation, records)
+
+    def _read_delta(self, generation: str, start: int, end: int, overlay: dict) -> None:
+        """
+        Reads the part of the delta log of given generation into the overlay
+
+        :param generation: generation of the delta log
+        :param start: offset of the part in the log
+        :param end: end of the part in the log
+        :param overlay: dict of employee ids and their records or None if they were deleted
+        :raise FileNotFoundError: in case of the generation being replaced by the next ones
+        :return: None
+        """
+        with open(self._get_path(generation, 'delta'), 'rb') as delta_file:
+            delta_file.seek(start)
+            for line in delta_file.read(end - start).splitlines():
+                employee_id, record = json.loads(line)
+                overlay[employee_id] = tuple(record) if record is not None else None
+
+    def _sync(self, version: str) -> None:
+        """
+        Swaps to the snapshot of the generation of given version in case of generation
+        change and reads the new part of its delta log, must be called holding the lock
+
+        :param version: shared version
+        :raise FileNotFoundError: in case of the generation being replaced by the next ones
+        :return: None
+        """
+        generation, delta_size = self._parse_version(version)
+        snapshot, overlay, loaded_size = self._snapshot, self._overlay, self._delta_size
+        if snapshot is None or snapshot.generation != generation:
+            snapshot, overlay, loaded_size = self._open(generation), {}, 0
+        if delta_size > loaded_size:
+            # searches that already took the overlay keep reading it unchanged
+            overlay = dict(overlay)
+            self._read_delta(generation, loaded_size, delta_size, overlay)
+            loaded_size = delta_size
+        self._snapshot, self._overlay, self._delta_size = snapshot, overlay, loaded_size
+
+    def _refresh(self) -> None:
+        """
+        Swaps to the current generation and merges the new writes of its delta log,
+        retries if the generation is replaced by the next ones while it's loaded,
+        the last attempt is done holding the shared version lock
+
+        :return: None
+        """
+        for _ in range(self.load_attempts):
+            version = self.version.get()
+            if not version:
+                break
+            try:
+                self._sync(version)
+                return
+            except FileNotFoundError:
+                continue
+
+        with self.version.lock():
+            self._sync(self.version.get() or self.version.bump())
+
+    @staticmethod
+    def _range_mask(sorted_values, order, low, high):
+        """
+        Returns mask of the values within given range using their sorted index
+
+        :param sorted_values: sorted values
+        :param order: positions of sorted values in the arrays
+        :param low: lower bound of the range or None
+        :param high: upper bound of the range or None
+        :return: boolean mask of the values within the range
+        """
+        start = np.searchsorted(sorted_values, low, side='left') if low is not None else 0
+        end = (np.searchsorted(sorted_values, high, side='right') if high is not None
+               else len(sorted_values))
+        mask = np.zeros(len(sorted_values), dtype=bool)
+        mask[order[start:end]] = True
+        return mask
+
+    @staticmethod
+    def _in_range(value, low, high) -> bool:
+        """
+        Checks if the value is within given range, as `_range_mask` does for arrays
+
+        :param value: value to check
+        :param low: lower bound of the range or None
+        :param high: upper bound of the range or None
+        :return: True if the value is within the range, False otherwise
+        """
+        return (low is None or value >= low) and (high is None or value <= high)
+
+    @classmethod
+    def _get_bounds(cls, filter_params: dict) -> tuple:
+        """
+        Returns salary and date of birth bounds of given filter params,
+        employees without date of birth never match date filters
+
+        :param filter_params: validated params to filter employees by
+        :return: tuple of salary bounds and date of birth ordinal bounds
+        """
+        salary_bounds = (filter_params.get('start_salary', None),
+                         filter_params.get('end_salary', None))
+
+        date_bounds = (None, None)
+        if filter_params.get('in_date', None):
+            date_bounds = (filter_params['in_date'].toordinal(),) * 2
+        elif filter_params.get('start_date', None) or filter_params.get('end_date', None):
+            date_bounds = (
+                (filter_params['start_date'].toordinal() if filter_params.get('start_date', None)
+                 else cls.NO_DATE + 1),
+                (filter_params['end_date'].toordinal() if filter_params.get('end_date', None)
+                 else None)
+            )
+        return salary_bounds, date_bounds
+
+    def search_records(self, filter_params: dict, ranked_ids: list[int] = None) -> list:
+        """
+        Returns records of employees matching given filter params,
+        the snapshot is searched by vectorized masks and the overlay of employees
+        written since the snapshot record by record
+
+        :param filter_params: validated params to filter employees by
+        :param ranked_ids: ids of employees with similar names
+        if the ranking was already computed for the fuzzy name
+        :return: list of employee records (see `to_record`) ordered by id
+        """
+        with self._lock:
+            self._refresh()
+            snapshot, overlay = self._snapshot, self._overlay
+
+        arrays = snapshot.arrays
+        name = filter_params.get('name', None)
+        if ranked_ids is None and name and filter_params.get('fuzzy', False):
+            ranked_ids = employee_names.rank(name)
+        department_ids = (department_names.find_ids(filter_params['department'])
+                          if filter_params.get('department', None) else None)
+        salary_bounds, date_bounds = self._get_bounds(filter_params)
+
+        mask = np.ones(snapshot.count, dtype=bool)
+        if overlay:
+            mask &= ~np.isin(arrays['ids'], np.fromiter(overlay, dtype=np.int64))
+        if ranked_ids is not None:
+            mask &= np.isin(arrays['ids'], ranked_ids)
+        elif name:
+            name_mask = np.zeros(snapshot.count, dtype=bool)
+            name_mask[snapshot.find(name)] = True
+            mask &= name_mask
+        if department_ids is not None:
+            mask &= np.isin(arrays['departments'], department_ids)
+        if salary_bounds != (None, None):
+            mask &= self._range_mask(arrays['sorted_salaries'], arrays['salaries_order'],
+                                     *salary_bounds)
+        if date_bounds != (None, None):
+            mask &= self._range_mask(arrays['sorted_dates'], arrays['dates_order'],
+                                     *date_bounds)
+
+        positions = np.flatnonzero(mask)
+        records = list(zip(arrays['ids'][positions].tolist(),
+                           [snapshot.string(position) for position in positions.tolist()],
+                           arrays['salaries'][positions].tolist(),
+                           arrays['dates'][positions].tolist(),
+                           arrays['departments'][positions].tolist()))
+        if not overlay:
+            return records
+
+        ranked_ids = set(ranked_ids) if ranked_ids is not None else None
+        department_ids = set(department_ids) if department_ids is not None else None
+        records.extend(
+            record for record in overlay.values()
+            if record is not None
+            and (ranked_ids is None or record[0] in ranked_ids)
+            and (ranked_ids is not None or not name or name in record[1])
+            and (department_ids is None or record[4] in department_ids)
+            and self._in_range(record[2], *salary_bounds)
+            and (date_bounds == (None, None) or self._in_range(record[3], *date_bounds))
+        )
+        records.sort(key=lambda record: record[0])
+        return records
+
+    def search(self, filter_params: dict, ranked_ids: list[int] = None) -> list[EmployeeRow]:
+        """
+        Returns records of employees matching given filter params,
+        department names are resolved via department name index
+
+        :param filter_params: validated params to filter employees by
+        :param ranked_ids: ids of employees with similar names (see `search_records`)
+        :return: list of records of employees matching given filter params
+        """
+        departments = {}
+        employees = []
+        for employee_id, name, salary, date_ordinal, department_id in \
+                self.search_records(filter_params, ranked_ids):
+            department = None
+            if department_id != self.NO_DEPARTMENT:
+                department = departments.get(department_id, None)
+                if department is None:
+                    department = departments[department_id] = DepartmentRow(
+                        department_id, department_names.get_name(department_id)
+                    )
+            employees.append(EmployeeRow(
+                employee_id, name, salary,
+                date.fromordinal(date_ordinal) if date_ordinal != self.NO_DATE else None,
+                department
+            ))
+        return employees
+
+    def _apply(self, employee_id: int, record=None) -> None:
+        """
+        Appends the change made by this process to the delta log of the current generation
+        and changes the shared version, so processes merge it while searching,
+        the log is compacted into the snapshot of the next generation once it exceeds
+        `max_delta_size`, nothing is appended if no process built the snapshot yet
+
+        :param employee_id: id of the changed employee
+        :param record: new record of the employee or None if it was deleted
+        :return: None
+        """
+        if not self.is_available():
+            return
+
+        with self._lock, self.version.lock():
+            generation, delta_size = self._parse_version(self.version.get())
+            if not generation or not os.path.exists(self._get_path(generation)):
+                # the snapshot will be built from the database including the change
+                return
+
+            line = json.dumps([employee_id, record]).encode('utf-8') + b'\n'
+            descriptor = os.open(self._get_path(generation, 'delta'), os.O_RDWR | os.O_CREAT,
+                                 0o600)
+            with os.fdopen(descriptor, 'r+b') as delta_file:
+                # a write interrupted before the version was changed is overwritten
+                delta_file.truncate(delta_size)
+                delta_file.seek(delta_size)
+                delta_file.write(line)
+            version = f'{generation}.{delta_size + len(line)}'
+
+            if delta_size + len(line) > self.max_delta_size:
+                self._sync(version)
+                version = self._compact()
+            self.version.bump(version)
+
+    def _compact(self) -> str:
+        """
+        Merges the overlay into the snapshot of the next generation,
+        must be called holding the lock and the shared version lock
+
+        :return: generation of the new snapshot
+        """
+        snapshot, overlay = self._snapshot, self._overlay
+        ids = snapshot.arrays['ids']
+        positions = np.flatnonzero(~np.isin(ids, np.fromiter(overlay, dtype=np.int64)))
+        records = list(zip(ids[positions].tolist(),
+                           [snapshot.string(position) for position in positions.tolist()],
+                           snapshot.arrays['salaries'][positions].tolist(),
+                           snapshot.arrays['dates'][positions].tolist(),
+                           snapshot.arrays['departments'][positions].tolist()))
+        records.extend(record for record in overlay.values() if record is not None)
+        records.sort(key=lambda record: record[0])
+
+        generation = uuid.uuid4().hex
+        self._snapshot, self._overlay, self._delta_size = (
+            self._publish(generation, records), {}, 0
+        )
+        return generation
+
+    def save(self, employee) -> None:
+        """
+        Adds the employee that was written to the database or replaces its previous state
+
+        :param employee: employee that was added or updated
+        :return: None
+        """
+        self._apply(employee.id, self.to_record(employee))
+
+    def remove(self, employee_id: int) -> None:
+        """
+        Removes the employee that was deleted from the database
+
+        :param employee_id: id of the employee that was deleted
+        :return: None
+        """
+        self._apply(employee_id)
+
+    def invalidate(self) -> None:
+        """
+        Marks the engine as outdated in all processes
+
+        :return: None
+        """
+        with self._lock:
+            self._snapshot, self._overlay, self._delta_size = None, {}, 0
+            self.version.bump()
+
+
+employee_search = EmployeeColumns()
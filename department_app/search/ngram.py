@@ -0,0 +1,140 @@
+"""
+N-gram inverted index answering substring and typo-tolerant queries on names,
+this module defines the following classes:
+
+- `NgramIndex`, n-gram inverted index of names
+"""
+
+
+class NgramIndex:
+    """
+    N-gram inverted index of names, maps every case-folded n-gram (by default trigram)
+    to the ids of the names containing it, so substring query is answered
+    by intersecting posting lists of its n-grams and checking the few candidates left
+    instead of scanning all names, substring matching is case-sensitive as `contains`
+    on PostgreSQL, typo-tolerant matching ranks names sharing n-grams with the query
+
+    :param int n: length of indexed n-grams
+    """
+
+    def __init__(self, n: int = 3):
+        self.n = n
+        self._names = {}
+        self._postings = {}
+
+    def __len__(self) -> int:
+        """
+        Returns number of indexed names
+
+        :return: number of indexed names
+        """
+        return len(self._names)
+
+    def _ngrams(self, name: str) -> set[str]:
+        """
+        Returns case-folded n-grams of given name
+
+        :param name: name to split
+        :return: set of n-grams of the name
+        """
+        name = name.casefold()
+        return {name[start:start + self.n] for start in range(len(name) - self.n + 1)}
+
+    def add(self, name_id: int, name: str) -> None:
+        """
+        Indexes the name with given id, replaces previously indexed name with the same id
+
+        :param name_id: id of the name (e.g. id of the employee)
+        :param name: name to index
+        :return: None
+        """
+        self.remove(name_id)
+        self._names[name_id] = name
+        for ngram in self._ngrams(name):
+            self._postings.setdefault(ngram, set()).add(name_id)
+
+    def remove(self, name_id: int) -> None:
+        """
+        Removes the name with given id from the index if it's indexed
+
+        :param name_id: id of the name
+        :return: None
+        """
+        name = self._names.pop(name_id, None)
+        if name is None:
+            return
+        for ngram in self._ngrams(name):
+            posting = self._postings[ngram]
+            posting.discard(name_id)
+            if not posting:
+                del self._postings[ngram]
+
+    def find_ids(self, substring: str):
+        """
+        Returns ids of the names containing given substring,
+        if the substring is shorter than n-grams it can't be answered by the index
+
+        :param substring: substring to search in names
+        :return: set of ids of the names containing the substring or None
+        """
+        ngrams = self._ngrams(substring)
+        if len(substring) < self.n or not ngrams:
+            return None
+
+        postings = []
+        for ngram in ngrams:
+            posting = self._postings.get(ngram, None)
+            if not posting:
+                return set()
+            postings.append(posting)
+
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        # n-grams of the substring can occur in the name apart from each other or in other case
+        return {name_id for name_id in candidates if substring in self._names[name_id]}
+
+    def scan(self, substring: str) -> set[int]:
+        """
+        Returns ids of the names containing given substring of any length,
+        substrings shorter than n-grams are searched by scanning all names
+
+        :param substring: substring to search in names
+        :return: set of ids of the names containing the substring
+        """
+        name_ids = self.find_ids(substring)
+        if name_ids is None:
+            name_ids = {name_id for name_id, name in self._names.items() if substring in name}
+        return name_ids
+
+    def rank(self, query: str, limit: int = None, threshold: float = 0.5) -> list[int]:
+        """
+        Returns ids of the names similar to given query ordered from the most similar,
+        tolerating typos and case, only names sharing n-grams with the query
+        (found in posting lists of its n-grams) are compared with it
+
+        Similarity is the share of the query n-grams found in the name,
+        names with equal similarity are ordered by share of the name n-grams
+        found in the query, so closer names go first
+
+        :param query: misspelled name or its part
+        :param limit: maximum number of returned ids or None
+        :param threshold: minimal similarity of returned names, from 0 to 1
+        :return: list of ids of the names similar to the query
+        """
+        ngrams = self._ngrams(query)
+        if not ngrams:
+            return []
+
+        shared = {}
+        for ngram in ngrams:
+            for name_id in self._postings.get(ngram, ()):
+                shared[name_id] = shared.get(name_id, 0) + 1
+
+        scores = []
+        for name_id, count in shared.items():
+            similarity = count / len(ngrams)
+            if similarity >= threshold:
+                name_ngrams = self._ngrams(self._names[name_id])
+                scores.append((-similarity, -count / len(name_ngrams), name_id))
+        scores.sort()
+        return [name_id for *_, name_id in scores[:limit]]
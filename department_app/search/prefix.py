@@ -0,0 +1,85 @@
+"""
+Sorted prefix index answering autocomplete queries on names,
+this module defines the following classes:
+
+- `PrefixIndex`, sorted prefix index of names
+"""
+
+from bisect import bisect_left, insort
+
+
+class PrefixIndex:
+    """
+    Sorted prefix index of names, keeps case-folded names sorted,
+    so names starting with given prefix are found by binary search
+    and read one after another until the first name without the prefix
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._entries = {}
+
+    @classmethod
+    def from_items(cls, items) -> 'PrefixIndex':
+        """
+        Builds the index of given names sorting them once,
+        the last name is indexed if the same id is given several times
+
+        :param items: iterable of tuples of id and name
+        :return: index of the names
+        """
+        index = cls()
+        index._entries = {name_id: (name.casefold(), name, name_id) for name_id, name in items}
+        index._keys = sorted(index._entries.values())
+        return index
+
+    def __len__(self) -> int:
+        """
+        Returns number of indexed names
+
+        :return: number of indexed names
+        """
+        return len(self._keys)
+
+    def add(self, name_id: int, name: str) -> None:
+        """
+        Indexes the name with given id, replaces previously indexed name with the same id
+
+        :param name_id: id of the name (e.g. id of the employee)
+        :param name: name to index
+        :return: None
+        """
+        self.remove(name_id)
+        key = (name.casefold(), name, name_id)
+        self._entries[name_id] = key
+        insort(self._keys, key)
+
+    def remove(self, name_id: int) -> None:
+        """
+        Removes the name with given id from the index if it's indexed
+
+        :param name_id: id of the name
+        :return: None
+        """
+        key = self._entries.pop(name_id, None)
+        if key is not None:
+            del self._keys[bisect_left(self._keys, key)]
+
+    def complete(self, prefix: str, limit: int) -> list[tuple]:
+        """
+        Returns names starting with given prefix ignoring case, ordered alphabetically
+
+        :param prefix: beginning of the name
+        :param limit: maximum number of returned names
+        :return: list of tuples of id and name
+        """
+        prefix = prefix.casefold()
+        names = []
+        position = bisect_left(self._keys, (prefix,))
+        while position < len(self._keys) and len(names) < limit:
+            folded_name, name, name_id = self._keys[position]
+            if not folded_name.startswith(prefix):
+                break
+            names.append((name_id, name))
+            position += 1
+        return names
@@ -0,0 +1,159 @@
+"""
+Memory-mapped snapshots of in-memory search indexes shared by application processes
+(e.g. gunicorn workers), this module defines the following classes:
+
+- `Snapshot`, read-only memory-mapped snapshot of fixed-width arrays and a string table
+
+Snapshot file starts with magic bytes and the length of JSON header describing
+the generation of the snapshot and offsets of the arrays, followed by the arrays
+aligned to 8 bytes and the string table (NUL-terminated UTF-8 strings).
+"""
+
+import json
+import mmap
+import os
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+class Snapshot:
+    """
+    Read-only memory-mapped snapshot of fixed-width arrays and a string table,
+    the file is mapped by every process reading it, so the data is loaded
+    from disk once and its memory is shared by all the processes
+
+    :param str path: path of the snapshot file
+    """
+
+    # marks snapshot files and their format version
+    magic = b'DASNAP01'
+
+    # magic bytes and length of JSON header
+    prefix = struct.Struct('<8sQ')
+
+    # alignment of the arrays in the file
+    alignment = 8
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, header_length = self.prefix.unpack_from(self._mmap)
+        if magic != self.magic:
+            raise ValueError(f'{path} is not a snapshot')
+        header = json.loads(self._mmap[self.prefix.size:self.prefix.size + header_length])
+
+        self.generation = header['generation']
+        self.count = header['count']
+        self.arrays = {
+            name: np.frombuffer(self._mmap, dtype=dtype, count=length, offset=offset)
+            for name, (dtype, offset, length) in header['arrays'].items()
+        }
+        self.string_offsets = self.arrays.pop('string_offsets')
+        self._strings_start, self._strings_end = header['strings']
+
+    def string(self, position: int) -> str:
+        """
+        Returns string of the string table at given position
+
+        :param position: position of the string
+        :return: string at the position
+        """
+        start = self._strings_start + int(self.string_offsets[position])
+        end = self._strings_start + int(self.string_offsets[position + 1]) - 1
+        return self._mmap[start:end].decode('utf-8')
+
+    def strings(self) -> bytes:
+        """
+        Returns copy of the string table
+
+        :return: NUL-terminated UTF-8 strings
+        """
+        return self._mmap[self._strings_start:self._strings_end]
+
+    def find(self, substring: str):
+        """
+        Returns positions of the strings containing given substring,
+        searching the string table instead of decoding the strings
+
+        :param substring: substring to search in the strings
+        :return: array of positions of the strings containing the substring
+        """
+        needle = substring.encode('utf-8')
+        if b'\0' in needle:
+            return np.array([], dtype=np.int64)
+
+        positions = []
+        found = self._mmap.find(needle, self._strings_start, self._strings_end)
+        while found != -1:
+            position = int(np.searchsorted(self.string_offsets, found - self._strings_start,
+                                           side='right')) - 1
+            positions.append(position)
+            # the rest of the string can't add it again
+            found = self._mmap.find(needle,
+                                    self._strings_start + int(self.string_offsets[position + 1]),
+                                    self._strings_end)
+        return np.array(positions, dtype=np.int64)
+
+    @staticmethod
+    def encode_strings(strings) -> tuple:
+        """
+        Encodes the strings into the string table
+
+        :param strings: iterable of strings
+        :return: tuple of NUL-terminated UTF-8 strings and array of their offsets
+        """
+        encoded = [string.encode('utf-8') + b'\0' for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(string) for string in encoded], out=offsets[1:])
+        return b''.join(encoded), offsets
+
+    @classmethod
+    def write(cls, path: str, generation: str, arrays: dict, strings: bytes,
+              string_offsets) -> None:
+        """
+        Writes the snapshot file, the file is replaced atomically,
+        so other processes never map partially written snapshot
+
+        :param path: path of the snapshot file
+        :param generation: generation of the snapshot
+        :param arrays: fixed-width arrays of equal length by their names
+        :param strings: string table (see `encode_strings`)
+        :param string_offsets: offsets of the strings in the string table
+        :return: None
+        """
+        arrays = dict(arrays, string_offsets=string_offsets)
+        count = len(string_offsets) - 1
+
+        def align(offset):
+            return -(-offset // cls.alignment) * cls.alignment
+
+        # header length depends on offsets it contains, so they are computed for its maximum
+        header_size = align(cls.prefix.size + 1024 + 64 * len(arrays))
+        offset = header_size
+        layout = {}
+        for name, array in arrays.items():
+            layout[name] = (array.dtype.str, offset, len(array))
+            offset = align(offset + array.nbytes)
+        header = json.dumps({
+            'generation': generation,
+            'count': count,
+            'arrays': layout,
+            'strings': (offset, offset + len(strings))
+        }).encode('utf-8')
+        if cls.prefix.size + len(header) > header_size:
+            raise ValueError('Snapshot header is too long')
+
+        tmp_path = f'{path}.{os.getpid()}'
+        with open(tmp_path, 'wb') as snapshot_file:
+            snapshot_file.write(cls.prefix.pack(cls.magic, len(header)) + header)
+            for name, array in arrays.items():
+                snapshot_file.seek(layout[name][1])
+                snapshot_file.write(np.ascontiguousarray(array).tobytes())
+            snapshot_file.seek(offset)
+            snapshot_file.write(strings)
+        os.replace(tmp_path, path)
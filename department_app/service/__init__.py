@@ -2,11 +2,17 @@
 This package contains modules defining department and employee services:
 
 Modules:
+- `cache.py`: defines in-process caches used by services
 - `department_service.py`: defines department service
 - `employee_service.py`: defines employee service
 - `exceptions.py`: defines custom exceptions for validation
+- `roster_service.py`: defines roster service reconciling employees with HR roster
+- `session.py`: defines database session helpers
 """
 
+from . import cache
 from . import department_service
 from . import employee_service
 from . import exceptions
+from . import roster_service
+from . import session
@@ -0,0 +1,671 @@
+"""
+In-process caches used by services to avoid repeated database queries,
+this module defines the following classes:
+
+- `SharedVersion`, version token shared by application processes through a file
+- `DepartmentNameIndex`, department name to id index
+- `EmployeeNameIndex`, employee name n-gram and prefix index
+- `RequestCache`, request-scoped cache of entity lookups
+- `ResultCache`, LRU cache of search results invalidated by shared versions
+- `FragmentCache`, LRU cache of pre-encoded fragments keyed on entity versions
+
+and the following objects:
+
+- `department_names`, department name to id index shared by services and validators
+- `employee_names`, employee name n-gram and prefix index used by employee service
+- `request_cache`, request-scoped cache of entity lookups used by services
+- `search_results`, cache of employee search results used by employee service
+- `fragment_cache`, cache of pre-encoded JSON and HTML fragments of entities
+"""
+
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # file locks aren't available on Windows, the version is locked within the process only
+    fcntl = None
+
+from flask import g, has_app_context
+
+from department_app import app, db
+from department_app.models.department import Department
+from department_app.models.employee import Employee
+from department_app.search.ngram import NgramIndex
+from department_app.search.prefix import PrefixIndex
+
+
+class SharedVersion:
+    """
+    Version token shared by application processes (e.g. gunicorn workers) through a file,
+    it changes every time `bump` is called in any of the processes,
+    the version is changed only holding its lock (see `lock`)
+
+    :param str name: name of the versioned data
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+
+    @property
+    def path(self) -> str:
+        """
+        Returns path of the file storing the version
+
+        :return: path of the version file
+        """
+        return os.path.join(app.config['CACHE_VERSION_DIR'], f'{self.name}.version')
+
+    def get(self) -> str:
+        """
+        Reads current version, returns empty string if no version was written yet
+
+        :return: current version
+        """
+        try:
+            with open(self.path, encoding='utf-8') as version_file:
+                return version_file.read()
+        except FileNotFoundError:
+            return ''
+
+    def bump(self, version: str = None) -> str:
+        """
+        Writes new version, the file is replaced atomically
+        so other processes never read partially written version
+
+        :param version: new version, random one is generated if it's not given
+        :return: new version
+        """
+        version = version or uuid.uuid4().hex
+        with self.lock():
+            tmp_path = f'{self.path}.{os.getpid()}'
+            with open(tmp_path, 'w', encoding='utf-8') as version_file:
+                version_file.write(version)
+            os.replace(tmp_path, self.path)
+        return version
+
+    @contextmanager
+    def lock(self):
+        """
+        Holds exclusive lock of the version in all processes, so the version can be checked,
+        the change applied and the version bumped without bumps of other processes
+        in between, the lock is reentrant within the process
+
+        :return: context manager holding the lock
+        """
+        with self._lock:
+            if not self._lock_depth:
+                os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+                # pylint: disable=consider-using-with
+                self._lock_file = open(f'{self.path}.lock', 'a', encoding='utf-8')
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if not self._lock_depth:
+                    # closing the file releases the lock
+                    self._lock_file.close()
+                    self._lock_file = None
+
+
+class DepartmentNameIndex:
+    """
+    Department name to id index, loads all departments with one query
+    and reloads them only after department writes in any of the processes,
+    substring queries are answered by n-gram index of the names
+    and autocomplete queries by prefix index of the names
+    """
+
+    def __init__(self):
+        self.version = SharedVersion('departments')
+        self._loaded_version = None
+        self._lock = threading.RLock()
+        self._ids = {}
+        self._names = {}
+        self._ngrams = NgramIndex()
+        self._prefixes = PrefixIndex()
+
+    def _refresh(self) -> None:
+        """
+        Reloads the index in case of version change
+
+        :return: None
+        """
+        version = self.version.get()
+        if version != self._loaded_version:
+            self._ids = dict(db.session.query(Department.name, Department.id).all())
+            self._names = {department_id: name for name, department_id in self._ids.items()}
+            self._ngrams = NgramIndex()
+            for department_id, name in self._names.items():
+                self._ngrams.add(department_id, name)
+            self._prefixes = PrefixIndex.from_items(self._names.items())
+            self._loaded_version = version
+
+    def get_id(self, name: str):
+        """
+        Returns id of the department with given name
+        if there is no such department return None
+
+        :param name: name of the department
+        :return: id of the department with given name or None
+        """
+        with self._lock:
+            self._refresh()
+            return self._ids.get(name, None)
+
+    def get_name(self, department_id: int):
+        """
+        Returns name of the department with given id
+        if there is no such department return None
+
+        :param department_id: id of the department
+        :return: name of the department with given id or None
+        """
+        with self._lock:
+            self._refresh()
+            return self._names.get(department_id, None)
+
+    def find_ids(self, substring: str) -> list[int]:
+        """
+        Returns ids of the departments which names contain given substring
+
+        :param substring: substring to search in department names
+        :return: ids of the departments which names contain given substring
+        """
+        with self._lock:
+            self._refresh()
+            return sorted(self._ngrams.scan(substring))
+
+    def complete(self, prefix: str, limit: int) -> list[str]:
+        """
+        Returns names of the departments starting with given prefix ignoring case
+
+        :param prefix: beginning of the department name
+        :param limit: maximum number of returned names
+        :return: list of department names ordered alphabetically
+        """
+        with self._lock:
+            self._refresh()
+            return [name for _, name in self._prefixes.complete(prefix, limit)]
+
+    def invalidate(self) -> None:
+        """
+        Marks the index as outdated in all processes
+
+        :return: None
+        """
+        with self._lock:
+            self._loaded_version = None
+            self.version.bump()
+
+
+department_names = DepartmentNameIndex()
+
+
+class EmployeeNameIndex:
+    """
+    Employee name n-gram index used as a pre-filter of employee name search
+    and prefix index used by autocomplete, loads all employee names with one query,
+    applies employee writes of this process incrementally and reloads the names
+    after employee writes in other processes
+    """
+
+    # maximum number of candidate ids passed to SQL query instead of name condition
+    # and maximum number of employees found by typo-tolerant search
+    max_candidates = 500
+
+    def __init__(self):
+        self.version = SharedVersion('employee_names')
+        self._loaded_version = None
+        self._lock = threading.RLock()
+        self._ngrams = NgramIndex()
+        self._prefixes = PrefixIndex()
+
+    def _refresh(self) -> None:
+        """
+        Reloads the index in case of version change
+
+        :return: None
+        """
+        version = self.version.get()
+        if version != self._loaded_version:
+            names = db.session.query(Employee.id, Employee.name).all()
+            ngrams = NgramIndex()
+            for employee_id, name in names:
+                ngrams.add(employee_id, name)
+            self._ngrams, self._prefixes = ngrams, PrefixIndex.from_items(names)
+            self._loaded_version = version
+
+    def find_ids(self, substring: str):
+        """
+        Returns ids of the employees which names contain given substring,
+        if the substring is shorter than n-grams return None
+
+        :param substring: substring to search in employee names
+        :return: set of ids of the employees which names contain the substring or None
+        """
+        with self._lock:
+            self._refresh()
+            return self._ngrams.find_ids(substring)
+
+    def rank(self, query: str) -> list[int]:
+        """
+        Returns ids of the employees which names are similar to given query,
+        ordered from the most similar, tolerating typos
+
+        :param query: misspelled employee name or its part
+        :return: list of at most `max_candidates` ids of the employees
+        """
+        with self._lock:
+            self._refresh()
+            return self._ngrams.rank(query, limit=self.max_candidates)
+
+    def complete(self, prefix: str, limit: int) -> list[tuple]:
+        """
+        Returns employees which names start with given prefix ignoring case
+
+        :param prefix: beginning of the employee name
+        :param limit: maximum number of returned employees
+        :return: list of tuples of id and name ordered alphabetically by name
+        """
+        with self._lock:
+            self._refresh()
+            return self._prefixes.complete(prefix, limit)
+
+    def _apply(self, change) -> None:
+        """
+        Applies the change made by this process if the index is up to date,
+        otherwise marks the index outdated, changes the shared version in both cases,
+        the shared version is locked, so changes of other processes aren't missed
+
+        :param change: function taking n-gram or prefix index that applies the change to it
+        :return: None
+        """
+        with self._lock, self.version.lock():
+            if self._loaded_version is None or self.version.get() != self._loaded_version:
+                self.invalidate()
+                return
+
+            change(self._ngrams)
+            change(self._prefixes)
+            self._loaded_version = self.version.bump()
+
+    def save(self, employee_id: int, name: str) -> None:
+        """
+        Indexes the name of the employee that was added or updated
+
+        :param employee_id: id of the employee
+        :param name: name of the employee
+        :return: None
+        """
+        self._apply(lambda index: index.add(employee_id, name))
+
+    def remove(self, employee_id: int) -> None:
+        """
+        Removes the name of the employee that was deleted
+
+        :param employee_id: id of the employee
+        :return: None
+        """
+        self._apply(lambda index: index.remove(employee_id))
+
+    def invalidate(self) -> None:
+        """
+        Marks the index as outdated in all processes
+
+        :return: None
+        """
+        with self._lock:
+            self._loaded_version = None
+            self.version.bump()
+
+
+employee_names = EmployeeNameIndex()
+
+
+class RequestCache:
+    """
+    Request-scoped cache of entity lookups stored on `flask.g`,
+    it is enabled only while a request is handled, so each entity is
+    loaded at most once per request, services clear it on writes
+    """
+
+    # attribute of `flask.g` the cache is stored in
+    attribute = 'request_cache'
+
+    # marks absence of the key in the cache, as None is a valid result of a lookup
+    _missing = object()
+
+    def _get_storage(self):
+        """
+        Returns storage of the current request or None outside of request handling
+
+        :return: storage of the current request or None
+        """
+        if not has_app_context():
+            return None
+        return g.get(self.attribute, None)
+
+    def get_or_load(self, key, loader):
+        """
+        Returns cached result of the lookup with given key,
+        calls loader and caches its result in case of cache miss
+
+        :param key: hashable key of the lookup
+        :param loader: function without arguments that performs the lookup
+        :return: result of the lookup
+        """
+        storage = self._get_storage()
+        if storage is None:
+            return loader()
+
+        result = storage.get(key, self._missing)
+        if result is self._missing:
+            result = storage[key] = loader()
+        return result
+
+    def clear(self) -> None:
+        """
+        Removes all cached lookups of the current request
+
+        :return: None
+        """
+        storage = self._get_storage()
+        if storage is not None:
+            storage.clear()
+
+    def start(self) -> None:
+        """
+        Enables the cache for the current request
+
+        :return: None
+        """
+        setattr(g, self.attribute, {})
+
+    def stop(self, exception=None) -> None:
+        """
+        Disables the cache after the request was handled
+
+        :param exception: exception raised during request handling if any
+        :return: None
+        """
+
+        # pylint: disable=unused-argument
+
+        g.pop(self.attribute, None)
+
+
+request_cache = RequestCache()
+
+app.before_request(request_cache.start)
+app.teardown_request(request_cache.stop)
+
+
+class ResultCache:
+    """
+    LRU cache of search results shared by requests of the process, keyed on
+    normalized search params, the results are dropped once any of the versions
+    of the data they depend on is changed in any of the processes or
+    the cache is invalidated (e.g. by set-based writes)
+
+    The size of the cache is limited by `SEARCH_CACHE_SIZE` config value,
+    the total number of cached records (empty results count as one record),
+    least recently used results are evicted to keep within it, zero disables the cache
+
+    :param str name: name of the shared version of the cache
+    :param versions: shared versions of the data the results depend on
+    :type versions: SharedVersion
+    """
+
+    def __init__(self, name: str, *versions):
+        self.version = SharedVersion(name)
+        self.versions = (self.version,) + versions
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        self._loaded_versions = None
+
+    @property
+    def max_size(self) -> int:
+        """
+        Returns maximum number of cached records
+
+        :return: maximum number of cached records
+        """
+        return app.config.get('SEARCH_CACHE_SIZE', 0)
+
+    @staticmethod
+    def make_key(params: dict) -> tuple:
+        """
+        Builds canonical key of search params, params that don't affect the search
+        (None, empty strings and False) are left out and the rest are ordered by name
+
+        :param params: search params
+        :return: tuple of pairs of param name and value
+        """
+        return tuple(sorted(
+            (name, value) for name, value in params.items()
+            if value is not None and value is not False and value != ''
+        ))
+
+    def _check_versions(self) -> tuple:
+        """
+        Drops cached results in case of version change, must be called holding the lock
+
+        :return: current versions
+        """
+        versions = tuple(version.get() for version in self.versions)
+        if versions != self._loaded_versions:
+            self._entries.clear()
+            self._size = 0
+            self._loaded_versions = versions
+        return versions
+
+    def get_or_load(self, params: dict, loader) -> list:
+        """
+        Returns cached result of the search with given params,
+        calls loader and caches its result in case of cache miss
+
+        :param params: search params
+        :param loader: function without arguments that performs the search
+        :return: copy of the list of found records
+        """
+        max_size = self.max_size
+        key = self.make_key(params)
+        try:
+            hash(key)
+        except TypeError:
+            max_size = 0
+        if max_size <= 0:
+            return loader()
+
+        with self._lock:
+            versions = self._check_versions()
+            result = self._entries.get(key, None)
+            if result is not None:
+                self._entries.move_to_end(key)
+                return list(result)
+
+        result = loader()
+
+        with self._lock:
+            # the data could be changed while the search was performed
+            if versions == self._check_versions() and key not in self._entries \
+                    and len(result) <= max_size:
+                self._entries[key] = tuple(result)
+                # empty results take a record, so their number is limited as well
+                self._size += max(1, len(result))
+                while self._size > max_size:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= max(1, len(evicted))
+        return list(result)
+
+    def __len__(self) -> int:
+        """
+        Returns number of cached results
+
+        :return: number of cached results
+        """
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """
+        Removes all cached results of this process
+
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def invalidate(self) -> None:
+        """
+        Removes cached results in all processes
+
+        :return: None
+        """
+        self.clear()
+        self.version.bump()
+
+
+search_results = ResultCache('search_results', department_names.version, employee_names.version)
+
+
+class FragmentCache:
+    """
+    LRU cache of pre-encoded fragments of responses (e.g. JSON of an entity)
+    keyed on versions of the entities they are built from, a changed entity
+    gets a new key, so entity writes don't invalidate the cache, fragments of old versions
+    are evicted as least recently used, the cache is invalidated only when the tables
+    are recreated (e.g. by populating the database)
+
+    The number of cached fragments is limited by `FRAGMENT_CACHE_SIZE` config value,
+    zero disables the cache
+    """
+
+    def __init__(self):
+        self.version = SharedVersion('fragments')
+        self._loaded_version = None
+        self._lock = threading.Lock()
+        self._fragments = OrderedDict()
+
+    @staticmethod
+    def get_employee_key(employee):
+        """
+        Returns versioned identity of the employee for keys of its fragments,
+        the fragments show the name of the employee department,
+        so the identity includes the department version
+
+        :param employee: employee or employee record
+        :return: hashable identity or None if the employee or its department has no version
+        """
+        if employee is None:
+            return None
+        department = employee.department
+        version = getattr(employee, 'version', None)
+        department_version = (getattr(department, 'version', None) if department is not None
+                              else 0)
+        if version is None or department_version is None:
+            return None
+        return ('employee', employee.id, version,
+                department.id if department is not None else None, department_version)
+
+    @staticmethod
+    def get_department_key(department):
+        """
+        Returns versioned identity of the department for keys of its fragments,
+        the fragments show the employees of the department,
+        so the identity includes their ids and versions
+
+        :param department: department or department record
+        :return: hashable identity or None if the department or any of its employees
+        has no version
+        """
+        if department is None:
+            return None
+        employees = tuple((employee.id, getattr(employee, 'version', None))
+                          for employee in department.employees)
+        if getattr(department, 'version', None) is None \
+                or any(version is None for _, version in employees):
+            return None
+        return 'department', department.id, department.version, employees
+
+    @property
+    def max_size(self) -> int:
+        """
+        Returns maximum number of cached fragments
+
+        :return: maximum number of cached fragments
+        """
+        return app.config.get('FRAGMENT_CACHE_SIZE', 0)
+
+    def __len__(self) -> int:
+        """
+        Returns number of cached fragments
+
+        :return: number of cached fragments
+        """
+        return len(self._fragments)
+
+    def render(self, items: list, key, encode) -> list[str]:
+        """
+        Returns fragments of given items, encodes only the items
+        which fragments aren't cached and caches their fragments
+
+        :param items: items (e.g. entities or records) to get fragments of
+        :param key: function returning hashable key of the item fragment,
+        None if the fragment of the item can't be cached
+        :param encode: function taking list of items and returning list of their fragments
+        :return: list of fragments of the items
+        """
+        max_size = self.max_size
+        keys = [key(item) if max_size > 0 else None for item in items]
+
+        with self._lock:
+            version = self.version.get()
+            if version != self._loaded_version:
+                self._fragments.clear()
+                self._loaded_version = version
+            fragments = [self._fragments.get(item_key, None) if item_key is not None else None
+                         for item_key in keys]
+            for item_key, fragment in zip(keys, fragments):
+                if fragment is not None:
+                    self._fragments.move_to_end(item_key)
+
+        missing = [position for position, fragment in enumerate(fragments) if fragment is None]
+        if not missing:
+            return fragments
+
+        encoded = encode([items[position] for position in missing])
+        with self._lock:
+            for position, fragment in zip(missing, encoded):
+                fragments[position] = fragment
+                if keys[position] is not None:
+                    self._fragments[keys[position]] = fragment
+            while len(self._fragments) > max_size:
+                self._fragments.popitem(last=False)
+        return fragments
+
+    def invalidate(self) -> None:
+        """
+        Removes cached fragments in all processes
+
+        :return: None
+        """
+        with self._lock:
+            self._fragments.clear()
+            self._loaded_version = None
+        self.version.bump()
+
+
+fragment_cache = FragmentCache()
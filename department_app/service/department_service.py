@@ -4,11 +4,29 @@ Department service used to make database queries, this module defines the follow
 - `DepartmentService`, department service
 """
 
-from department_app import db
+from marshmallow import ValidationError
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
+
+from department_app import app, db
 from department_app.models.department import Department
+from department_app.models.employee import Employee
+from department_app.models.rows import DepartmentRow, EmployeeRow
 from department_app.schemas.department_schema import DepartmentSchema
+from department_app.search.columnar import employee_search
+
+from department_app.service.cache import department_names, employee_names, request_cache
+from department_app.service.cache import search_results
+from department_app.service.exceptions import ExistsError, PolicyError, UniqueError
+from department_app.service.session import commit_without_expire
 
-from department_app.service.exceptions import UniqueError
+# insert constructs of the dialects supporting INSERT ... ON CONFLICT
+ON_CONFLICT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert
+}
 
 
 class DepartmentService:
@@ -18,6 +36,10 @@ class DepartmentService:
 
     schema = DepartmentSchema()
 
+    # what happens to employees of deleted department: left without department,
+    # moved to another department or deleted along with it
+    orphan_policies = ('null', 'reassign', 'cascade')
+
     @staticmethod
     def get_departments() -> list[Department]:
         """
@@ -27,6 +49,62 @@ class DepartmentService:
         """
         return db.session.query(Department).all()
 
+    @staticmethod
+    def get_department_rows(*conditions) -> list[DepartmentRow]:
+        """
+        Fetches all departments with their employees from database as read-only records
+        with one Core query, without creating ORM instances
+
+        :param conditions: conditions on department columns selecting the departments
+        :return: list of records of all departments
+        """
+        statement = (
+            select(Department.id, Department.name, Department.version, Employee.id,
+                   Employee.name, Employee.salary, Employee.date_of_birth, Employee.version)
+            .outerjoin(Employee, Employee.department_id == Department.id)
+            .where(*conditions)
+        )
+
+        departments = {}
+        for (department_id, department_name, department_version, employee_id, name,
+             salary, date_of_birth, version) in db.session.execute(statement):
+            department = departments.get(department_id, None)
+            if department is None:
+                department = departments[department_id] = DepartmentRow(
+                    department_id, department_name, version=department_version
+                )
+            if employee_id is not None:
+                department.employees.append(
+                    EmployeeRow(employee_id, name, salary, date_of_birth, department,
+                                version=version)
+                )
+        return list(departments.values())
+
+    @classmethod
+    def get_department_rows_by_ids(cls, department_ids: list[int]) -> tuple:
+        """
+        Fetches departments with given ids together with their employees
+        with one Core query as read-only records
+
+        :param department_ids: ids of the departments
+        :raise TypeError: in case of ids not being list of integers
+        :return: tuple of list of found departments records in order of given ids
+        and list of ids of departments that don't exist
+        """
+        if not isinstance(department_ids, list) or not all(
+                isinstance(department_id, int) and not isinstance(department_id, bool)
+                for department_id in department_ids
+        ):
+            raise TypeError('ids should be list of integers')
+
+        department_ids = list(dict.fromkeys(department_ids))
+        departments = {department.id: department for department
+                       in cls.get_department_rows(Department.id.in_(department_ids))}
+        return ([departments[department_id] for department_id in department_ids
+                 if department_id in departments],
+                [department_id for department_id in department_ids
+                 if department_id not in departments])
+
     # TODO try add | str and deploy to heroku
     @staticmethod
     def get_department_by_id(department_id: int) -> Department:
@@ -39,7 +117,10 @@ class DepartmentService:
         """
         if not isinstance(department_id, (int, str)) or isinstance(department_id, bool):
             raise TypeError('id should be integer or string')
-        return db.session.query(Department).filter_by(id=department_id).first()
+        return request_cache.get_or_load(
+            ('department_id', str(department_id)),
+            lambda: db.session.query(Department).filter_by(id=department_id).first()
+        )
 
     @staticmethod
     def get_department_by_name(name: str) -> Department:
@@ -53,7 +134,40 @@ class DepartmentService:
         if not isinstance(name, str):
             raise TypeError('name should be string')
 
-        return db.session.query(Department).filter_by(name=name).first()
+        return request_cache.get_or_load(
+            ('department_name', name),
+            lambda: db.session.query(Department).filter_by(name=name).first()
+        )
+
+    @staticmethod
+    def get_department_id_by_name(name: str):
+        """
+        Resolves the department name to its id using in-process index,
+        which costs no queries unless departments were changed
+        if there is no such department return None
+
+        :param name: name of the department
+        :return: id of the department with given name or None
+        """
+        if not isinstance(name, str):
+            raise TypeError('name should be string')
+
+        return department_names.get_id(name)
+
+    @staticmethod
+    def complete_department_name(prefix: str, limit: int) -> list[str]:
+        """
+        Finds names of the departments starting with given prefix ignoring case,
+        using in-process index
+
+        :param prefix: beginning of the department name
+        :param limit: maximum number of returned names
+        :return: list of department names ordered alphabetically
+        """
+        if not isinstance(prefix, str):
+            raise TypeError('prefix should be string')
+
+        return department_names.complete(prefix, limit)
 
     @classmethod
     def add_department(cls, department_json) -> Department:
@@ -67,12 +181,29 @@ class DepartmentService:
         name = department_json.get('name', None)
         if not isinstance(name, str):
             raise TypeError('name should be string')
-        if cls.get_department_by_name(name):
-            raise UniqueError('Department with such name is already exists')
 
         department = cls.schema.load(department_json)
+        request_cache.clear()
+
+        insert = ON_CONFLICT_INSERTS.get(db.engine.dialect.name)
+        if insert is None:
+            return cls._commit_department(department)
+
+        result = db.session.execute(
+            insert(Department)
+            .values(name=department.name)
+            .on_conflict_do_nothing(index_elements=['name'])
+        )
+        if not result.rowcount:
+            raise UniqueError('Department with such name is already exists')
+
+        # the row is already written, so the instance is attached as if it was loaded
+        department.id = result.inserted_primary_key[0]
+        department.version = 1
+        make_transient_to_detached(department)
         db.session.add(department)
-        db.session.commit()
+        commit_without_expire()
+        department_names.invalidate()
         return department
 
     @classmethod
@@ -96,31 +227,141 @@ class DepartmentService:
         name = department_json.get('name', None)
         if not isinstance(name, str):
             raise TypeError('name should be string')
-        department_in_db = cls.get_department_by_name(department_json.get('name', name))
-
-        if department_in_db and department_in_db != department:
-            raise UniqueError('Department with such name is already exists')
 
         department = cls.schema.load(department_json, instance=department)
-        db.session.add(department)
+        department.version = Department.version + 1
+        request_cache.clear()
+        return cls._commit_department(department)
+
+    @classmethod
+    def patch_department(cls, department_id: int, department_json) -> None:
+        """
+        Updates only the fields present in partial department data with one UPDATE
+        of changed columns
+
+        :param department_id: id of the department to be updated
+        :param department_json: partial data of the department
+        :raise ValueError: in case of absence of the department with given id
+        :raise ValidationError: in case of invalid or no fields
+        :raise UniqueError: in case of department with given name is already exists
+        :return: None
+        """
+        if not isinstance(department_id, (int, str)) or isinstance(department_id, bool):
+            raise TypeError('id should be integer or string')
+        try:
+            department_id = int(department_id)
+        except ValueError as error:
+            raise ValueError('Invalid department id') from error
+        if not isinstance(department_json, dict):
+            raise ValidationError('Department data should be an object')
+        if 'name' not in department_json:
+            raise ValidationError('No fields to update')
+
+        try:
+            name = cls.schema.fields['name'].deserialize(
+                department_json['name'], 'name', department_json
+            )
+        except ValidationError as error:
+            raise ValidationError({'name': error.messages}) from error
+
+        request_cache.clear()
+        try:
+            result = db.session.execute(
+                update(Department)
+                .where(Department.id == department_id)
+                .values(name=name, version=Department.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+        except IntegrityError as error:
+            db.session.rollback()
+            raise UniqueError('Department with such name is already exists') from error
+        if not result.rowcount:
+            db.session.rollback()
+            raise ValueError('Invalid department id')
         db.session.commit()
+        department_names.invalidate()
+
+    @staticmethod
+    def _commit_department(department: Department) -> Department:
+        """
+        Adds the department to the session and commits it,
+        relies on the unique constraint of the department name
+
+        :param department: department to be committed
+        :raise UniqueError: in case of department with given name is already exists
+        :return: department that was committed
+        """
+        db.session.add(department)
+        try:
+            commit_without_expire()
+        except IntegrityError as error:
+            db.session.rollback()
+            raise UniqueError('Department with such name is already exists') from error
+        department_names.invalidate()
         return department
 
     @classmethod
-    def delete_department(cls, department_id: int) -> None:
+    def delete_department(cls, department_id: int, orphans: str = None,
+                          reassign_to: str = None) -> None:
         """
-        Deletes the department with given id
+        Deletes the department with given id with constant number of statements:
+        one set-based write of its employees according to orphan policy and one DELETE
 
         :param department_id: id of the department to be deleted
+        :param orphans: policy for employees of the department (see `orphan_policies`),
+        `DEPARTMENT_ORPHAN_POLICY` config value by default
+        :param reassign_to: name of the department to move employees to by 'reassign' policy
         :raise ValueError: in case of absence of the department with given id
+        :raise PolicyError: in case of unknown policy, absent `reassign_to` or
+        reassignment to the department itself
+        :raise ExistsError: in case of department to reassign employees to does not exist
         :return: None
         """
+        # pylint: disable=no-member
+
         if not isinstance(department_id, (int, str)) or isinstance(department_id, bool):
             raise TypeError('id should be integer or string')
+        try:
+            department_id = int(department_id)
+        except ValueError as error:
+            raise ValueError('Invalid department id') from error
 
-        department = cls.get_department_by_id(department_id)
-        if not department:
-            raise ValueError('Invalid department id')
+        orphans = orphans or app.config.get('DEPARTMENT_ORPHAN_POLICY', 'null')
+        if orphans not in cls.orphan_policies:
+            raise PolicyError(f'orphans should be one of: {", ".join(cls.orphan_policies)}')
+
+        is_orphan = Employee.department_id == department_id
+        if orphans == 'cascade':
+            orphans_write = delete(Employee)
+        else:
+            target_id = None
+            if orphans == 'reassign':
+                if not reassign_to:
+                    raise PolicyError('reassign_to should be given for reassign policy')
+                target_id = cls.get_department_id_by_name(reassign_to)
+                if target_id is None:
+                    raise ExistsError('Department with given name does not exist')
+                if target_id == department_id:
+                    raise PolicyError('Employees cannot be reassigned to the deleted department')
+            orphans_write = update(Employee).values(department_id=target_id,
+                                                    version=Employee.version + 1)
 
-        db.session.delete(department)
+        request_cache.clear()
+        db.session.execute(
+            orphans_write.where(is_orphan)
+            .execution_options(synchronize_session=False)
+        )
+        result = db.session.execute(
+            delete(Department).where(Department.id == department_id)
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            db.session.rollback()
+            raise ValueError('Invalid department id')
         db.session.commit()
+
+        department_names.invalidate()
+        employee_search.invalidate()
+        search_results.invalidate()
+        if orphans == 'cascade':
+            employee_names.invalidate()
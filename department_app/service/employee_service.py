@@ -4,14 +4,26 @@ Employee service used to make database queries, this module defines the followin
 - `EmployeeService`, employee service
 """
 
+import json
+import math
+from bisect import bisect_right
+
+from marshmallow import ValidationError
+from sqlalchemy import case, cast, delete, func, literal, or_, select, text, update
+
 from department_app import db
 from department_app.models.employee import Employee
+from department_app.models.rows import DepartmentRow, EmployeeRow
 from department_app.schemas.employee_schema import EmployeeSchema
+from department_app.search.columnar import employee_search
 
 from department_app.models.department import Department
 from department_app.service.department_service import DepartmentService
 
+from department_app.service.cache import department_names, employee_names, request_cache
+from department_app.service.cache import search_results
 from department_app.service.exceptions import ExistsError
+from department_app.service.session import commit_without_expire, in_single_transaction
 
 
 class EmployeeService:
@@ -21,6 +33,25 @@ class EmployeeService:
 
     schema = EmployeeSchema()
 
+    # lower bounds of salary bands counted by facets
+    salary_buckets = (0, 500, 1000, 2000, 5000)
+
+    # columns partial update can change, the department is changed by its name
+    patch_fields = ('name', 'salary', 'date_of_birth')
+
+    # modes of counting search results: exact count, planner estimate
+    # and exact count up to `count_cap` shown as '<count_cap>+' above it
+    count_modes = ('exact', 'estimated', 'capped')
+    count_cap = 1000
+
+    # columns search results can be sorted by, '-' before the name sorts in descending order
+    sort_columns = {
+        'name': Employee.name,
+        'salary': Employee.salary,
+        'date_of_birth': Employee.date_of_birth,
+        'department': Department.name
+    }
+
     @staticmethod
     def get_employees() -> list[Employee]:
         """
@@ -41,30 +72,92 @@ class EmployeeService:
         """
         if not isinstance(employee_id, (int, str)) or isinstance(employee_id, bool):
             raise TypeError('id should be integer or string')
-        return db.session.query(Employee).filter_by(id=employee_id).first()
+        return request_cache.get_or_load(
+            ('employee_id', str(employee_id)),
+            lambda: db.session.query(Employee).filter_by(id=employee_id).first()
+        )
+
+    @staticmethod
+    def get_employee_rows() -> list[EmployeeRow]:
+        """
+        Fetches all employees from database as read-only records,
+        without creating ORM instances
+
+        :return: list of all employees records
+        """
+        return EmployeeService._select_employee_rows()
+
+    @classmethod
+    def get_employee_rows_by_ids(cls, employee_ids: list[int]) -> tuple:
+        """
+        Fetches employees with given ids together with their departments names
+        with one Core query as read-only records
+
+        :param employee_ids: ids of the employees
+        :raise TypeError: in case of ids not being list of integers
+        :return: tuple of list of found employees records in order of given ids
+        and list of ids of employees that don't exist
+        """
+        cls.check_ids(employee_ids)
+        employee_ids = list(dict.fromkeys(employee_ids))
+        employees = {employee.id: employee
+                     for employee in cls._select_employee_rows(Employee.id.in_(employee_ids))}
+        return ([employees[employee_id] for employee_id in employee_ids
+                 if employee_id in employees],
+                [employee_id for employee_id in employee_ids if employee_id not in employees])
+
+    @staticmethod
+    def check_ids(ids) -> None:
+        """
+        Checks that ids are given as list of integers
+
+        :param ids: ids to check
+        :raise TypeError: in case of ids not being list of integers
+        :return: None
+        """
+        if not isinstance(ids, list) or not all(
+                isinstance(entity_id, int) and not isinstance(entity_id, bool)
+                for entity_id in ids
+        ):
+            raise TypeError('ids should be list of integers')
 
     @staticmethod
-    def get_filtered_employees(filter_params: dict) -> list[Employee]:
+    def complete_employee_name(prefix: str, limit: int) -> list[tuple]:
         """
-        Fetches all employees filtered by given params from database
+        Finds employees which names start with given prefix ignoring case,
+        using in-process index
+
+        :param prefix: beginning of the employee name
+        :param limit: maximum number of returned employees
+        :return: list of tuples of id and name ordered alphabetically by name
+        """
+        if not isinstance(prefix, str):
+            raise TypeError('prefix should be string')
+
+        return employee_names.complete(prefix, limit)
+
+    @staticmethod
+    def rank_names(name: str) -> list[int]:
+        """
+        Finds employees which names are similar to given name tolerating typos
+
+        :param name: misspelled employee name or its part
+        :return: list of ids of the employees ordered from the most similar name
+        """
+        return request_cache.get_or_load(('employee_names_rank', name),
+                                         lambda: employee_names.rank(name))
+
+    @staticmethod
+    def check_filter_params(filter_params: dict) -> None:
+        """
+        Checks that given filter params are consistent
 
         :param filter_params: params to filter employees by
         :raise ValueError: in case of both the exact date and the period being specified or
         in case start salary is greater than end salary or
         in case start salary is later than end date
-        :return: list of employees filtered by given params
+        :return: None
         """
-
-        # pylint: disable=no-member
-
-        employees = db.session.query(Employee)
-        if filter_params.get('name', None):
-            employees = employees.filter(Employee.name.contains(filter_params['name']))
-        if filter_params.get('department', None):
-            employees = employees.join(Department)
-            employees = employees.filter(Department.name.contains(filter_params['department']))
-            employees = employees.with_entities(Employee)
-
         if (
                 filter_params.get('start_salary', None) is not None
                 and filter_params.get('end_salary', None) is not None
@@ -72,29 +165,490 @@ class EmployeeService:
         ):
             raise ValueError('start salary should be less than end salary')
 
-        # is not None is used to fix representation as False in case 0
-        if filter_params.get('start_salary', None) is not None:
-            employees = employees.filter(filter_params['start_salary'] <= Employee.salary)
-        if filter_params.get('end_salary', None) is not None:
-            employees = employees.filter(filter_params['end_salary'] >= Employee.salary)
-
         if (
                 filter_params.get('start_date', None) and filter_params.get('end_date', None)
                 and filter_params.get('start_date', None) > filter_params.get('end_date', None)
         ):
             raise ValueError('start date should be earlier than end date')
 
+        if filter_params.get('in_date', None):
+            if filter_params.get('start_date', None) or filter_params.get('end_date', None):
+                raise ValueError('Too much date parameters was given')
+
+    @classmethod
+    def get_filter_conditions(cls, filter_params: dict, ranked_ids: list[int] = None) -> list:
+        """
+        Builds conditions on employee columns from given filter params,
+        they can be used by ORM queries, Core selects and set-based writes,
+        name is matched tolerating typos if `fuzzy` param is set
+
+        :param filter_params: params to filter employees by
+        :param ranked_ids: ids of employees with similar names (see `rank_names`)
+        if the ranking was already computed for the fuzzy name
+        :raise ValueError: in case of inconsistent filter params (see `check_filter_params`)
+        :return: list of conditions on employee columns
+        """
+
+        # pylint: disable=no-member
+
+        cls.check_filter_params(filter_params)
+        conditions = []
+        if filter_params.get('name', None) and filter_params.get('fuzzy', False):
+            if ranked_ids is None:
+                ranked_ids = cls.rank_names(filter_params['name'])
+            conditions.append(Employee.id.in_(ranked_ids))
+        elif filter_params.get('name', None):
+            # few candidates found by name index replace scan of all names
+            employee_ids = employee_names.find_ids(filter_params['name'])
+            if employee_ids is not None and len(employee_ids) <= employee_names.max_candidates:
+                conditions.append(Employee.id.in_(employee_ids))
+            else:
+                conditions.append(Employee.name.contains(filter_params['name']))
+        if filter_params.get('department', None):
+            department_ids = department_names.find_ids(filter_params['department'])
+            conditions.append(Employee.department_id.in_(department_ids))
+
+        # is not None is used to fix representation as False in case 0
+        if filter_params.get('start_salary', None) is not None:
+            conditions.append(filter_params['start_salary'] <= Employee.salary)
+        if filter_params.get('end_salary', None) is not None:
+            conditions.append(filter_params['end_salary'] >= Employee.salary)
+
         if filter_params.get('start_date', None):
-            employees = employees.filter(filter_params['start_date'] <= Employee.date_of_birth)
+            conditions.append(filter_params['start_date'] <= Employee.date_of_birth)
         if filter_params.get('end_date', None):
-            employees = employees.filter(filter_params['end_date'] >= Employee.date_of_birth)
+            conditions.append(filter_params['end_date'] >= Employee.date_of_birth)
 
         if filter_params.get('in_date', None):
-            if filter_params.get('start_date', None) or filter_params.get('end_date', None):
-                raise ValueError('Too much date parameters was given')
-            employees = employees.filter(filter_params['in_date'] == Employee.date_of_birth)
+            conditions.append(filter_params['in_date'] == Employee.date_of_birth)
+
+        return conditions
+
+    @classmethod
+    def get_order_by(cls, filter_params: dict) -> list:
+        """
+        Builds ORDER BY clauses from `sort` param (e.g. 'salary' or '-salary'),
+        employees with equal values are ordered by id, so pages are stable
+
+        :param filter_params: params to sort employees by
+        :raise ValueError: in case of unknown sort column
+        :return: list of ORDER BY clauses, empty if `sort` is not specified
+        """
+        sort = filter_params.get('sort', None)
+        if not sort:
+            return []
+
+        column = cls.sort_columns.get(sort.lstrip('-'), None)
+        if column is None:
+            raise ValueError(f'Employees can be sorted only by {", ".join(cls.sort_columns)}')
+        return [column.desc() if sort.startswith('-') else column.asc(), Employee.id]
+
+    @staticmethod
+    def get_limit(filter_params: dict):
+        """
+        Returns maximum number of employees from `limit` param
+
+        :param filter_params: params to limit employees by
+        :raise ValueError: in case of limit not being positive integer
+        :return: maximum number of employees or None if `limit` is not specified
+        """
+        limit = filter_params.get('limit', None)
+        if limit is None:
+            return None
+        if not isinstance(limit, int) or isinstance(limit, bool) or limit < 1:
+            raise ValueError('limit should be positive integer')
+        return limit
+
+    @classmethod
+    def get_filtered_employees(cls, filter_params: dict) -> list[Employee]:
+        """
+        Fetches all employees filtered by given params from database,
+        sorted and limited by `sort` and `limit` params if they are specified
+
+        :param filter_params: params to filter employees by
+        :raise ValueError: in case of both the exact date and the period being specified or
+        in case start salary is greater than end salary or
+        in case start salary is later than end date or
+        in case of invalid sort or limit params
+        :return: list of employees filtered by given params
+        """
+        ranked_ids = cls._rank(filter_params)
+        conditions = cls.get_filter_conditions(filter_params, ranked_ids)
+        order_by = cls.get_order_by(filter_params)
+        limit = cls.get_limit(filter_params)
+
+        query = (db.session.query(Employee)
+                 .outerjoin(Department, Employee.department_id == Department.id)
+                 .filter(*conditions))
+        if order_by or not cls._is_fuzzy(filter_params):
+            return query.order_by(*order_by).limit(limit).all()
+        return cls._sort_by_rank(query.all(), ranked_ids)[:limit]
+
+    @classmethod
+    def get_filtered_employee_rows(cls, filter_params: dict) -> list[EmployeeRow]:
+        """
+        Fetches all employees filtered by given params as read-only records,
+        without creating ORM instances, repeated searches are answered
+        by search result cache until employees or departments are changed
+
+        :param filter_params: params to filter employees by
+        :raise ValueError: in case of invalid filter params (see `get_filtered_employees`)
+        :return: list of records of employees filtered by given params
+        """
+        return search_results.get_or_load(filter_params,
+                                          lambda: cls._search_employee_rows(filter_params))
+
+    @classmethod
+    def _search_employee_rows(cls, filter_params: dict) -> list[EmployeeRow]:
+        """
+        Fetches all employees filtered by given params as read-only records,
+        the in-memory columnar engine is used instead of the database if it's enabled
+
+        :param filter_params: params to filter employees by
+        :raise ValueError: in case of invalid filter params (see `get_filtered_employees`)
+        :return: list of records of employees filtered by given params
+        """
+        ranked_ids = cls._rank(filter_params)
+        conditions = cls.get_filter_conditions(filter_params, ranked_ids)
+        order_by = cls.get_order_by(filter_params)
+        limit = cls.get_limit(filter_params)
+
+        if employee_search.is_enabled():
+            employees = employee_search.search(filter_params, ranked_ids)
+            if order_by:
+                return cls._sort_rows(employees, filter_params['sort'])[:limit]
+        elif order_by or not cls._is_fuzzy(filter_params):
+            return cls._select_employee_rows(*conditions, order_by=order_by, limit=limit)
+        else:
+            employees = cls._select_employee_rows(*conditions)
+        return cls._sort_by_rank(employees, ranked_ids)[:limit]
+
+    @classmethod
+    def count_filtered_employees(cls, filter_params: dict, mode: str = 'exact') -> str:
+        """
+        Counts employees filtered by given params ignoring `sort` and `limit`,
+        employees are counted by the in-memory search engine if it's enabled,
+        otherwise `capped` mode stops counting after `count_cap` employees and
+        `estimated` mode uses planner statistics on PostgreSQL (exact count elsewhere)
+
+        :param filter_params: params to filter employees by
+        :param mode: one of `count_modes`
+        :raise ValueError: in case of unknown mode or invalid filter params
+        (see `get_filter_conditions`)
+        :return: number of employees, '<count_cap>+' in case of being capped
+        """
+        if mode not in cls.count_modes:
+            raise ValueError(f'Count mode should be one of {", ".join(cls.count_modes)}')
+        conditions = cls.get_filter_conditions(filter_params)
+
+        count = None
+        if employee_search.is_enabled():
+            count = len(employee_search.search_records(filter_params))
+        elif mode == 'capped':
+            capped = select(Employee.id).where(*conditions).limit(cls.count_cap + 1).subquery()
+            count = db.session.execute(select(func.count()).select_from(capped)).scalar()
+        elif mode == 'estimated':
+            count = cls._estimate_count(conditions)
+        if count is None:
+            statement = select(func.count(Employee.id)).where(*conditions)
+            count = db.session.execute(statement).scalar()
+        return cls.format_count(count, mode)
+
+    @classmethod
+    def format_count(cls, count: int, mode: str = 'exact') -> str:
+        """
+        Formats number of employees counted in given mode
+
+        :param count: number of employees
+        :param mode: one of `count_modes`
+        :return: number of employees, '<count_cap>+' in case of being capped
+        """
+        if mode == 'capped' and count > cls.count_cap:
+            return f'{cls.count_cap}+'
+        return str(count)
+
+    @staticmethod
+    def _estimate_count(conditions: list):
+        """
+        Estimates number of employees matching given conditions without scanning them,
+        from table statistics if there are no conditions or from the query plan otherwise,
+        only PostgreSQL keeps such statistics
+
+        :param conditions: conditions on employee columns
+        :return: estimated number of employees or None if it can't be estimated
+        """
+        connection = db.session.connection()
+        if connection.dialect.name != 'postgresql':
+            return None
+
+        table = Employee.__table__.name
+        if not conditions:
+            reltuples = db.session.execute(
+                text('SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)'),
+                {'table': table}
+            ).scalar()
+            # -1 means the table was never analyzed
+            return int(reltuples) if reltuples is not None and reltuples >= 0 else None
+
+        statement = select(Employee.id).where(*conditions)
+        compiled = statement.compile(dialect=connection.dialect,
+                                     compile_kwargs={'render_postcompile': True})
+        plan = connection.exec_driver_sql(
+            f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @classmethod
+    def get_top_paid_employee_rows(cls, count: int, department: str = None) -> list[EmployeeRow]:
+        """
+        Fetches the highest paid employees of every department with one query
+        ranking employees within their departments by window function
 
-        return employees.all()
+        :param count: number of employees fetched per department
+        :param department: substring of names of the departments to fetch employees of
+        :raise ValueError: in case of count not being positive integer
+        :return: list of records of employees ordered by department name and salary
+        """
+        if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+            raise ValueError('Number of employees should be positive integer')
+
+        conditions = [Employee.department_id.isnot(None)]
+        if department:
+            conditions.append(Employee.department_id.in_(department_names.find_ids(department)))
+
+        ranked = (
+            select(Employee.id, Employee.name, Employee.salary, Employee.date_of_birth,
+                   Employee.version, Employee.department_id,
+                   func.row_number().over(partition_by=Employee.department_id,
+                                          order_by=(Employee.salary.desc(), Employee.id))
+                   .label('rank'))
+            .where(*conditions)
+            .subquery()
+        )
+        statement = (
+            select(ranked.c.id, ranked.c.name, ranked.c.salary, ranked.c.date_of_birth,
+                   ranked.c.version, Department.id, Department.name, Department.version)
+            .join(Department, ranked.c.department_id == Department.id)
+            .where(ranked.c.rank <= count)
+            .order_by(Department.name, ranked.c.rank)
+        )
+        return cls._fetch_employee_rows(statement)
+
+    @classmethod
+    def get_facets(cls, employees: list) -> dict:
+        """
+        Counts given employees per department and per salary band (see `salary_buckets`)
+        in one pass over them, so search results get facets without extra queries
+
+        :param employees: employees or employee records (e.g. search results)
+        :return: dict with list of department names and counts ordered from the biggest count
+        and list of salary bands and counts
+        """
+        departments = {}
+        salaries = [0] * len(cls.salary_buckets)
+        for employee in employees:
+            department_name = employee.department.name if employee.department else None
+            departments[department_name] = departments.get(department_name, 0) + 1
+            bucket = bisect_right(cls.salary_buckets, employee.salary) - 1
+            if bucket >= 0:
+                salaries[bucket] += 1
+        return cls._format_facets(departments, salaries)
+
+    @classmethod
+    def count_facets(cls, filter_params: dict) -> dict:
+        """
+        Counts employees filtered by given params per department and per salary band
+        (see `salary_buckets`) ignoring `sort` and `limit` by one aggregate query
+        over the filter conditions, so the matching employees aren't fetched,
+        the in-memory search engine counts them itself if it's enabled
+
+        :param filter_params: params to filter employees by
+        :raise ValueError: in case of invalid filter params (see `get_filter_conditions`)
+        :return: facets in the same format as `get_facets`
+        """
+        if employee_search.is_enabled():
+            cls.check_filter_params(filter_params)
+            return cls.get_facets(employee_search.search(filter_params))
+        conditions = cls.get_filter_conditions(filter_params)
+
+        # the highest lower bound not greater than the salary, as `bisect_right` does
+        bucket = case(*[(Employee.salary >= low, index) for index, low in
+                        reversed(list(enumerate(cls.salary_buckets)))])
+        rows = (
+            select(Department.name.label('department'), bucket.label('bucket'))
+            .select_from(Employee)
+            .outerjoin(Department, Employee.department_id == Department.id)
+            .where(*conditions)
+            .subquery()
+        )
+        if db.session.connection().dialect.name == 'postgresql':
+            # both facets by one scan, grouping() tells department rows from band rows
+            statement = (
+                select(func.grouping(rows.c.department), rows.c.department, rows.c.bucket,
+                       func.count())
+                .group_by(func.grouping_sets(rows.c.department, rows.c.bucket))
+            )
+        else:
+            # counts per department and band pair, summed up to both facets below
+            statement = (
+                select(literal(0), rows.c.department, rows.c.bucket, func.count())
+                .group_by(rows.c.department, rows.c.bucket)
+            )
+
+        departments, salaries = {}, [0] * len(cls.salary_buckets)
+        for by_bucket, department_name, index, count in db.session.execute(statement):
+            if not by_bucket:
+                departments[department_name] = departments.get(department_name, 0) + count
+            if index is not None:
+                salaries[index] += count
+        return cls._format_facets(departments, salaries)
+
+    @classmethod
+    def _format_facets(cls, departments: dict, salaries: list[int]) -> dict:
+        """
+        Formats counts of employees per department and per salary band as facets
+
+        :param departments: dict of department names (None for no department) and counts
+        :param salaries: counts of employees per salary band (see `salary_buckets`)
+        :return: dict with list of department names and counts ordered from the biggest count
+        and list of salary bands and counts
+        """
+        bounds = cls.salary_buckets[1:] + (None,)
+        return {
+            'departments': [
+                {'name': name, 'count': count} for name, count in
+                sorted(departments.items(), key=lambda item: (-item[1], item[0] or ''))
+            ],
+            'salaries': [
+                {'from': low, 'to': high, 'count': count}
+                for low, high, count in zip(cls.salary_buckets, bounds, salaries)
+            ]
+        }
+
+    @staticmethod
+    def _is_fuzzy(filter_params: dict) -> bool:
+        """
+        Checks if employees are searched by name tolerating typos
+
+        :param filter_params: params to filter employees by
+        :return: True if name is matched tolerating typos, False otherwise
+        """
+        return bool(filter_params.get('name', None) and filter_params.get('fuzzy', False))
+
+    @staticmethod
+    def _sort_rows(employees: list, sort: str) -> list:
+        """
+        Sorts employees found without database query in the same order as `get_order_by`,
+        missing values go first as on SQLite
+
+        :param employees: employees or employee records
+        :param sort: column to sort by, '-' before the name sorts in descending order
+        :return: sorted list of employees
+        """
+        column = sort.lstrip('-')
+
+        def key(employee):
+            if column == 'department':
+                value = employee.department.name if employee.department else None
+            else:
+                value = getattr(employee, column)
+            return value is not None, value
+
+        employees = sorted(employees, key=lambda employee: employee.id)
+        # sort is stable, so employees with equal values stay ordered by id
+        return sorted(employees, key=key, reverse=sort.startswith('-'))
+
+    @classmethod
+    def _rank(cls, filter_params: dict):
+        """
+        Ranks employees by similarity of their names in case of typo-tolerant search,
+        the ranking is computed once per search, so filtering and ordering agree on it
+
+        :param filter_params: params to filter employees by
+        :return: list of ids of the employees ordered from the most similar name or None
+        """
+        return cls.rank_names(filter_params['name']) if cls._is_fuzzy(filter_params) else None
+
+    @staticmethod
+    def _sort_by_rank(employees: list, ranked_ids) -> list:
+        """
+        Orders employees found by typo-tolerant search from the most similar name,
+        other search results are returned as is
+
+        :param employees: employees filtered by the ranking
+        :param ranked_ids: ids of the employees ordered from the most similar name (see `_rank`)
+        or None if the search isn't typo-tolerant
+        :return: list of employees
+        """
+        if ranked_ids is None:
+            return employees
+        ranks = {employee_id: rank for rank, employee_id in enumerate(ranked_ids)}
+        return sorted(employees, key=lambda employee: ranks.get(employee.id, len(ranks)))
+
+    @classmethod
+    def _select_employee_rows(cls, *conditions, order_by=(), limit=None) -> list[EmployeeRow]:
+        """
+        Fetches employees matching given conditions together with their departments names
+        with one Core query
+
+        :param conditions: conditions on employee columns
+        :param order_by: ORDER BY clauses (see `get_order_by`)
+        :param limit: maximum number of employees or None
+        :return: list of records of employees matching given conditions
+        """
+        statement = (
+            select(Employee.id, Employee.name, Employee.salary, Employee.date_of_birth,
+                   Employee.version, Department.id, Department.name, Department.version)
+            .outerjoin(Department, Employee.department_id == Department.id)
+            .where(*conditions)
+            .order_by(*order_by)
+            .limit(limit)
+        )
+        return cls._fetch_employee_rows(statement)
+
+    @staticmethod
+    def _fetch_employee_rows(statement) -> list[EmployeeRow]:
+        """
+        Executes the statement selecting id, name, salary, date of birth and version
+        of employees and id, name and version of their departments, employees of
+        the same department share the department record, department records carry no employees
+
+        :param statement: Core select of employee and department columns
+        :return: list of records of selected employees
+        """
+        departments = {}
+        employees = []
+        for (employee_id, name, salary, date_of_birth, version,
+             department_id, department_name, department_version) in db.session.execute(statement):
+            department = None
+            if department_id is not None:
+                department = departments.get(department_id, None)
+                if department is None:
+                    department = departments[department_id] = DepartmentRow(
+                        department_id, department_name, version=department_version
+                    )
+            employees.append(EmployeeRow(employee_id, name, salary, date_of_birth, department,
+                                         version=version))
+        return employees
+
+    @staticmethod
+    def _get_department(department_name: str) -> Department:
+        """
+        Returns the department with given name, the name is resolved via in-process index
+        and the department is taken from the session identity map if it's already loaded
+
+        :param department_name: name of the department
+        :raise ExistsError: in case of department with given name does not exist
+        :return: department with given name
+        """
+        department_id = DepartmentService.get_department_id_by_name(department_name)
+        department = (db.session.get(Department, department_id)
+                      if department_id is not None else None)
+        if not department:
+            raise ExistsError('Department with given name does not exist')
+        return department
 
     @classmethod
     def add_employee(cls, employee_json) -> Employee:
@@ -112,13 +666,15 @@ class EmployeeService:
             department_name = department_json.get('name', None)
             if not isinstance(department_name, str):
                 raise TypeError('Department name should be string')
-        department = DepartmentService.get_department_by_name(department_name)
-        if not department:
-            raise ExistsError('Department with given name does not exist')
+        department = cls._get_department(department_name)
 
         employee.department = department
+        request_cache.clear()
         db.session.add(employee)
-        db.session.commit()
+        commit_without_expire()
+        if not in_single_transaction():
+            employee_names.save(employee.id, employee.name)
+            employee_search.save(employee)
         return employee
 
     @classmethod
@@ -147,16 +703,118 @@ class EmployeeService:
             department_name = department_json.get('name', None)
             if not isinstance(department_name, str):
                 raise TypeError('Department name should be string')
-        department = DepartmentService.get_department_by_name(department_name)
-        if not department:
-            raise ExistsError('Department with given name does not exist')
+        department = cls._get_department(department_name)
 
         employee.department = department
+        employee.version = Employee.version + 1
 
+        request_cache.clear()
         db.session.add(employee)
-        db.session.commit()
+        commit_without_expire()
+        if not in_single_transaction():
+            employee_names.save(employee.id, employee.name)
+            employee_search.save(employee)
         return employee
 
+    @classmethod
+    def get_changed_values(cls, employee_json) -> dict:
+        """
+        Deserializes the fields present in partial employee data into column values,
+        department name is resolved via in-process index without queries
+
+        :param employee_json: partial data of the employee
+        :raise ValidationError: in case of invalid or no fields
+        :raise TypeError: in case of department name not being string
+        :raise ExistsError: in case of department with given name does not exist
+        :return: new values of changed columns
+        """
+        if not isinstance(employee_json, dict):
+            raise ValidationError('Employee data should be an object')
+
+        values, errors = {}, {}
+        for name in cls.patch_fields:
+            if name in employee_json:
+                try:
+                    values[name] = cls.schema.fields[name].deserialize(
+                        employee_json[name], name, employee_json
+                    )
+                except ValidationError as error:
+                    errors[name] = error.messages
+        if errors:
+            raise ValidationError(errors)
+
+        if 'department' in employee_json:
+            department_json = employee_json['department']
+            department_id = None
+            if department_json is not None:
+                department_name = (department_json.get('name', None)
+                                   if isinstance(department_json, dict) else None)
+                if not isinstance(department_name, str):
+                    raise TypeError('Department name should be string')
+                department_id = DepartmentService.get_department_id_by_name(department_name)
+                if department_id is None:
+                    raise ExistsError('Department with given name does not exist')
+            values['department_id'] = department_id
+
+        if not values:
+            raise ValidationError('No fields to update')
+        return values
+
+    @classmethod
+    def patch_employee(cls, employee_id: int, employee_json) -> None:
+        """
+        Updates only the fields present in partial employee data with one UPDATE
+        of changed columns, the department is looked up only if it's changed,
+        the updated row is returned by the UPDATE where the dialect supports RETURNING
+        to keep the in-memory search engine up to date
+
+        :param employee_id: id of the employee to be updated
+        :param employee_json: partial data of the employee (see `get_changed_values`)
+        :raise ValueError: in case of absence of the employee with given id
+        :raise ValidationError: in case of invalid or no fields
+        :raise ExistsError: in case of department with given name does not exist
+        :return: None
+        """
+        if not isinstance(employee_id, (int, str)) or isinstance(employee_id, bool):
+            raise TypeError('id should be integer or string')
+        try:
+            employee_id = int(employee_id)
+        except ValueError as error:
+            raise ValueError('Invalid employee id') from error
+
+        values = cls.get_changed_values(employee_json)
+        statement = (
+            update(Employee)
+            .where(Employee.id == employee_id)
+            .values(**values, version=Employee.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        returning = db.session.connection().dialect.full_returning
+        if returning:
+            statement = statement.returning(
+                Employee.id, Employee.name, Employee.salary,
+                Employee.date_of_birth, Employee.department_id
+            )
+
+        request_cache.clear()
+        result = db.session.execute(statement)
+        employee = result.one_or_none() if returning else None
+        updated = employee is not None if returning else result.rowcount > 0
+        if not updated:
+            db.session.rollback()
+            raise ValueError('Invalid employee id')
+        db.session.commit()
+        if in_single_transaction():
+            return
+
+        if employee is not None:
+            employee_search.save(employee)
+        else:
+            employee_search.invalidate()
+        if 'name' in values:
+            employee_names.save(employee_id, values['name'])
+        search_results.invalidate()
+
     @classmethod
     def delete_employee(cls, employee_id: int) -> None:
         """
@@ -173,5 +831,193 @@ class EmployeeService:
         if not employee:
             raise ValueError('Invalid employee id')
 
+        deleted_id = employee.id
+        request_cache.clear()
         db.session.delete(employee)
         db.session.commit()
+        if not in_single_transaction():
+            employee_names.remove(deleted_id)
+            employee_search.remove(deleted_id)
+
+    @classmethod
+    def get_target_conditions(cls, employee_ids=None, filter_params=None) -> list:
+        """
+        Builds conditions selecting employees targeted by a set-based write,
+        either by the list of their ids or by search filter params
+
+        :param employee_ids: ids of the employees
+        :param filter_params: params to filter employees by (see `get_filter_conditions`)
+        :raise ValueError: in case of both or none of ids and filter params being given or
+        in case of invalid or fuzzy filter params
+        :raise TypeError: in case of ids not being list of integers
+        :return: list of conditions on employee columns
+        """
+        if (employee_ids is None) == (filter_params is None):
+            raise ValueError('Either employee ids or filter should be given')
+
+        if employee_ids is not None:
+            cls.check_ids(employee_ids)
+            return [Employee.id.in_(employee_ids)]
+        # fuzzy matching selects similar names as well, so it never selects rows to write
+        if filter_params.get('fuzzy', False):
+            raise ValueError('fuzzy filter cannot select employees to change')
+        return cls.get_filter_conditions(filter_params)
+
+    @staticmethod
+    def _finish_bulk_write(names_changed: bool = False) -> None:
+        """
+        Brings caches up to date after a set-based write that bypassed the ORM
+        (in-memory engine, search result cache and, if names changed, name index),
+        fragments of changed employees are outdated by their incremented versions
+
+        :param names_changed: True if employee names were changed or employees were deleted
+        :return: None
+        """
+        request_cache.clear()
+        employee_search.invalidate()
+        search_results.invalidate()
+        if names_changed:
+            employee_names.invalidate()
+
+    @classmethod
+    def transfer_employees(cls, department_name: str, employee_ids=None,
+                           filter_params=None) -> int:
+        """
+        Moves employees given by ids or by search filter to the department
+        with one UPDATE, employees already working in it are not written
+
+        :param department_name: name of the department to move the employees to
+        :param employee_ids: ids of the employees
+        :param filter_params: params to filter employees by (see `get_filter_conditions`)
+        :raise ExistsError: in case of department with given name does not exist
+        :raise ValueError: in case of invalid ids or filter (see `get_target_conditions`)
+        :return: number of moved employees
+        """
+        if not isinstance(department_name, str):
+            raise TypeError('Department name should be string')
+        conditions = cls.get_target_conditions(employee_ids, filter_params)
+        department_id = DepartmentService.get_department_id_by_name(department_name)
+        if department_id is None:
+            raise ExistsError('Department with given name does not exist')
+
+        result = db.session.execute(
+            update(Employee)
+            .where(*conditions,
+                   or_(Employee.department_id != department_id, Employee.department_id.is_(None)))
+            .values(department_id=department_id, version=Employee.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        cls._finish_bulk_write()
+        return result.rowcount
+
+    @classmethod
+    def delete_employees(cls, employee_ids=None, filter_params=None) -> int:
+        """
+        Deletes employees given by ids or by search filter with one DELETE,
+        filter without any condition is rejected not to delete all employees by mistake
+
+        :param employee_ids: ids of the employees
+        :param filter_params: params to filter employees by (see `get_filter_conditions`)
+        :raise ValueError: in case of invalid ids or filter (see `get_target_conditions`) or
+        in case of filter without conditions
+        :raise TypeError: in case of invalid ids
+        :return: number of deleted employees
+        """
+        conditions = cls.get_target_conditions(employee_ids, filter_params)
+        if not conditions:
+            raise ValueError('filter should have at least one condition')
+
+        result = db.session.execute(
+            delete(Employee).where(*conditions).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        cls._finish_bulk_write(names_changed=True)
+        return result.rowcount
+
+    @staticmethod
+    def get_adjusted_salary(percent=None, delta=None):
+        """
+        Builds expression of employee salary raised by percent or by fixed delta,
+        salary raised by percent is rounded to the nearest integer
+
+        :param percent: percent to raise salary by, negative one lowers salary
+        :param delta: amount to raise salary by, negative one lowers salary
+        :raise ValueError: in case of both or none of percent and delta being given or
+        in case of percent being less than -100
+        :raise TypeError: in case of percent not being number or delta not being integer
+        :return: expression of adjusted salary
+        """
+        if (percent is None) == (delta is None):
+            raise ValueError('Either percent or delta should be given')
+
+        if delta is not None:
+            if not isinstance(delta, int) or isinstance(delta, bool):
+                raise TypeError('delta should be integer')
+            return Employee.salary + delta
+
+        if not isinstance(percent, (int, float)) or isinstance(percent, bool):
+            raise TypeError('percent should be number')
+        if not math.isfinite(percent) or percent < -100:
+            raise ValueError('percent should not be less than -100')
+        return cast(func.round(Employee.salary * (1 + percent / 100)), db.Integer)
+
+    @classmethod
+    def adjust_salaries(cls, percent=None, delta=None, employee_ids=None,
+                        filter_params=None, dry_run: bool = False) -> dict:
+        """
+        Raises salaries of employees given by ids or by search filter by percent
+        or by fixed delta with one UPDATE, the impact is aggregated by one SELECT
+        before it, so dry run returns it without changing anything, the SELECT locks
+        the employees until the commit, so the impact and the check of salaries
+        match the rows the UPDATE writes
+
+        :param percent: percent to raise salaries by (see `get_adjusted_salary`)
+        :param delta: amount to raise salaries by (see `get_adjusted_salary`)
+        :param employee_ids: ids of the employees
+        :param filter_params: params to filter employees by (see `get_filter_conditions`)
+        :param dry_run: True to only calculate the impact
+        :raise ValueError: in case of invalid adjustment, ids or filter or
+        in case of any salary becoming negative
+        :raise TypeError: in case of invalid adjustment or ids
+        :return: number of employees, their total salary before and after adjustment
+        and its difference
+        """
+        adjusted_salary = cls.get_adjusted_salary(percent, delta)
+        conditions = cls.get_target_conditions(employee_ids, filter_params)
+
+        salaries = (select(Employee.salary, adjusted_salary.label('adjusted_salary'))
+                    .where(*conditions))
+        if not dry_run:
+            # aggregates can't lock rows, so the rows are locked by the subquery
+            salaries = salaries.with_for_update()
+        salaries = salaries.subquery()
+        count, total, adjusted_total, lowest = db.session.execute(
+            select(func.count(),
+                   func.coalesce(func.sum(salaries.c.salary), 0),
+                   func.coalesce(func.sum(salaries.c.adjusted_salary), 0),
+                   func.min(salaries.c.adjusted_salary))
+        ).one()
+        if lowest is not None and lowest < 0:
+            # releases the locks
+            db.session.rollback()
+            raise ValueError('Adjusted salary should not be negative')
+        impact = {
+            'employees': count,
+            'total_salary': int(total),
+            'adjusted_total_salary': int(adjusted_total),
+            'difference': int(adjusted_total) - int(total)
+        }
+        if dry_run or not count:
+            return impact
+
+        db.session.execute(
+            update(Employee)
+            .where(*conditions)
+            .values(salary=adjusted_salary, version=Employee.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        cls._finish_bulk_write()
+        return impact
+
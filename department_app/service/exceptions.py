@@ -3,6 +3,7 @@ Custom exceptions for validation, this module defines the following classes:
 
 - `UniqueError`, exception that raise in case of object with given param is already exists
 - `ExistsError`, exception that raise in case of object with given param does not exist
+- `PolicyError`, exception that raise in case of policy that cannot be applied
 """
 
 
@@ -29,3 +30,16 @@ class ExistsError(Exception):
 
     def __repr__(self):
         return self.message
+
+
+class PolicyError(Exception):
+    """
+    Exception that raise in case of policy that cannot be applied
+    """
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+    def __repr__(self):
+        return self.message
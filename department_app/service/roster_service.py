@@ -0,0 +1,242 @@
+"""
+Roster service used to reconcile employees with snapshots of external HR roster,
+this module defines the following classes:
+
+- `RosterService`, roster service
+"""
+
+import csv
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, insert, select, update
+
+from department_app import db
+from department_app.models.department import Department
+from department_app.models.employee import Employee
+from department_app.search.columnar import employee_search
+
+from department_app.service.cache import department_names, employee_names, request_cache
+from department_app.service.cache import search_results
+
+
+class RosterService:
+    """
+    Roster service used to reconcile employees with snapshots of external HR roster
+    """
+
+    # columns of roster CSV, department may be empty
+    fields = ('name', 'salary', 'date_of_birth', 'department')
+
+    # number of rows written by one bulk statement
+    chunk_size = 1000
+
+    @classmethod
+    def read_csv(cls, lines):
+        """
+        Reads roster rows from CSV lines with header one by one,
+        date of birth is in format dd.mm.yyyy
+
+        :param lines: iterable of CSV lines (e.g. opened file)
+        :raise ValueError: in case of malformed CSV, missing columns or invalid values
+        :return: generator of tuples of name, salary, date of birth and department name
+        """
+        reader = csv.DictReader(lines)
+        try:
+            missing_fields = set(cls.fields) - set(reader.fieldnames or ())
+            if missing_fields:
+                raise ValueError(f'roster should have columns: {", ".join(cls.fields)}')
+
+            for row in reader:
+                name = cls.normalize_name(row['name'])
+                if not name or len(name) > 255:
+                    raise ValueError('name should have from 1 to 255 characters')
+                salary = int(row['salary'])
+                date_of_birth = (datetime.strptime(row['date_of_birth'], '%d.%m.%Y').date()
+                                 if row['date_of_birth'] else None)
+                yield name, salary, date_of_birth, cls.normalize_name(row['department']) or None
+        except (csv.Error, TypeError, ValueError) as error:
+            raise ValueError(f'line {reader.line_num}: {error}') from error
+
+    @staticmethod
+    def normalize_name(name) -> str:
+        """
+        Normalizes name of employee or department, so names differing only in
+        surrounding or repeated whitespace are matched
+
+        :param name: name or None
+        :return: name without surrounding and repeated whitespace
+        """
+        return ' '.join((name or '').split())
+
+    @classmethod
+    def get_digests(cls, name: str, salary: int, date_of_birth, department_name) -> tuple:
+        """
+        Hashes the stable key of the employee (name and date of birth)
+        and the rest of its row, so snapshot and database rows are matched and compared
+        by fixed-size digests, names are normalized (see `normalize_name`)
+
+        :param name: name of the employee
+        :param salary: salary of the employee
+        :param date_of_birth: date of birth of the employee or None
+        :param department_name: name of the employee department or None
+        :return: tuple of key digest and row digest
+        """
+        name, department_name = cls.normalize_name(name), cls.normalize_name(department_name)
+        key = f'{name}\x1f{date_of_birth.isoformat() if date_of_birth else ""}'
+        row = f'{salary}\x1f{department_name}'
+        return (hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest(),
+                hashlib.blake2b(row.encode('utf-8'), digest_size=16).digest())
+
+    @classmethod
+    def get_employee_digests(cls) -> dict:
+        """
+        Streams all employees from database and hashes their rows,
+        keys shared by several employees are ambiguous and map to None
+
+        :return: dict of key digests and tuples of employee id and row digest or None
+        """
+        statement = (
+            select(Employee.id, Employee.name, Employee.salary, Employee.date_of_birth,
+                   Department.name)
+            .outerjoin(Department, Employee.department_id == Department.id)
+            .execution_options(yield_per=cls.chunk_size)
+        )
+        digests = {}
+        for employee_id, name, salary, date_of_birth, department_name in (
+                db.session.execute(statement)
+        ):
+            key, row = cls.get_digests(name, salary, date_of_birth, department_name)
+            digests[key] = (employee_id, row) if key not in digests else None
+        return digests
+
+    @classmethod
+    def reconcile(cls, rows, dry_run: bool = False, delete_missing: bool = True) -> dict:
+        """
+        Makes employees match the roster snapshot: employees are matched by name and
+        date of birth, absent ones are inserted, ones with changed salary or department
+        are updated and ones missing from the roster are deleted, only the changed rows
+        are written by bulk statements in one transaction, unknown departments are created,
+        keys shared by several employees in the roster or in the database are ambiguous,
+        employees with them are neither written nor deleted
+
+        :param rows: iterable of tuples of name, salary, date of birth and department name
+        (see `read_csv`)
+        :param dry_run: True to only count the changes
+        :param delete_missing: False to keep employees missing from the roster
+        :return: numbers of inserted, updated, deleted, unchanged employees,
+        skipped ambiguous keys and created departments
+        """
+        existing = cls.get_employee_digests()
+        ambiguous = {key for key, match in existing.items() if match is None}
+        # planned changes of roster keys: tuple of action and its values or None if unchanged
+        changes = {}
+        for name, salary, date_of_birth, department_name in rows:
+            key, row = cls.get_digests(name, salary, date_of_birth, department_name)
+            if key in ambiguous:
+                continue
+            if key in changes:
+                del changes[key]
+                ambiguous.add(key)
+                continue
+
+            match = existing.get(key, None)
+            if match is None:
+                changes[key] = ('insert', (name, salary, date_of_birth, department_name))
+            elif match[1] != row:
+                changes[key] = ('update', (match[0], salary, department_name))
+            else:
+                changes[key] = None
+
+        planned = [change for change in changes.values() if change is not None]
+        inserts = [values for action, values in planned if action == 'insert']
+        updates = [values for action, values in planned if action == 'update']
+        unchanged = len(changes) - len(planned)
+        deletes = [match[0] for key, match in existing.items()
+                   if match is not None and key not in changes
+                   and key not in ambiguous] if delete_missing else []
+
+        department_ids = {None: None}
+        for department_name in {values[-1] for values in inserts + updates} - {None}:
+            department_ids[department_name] = department_names.get_id(department_name)
+        new_departments = [name for name, department_id in department_ids.items()
+                           if name is not None and department_id is None]
+        report = {
+            'inserted': len(inserts),
+            'updated': len(updates),
+            'deleted': len(deletes),
+            'unchanged': unchanged,
+            'ambiguous': len(ambiguous),
+            'departments_created': len(new_departments)
+        }
+        if dry_run or not (inserts or updates or deletes):
+            return report
+
+        try:
+            department_ids.update(cls._insert_departments(new_departments))
+            cls._write(
+                [{'name': name, 'salary': salary, 'date_of_birth': date_of_birth,
+                  'department_id': department_ids[department_name]}
+                 for name, salary, date_of_birth, department_name in inserts],
+                [{'employee_id': employee_id, 'new_salary': salary,
+                  'new_department_id': department_ids[department_name]}
+                 for employee_id, salary, department_name in updates],
+                deletes
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            request_cache.clear()
+
+        employee_search.invalidate()
+        search_results.invalidate()
+        if inserts or deletes:
+            employee_names.invalidate()
+        if new_departments:
+            department_names.invalidate()
+        return report
+
+    @classmethod
+    def _insert_departments(cls, names: list[str]) -> dict:
+        """
+        Inserts departments with given names with one bulk statement
+
+        :param names: names of the departments
+        :return: dict of names and ids of inserted departments
+        """
+        if not names:
+            return {}
+        db.session.execute(insert(Department.__table__), [{'name': name} for name in names])
+        return dict(db.session.execute(
+            select(Department.name, Department.id).where(Department.name.in_(names))
+        ).all())
+
+    @classmethod
+    def _write(cls, inserts: list[dict], updates: list[dict], deletes: list[int]) -> None:
+        """
+        Writes the changes with bulk statements of at most `chunk_size` rows
+
+        :param inserts: column values of inserted employees
+        :param updates: ids (`employee_id`), new salaries (`new_salary`) and
+        department ids (`new_department_id`) of updated employees
+        :param deletes: ids of deleted employees
+        :return: None
+        """
+        table = Employee.__table__
+        update_statement = (
+            update(table)
+            .where(table.c.id == bindparam('employee_id'))
+            .values(salary=bindparam('new_salary'),
+                    department_id=bindparam('new_department_id'),
+                    version=table.c.version + 1)
+        )
+        for start in range(0, max(len(inserts), len(updates), len(deletes)), cls.chunk_size):
+            end = start + cls.chunk_size
+            if inserts[start:end]:
+                db.session.execute(insert(table), inserts[start:end])
+            if updates[start:end]:
+                db.session.execute(update_statement, updates[start:end])
+            if deletes[start:end]:
+                db.session.execute(delete(table).where(table.c.id.in_(deletes[start:end])))
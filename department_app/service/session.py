@@ -0,0 +1,185 @@
+"""
+Database session helpers used by services and views,
+this module defines the following functions:
+
+- `commit_without_expire`: commits the session keeping the state of its instances loaded
+- `single_transaction`: runs service calls in one transaction committed once
+- `in_single_transaction`: checks if the session runs the block of `single_transaction`
+- `read_write`: decorator marking views that write to the database on safe methods
+- `is_read_only`: checks if the session is in read-only mode
+- `start_read_only`: switches the session to read-only mode for safe methods
+- `set_read_only_transaction`: makes transactions of read-only session READ ONLY
+- `release_read_only_connection`: returns connection of read-only session to the pool
+- `stop_read_only`: switches the session back to the default mode
+"""
+
+from contextlib import contextmanager
+
+from flask import request, before_render_template
+from sqlalchemy import event
+
+from department_app import app, db
+
+# methods that don't change data, requests with them use read-only session
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# key of the session info flag marking read-only session
+READ_ONLY_KEY = 'read_only'
+
+# key of the session info flag marking session running the block of `single_transaction`
+SINGLE_TRANSACTION_KEY = 'single_transaction'
+
+
+def commit_without_expire() -> None:
+    """
+    Commits the session without expiring its instances,
+    so the written entities can be serialized right after the commit
+    without reloading them and their relationships from the database,
+    server-generated values are fetched by the write itself
+    (using RETURNING where the dialect supports it, see `eager_defaults` of the models)
+
+    :return: None
+    """
+    session = db.session()
+    expire_on_commit = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        db.session.commit()
+    finally:
+        session.expire_on_commit = expire_on_commit
+
+
+@contextmanager
+def single_transaction():
+    """
+    Runs the block in one transaction: commits made by services inside it only flush
+    their changes (expiring instances the same way commits do), the transaction is
+    committed once at the end of the block or rolled back if the block raises,
+    services skip per-row updates of in-process indexes inside the block
+    (see `in_single_transaction`), so the indexes should be invalidated once afterwards
+
+    :return: context manager
+    """
+    session = db.session()
+
+    def flush() -> None:
+        session.flush()
+        if session.expire_on_commit:
+            session.expire_all()
+
+    session.commit = flush
+    session.info[SINGLE_TRANSACTION_KEY] = True
+    try:
+        yield
+    except BaseException:
+        del session.commit
+        session.rollback()
+        raise
+    else:
+        del session.commit
+        session.commit()
+    finally:
+        session.info.pop(SINGLE_TRANSACTION_KEY, None)
+
+
+def in_single_transaction() -> bool:
+    """
+    Checks if the session runs the block of `single_transaction`,
+    in this case commits of services are not final, so services don't publish
+    written rows to in-process indexes, which are invalidated after the block instead
+
+    :return: True if the session runs the block of `single_transaction`, False otherwise
+    """
+    return db.session().info.get(SINGLE_TRANSACTION_KEY, False)
+
+
+def read_write(view):
+    """
+    Marks the view that writes to the database even though it handles safe method
+    (e.g. GET delete links), so its requests use the default session
+
+    :param view: view function to mark
+    :return: marked view function
+    """
+    view.read_write = True
+    return view
+
+
+def is_read_only() -> bool:
+    """
+    Checks if the session is in read-only mode
+
+    :return: True if the session is in read-only mode, False otherwise
+    """
+    return db.session().info.get(READ_ONLY_KEY, False)
+
+
+@app.before_request
+def start_read_only() -> None:
+    """
+    Switches the session to read-only mode in case of safe method:
+    autoflush is disabled, so reads never emit writes of accidental changes,
+    transactions are READ ONLY on PostgreSQL and the connection is released before rendering
+
+    :return: None
+    """
+    view = app.view_functions.get(request.endpoint, None)
+    if request.method not in SAFE_METHODS or getattr(view, 'read_write', False):
+        return
+
+    session = db.session()
+    session.info[READ_ONLY_KEY] = True
+    session.autoflush = False
+
+
+@event.listens_for(db.session, 'after_begin')
+def set_read_only_transaction(session, transaction, connection) -> None:
+    """
+    Makes transaction of read-only session READ ONLY on PostgreSQL,
+    so the database skips write bookkeeping for it
+
+    :param session: session that began the transaction
+    :param transaction: transaction that was began
+    :param connection: connection the transaction was began on
+    :return: None
+    """
+
+    # pylint: disable=unused-argument
+
+    if session.info.get(READ_ONLY_KEY, False) and connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql('SET TRANSACTION READ ONLY')
+
+
+def release_read_only_connection(sender, **extra) -> None:
+    """
+    Ends transaction of read-only session before template rendering,
+    so the connection returns to the pool instead of being held during rendering,
+    views pass serialized data to templates, so nothing is loaded afterwards
+
+    :param sender: application that renders the template
+    :return: None
+    """
+
+    # pylint: disable=unused-argument
+
+    if is_read_only():
+        db.session.rollback()
+
+
+before_render_template.connect(release_read_only_connection, app)
+
+
+@app.teardown_request
+def stop_read_only(exception=None) -> None:
+    """
+    Switches the session back to the default mode after the request was handled
+
+    :param exception: exception raised during request handling if any
+    :return: None
+    """
+
+    # pylint: disable=unused-argument
+
+    session = db.session()
+    if session.info.pop(READ_ONLY_KEY, False):
+        session.autoflush = True
@@ -0,0 +1,31 @@
+// Suggests values of the text input from the autocomplete API while the user types
+function autocomplete(input_id, url, limit = 10) {
+    const input = document.getElementById(input_id);
+    if (!input) {
+        return;
+    }
+
+    const datalist = document.createElement('datalist');
+    datalist.id = input_id + '_suggestions';
+    input.after(datalist);
+    input.setAttribute('list', datalist.id);
+    input.setAttribute('autocomplete', 'off');
+
+    // suggestions of outdated requests are ignored
+    let last_request = 0;
+    input.addEventListener('input', function () {
+        const request = ++last_request;
+        fetch(url + '?' + new URLSearchParams({q: input.value, limit: limit}))
+            .then(response => response.json())
+            .then(function (suggestions) {
+                if (request !== last_request) {
+                    return;
+                }
+                datalist.replaceChildren(...suggestions.map(function (suggestion) {
+                    const option = document.createElement('option');
+                    option.value = typeof suggestion === 'string' ? suggestion : suggestion.name;
+                    return option;
+                }));
+            });
+    });
+}
@@ -9,6 +9,9 @@ from department_app import app, db
 from department_app.models.department import Department
 from department_app.models.employee import Employee
 
+from department_app.search.columnar import employee_search
+from department_app.service.cache import department_names, employee_names, fragment_cache
+
 
 class BaseTestCase(TestCase):
     """A base test case"""
@@ -32,6 +35,10 @@ class BaseTestCase(TestCase):
     def tearDown(self):
         db.session.remove()
         db.drop_all()
+        department_names.invalidate()
+        employee_names.invalidate()
+        employee_search.invalidate()
+        fragment_cache.invalidate()
 
 
 class SearchBaseTestCase(BaseTestCase):
@@ -58,3 +65,7 @@ class SearchBaseTestCase(BaseTestCase):
     def tearDown(self):
         db.session.remove()
         db.drop_all()
+        department_names.invalidate()
+        employee_names.invalidate()
+        employee_search.invalidate()
+        fragment_cache.invalidate()
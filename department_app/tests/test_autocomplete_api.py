@@ -0,0 +1,65 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring
+
+from unittest.mock import patch
+
+from department_app.tests.base import BaseTestCase, SearchBaseTestCase
+
+
+class TestAutocompleteApi(BaseTestCase):
+    def test_complete_departments(self):
+        with patch(
+                'department_app.rest.autocomplete_api.DepartmentService.complete_department_name',
+                autospec=True, return_value=['Research']
+        ) as complete_mock, patch(
+            'department_app.rest.autocomplete_api.app.logger', autospec=True
+        ) as logger_mock:
+            response = self.client.get('/api/autocomplete/departments?q=re')
+
+            self.assert200(response)
+            self.assertEqual(['Research'], response.json)
+
+            complete_mock.assert_called_once_with('re', 10)
+            logger_mock.debug.assert_called()
+
+    def test_complete_employees(self):
+        with patch(
+                'department_app.rest.autocomplete_api.EmployeeService.complete_employee_name',
+                autospec=True, return_value=[(1, 'Marty Maxwell')]
+        ) as complete_mock, patch(
+            'department_app.rest.autocomplete_api.app.logger', autospec=True
+        ) as logger_mock:
+            response = self.client.get('/api/autocomplete/employees?q=mar&limit=1000')
+
+            self.assert200(response)
+            self.assertEqual([{'id': 1, 'name': 'Marty Maxwell'}], response.json)
+
+            complete_mock.assert_called_once_with('mar', 50)
+            logger_mock.debug.assert_called()
+
+    def test_limit(self):
+        with patch(
+                'department_app.rest.autocomplete_api.DepartmentService.complete_department_name',
+                autospec=True, return_value=[]
+        ) as complete_mock:
+            self.client.get('/api/autocomplete/departments?limit=0')
+            complete_mock.assert_called_once_with('', 1)
+
+        response = self.client.get('/api/autocomplete/departments?limit=many')
+        self.assert400(response)
+
+
+class TestAutocomplete(SearchBaseTestCase):
+    def test_complete_departments(self):
+        response = self.client.get('/api/autocomplete/departments')
+        self.assertEqual(['Purchase', 'Research'], response.json)
+
+        response = self.client.get('/api/autocomplete/departments?q=rE')
+        self.assertEqual(['Research'], response.json)
+
+    def test_complete_employees(self):
+        response = self.client.get('/api/autocomplete/employees?q=ma')
+        self.assertEqual([{'id': 1, 'name': 'Marty Maxwell'}], response.json)
+
+        response = self.client.get('/api/autocomplete/employees?limit=2')
+        self.assertEqual(['Alex Marshman', 'Erin Dolton'],
+                         [employee['name'] for employee in response.json])
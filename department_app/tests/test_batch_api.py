@@ -0,0 +1,112 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring
+
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from department_app import db
+
+from department_app.tests.base import BaseTestCase
+
+from department_app.search.columnar import EmployeeColumns
+from department_app.service.cache import EmployeeNameIndex
+
+from department_app.service.department_service import DepartmentService
+from department_app.service.employee_service import EmployeeService
+
+
+class TestBatchApi(BaseTestCase):
+    def test_batch_success(self):
+        commits = []
+
+        def record_commit(session):
+            commits.append(session)
+
+        event.listen(db.session, 'after_commit', record_commit)
+        try:
+            response = self.client.post('/api/batch', json={'operations': [
+                {'action': 'create', 'entity': 'department', 'data': {'name': 'Purchase'}},
+                {'action': 'create', 'entity': 'employee', 'data': {
+                    'name': 'Erin Dolton', 'salary': 4000, 'date_of_birth': '03.06.2002',
+                    'department': {'name': 'Purchase'}
+                }},
+                {'action': 'patch', 'entity': 'employee', 'id': 1, 'data': {'salary': 900}},
+                {'action': 'get', 'entity': 'employee', 'id': 1},
+                {'action': 'update', 'entity': 'department', 'id': 1,
+                 'data': {'name': 'Laboratory'}},
+                {'action': 'delete', 'entity': 'employee', 'id': 1}
+            ]})
+        finally:
+            event.remove(db.session, 'after_commit', record_commit)
+        self.assertEqual(1, len(commits))
+
+        self.assert200(response)
+        self.assertTrue(response.json['committed'])
+        self.assertEqual([201, 201, 204, 200, 200, 204],
+                         [result['status'] for result in response.json['results']])
+        self.assertEqual('Purchase', response.json['results'][1]['data']['department']['name'])
+        self.assertEqual(900, response.json['results'][3]['data']['salary'])
+
+        self.assertIsNone(EmployeeService.get_employee_by_id(1))
+        self.assertEqual('Laboratory', DepartmentService.get_department_by_id(1).name)
+        self.assertEqual(['Erin Dolton'], [
+            employee.name for employee in EmployeeService.get_filtered_employee_rows(
+                {'department': 'Purchase'}
+            )
+        ])
+
+    def test_batch_skips_index_updates(self):
+        with patch.object(EmployeeColumns, 'save', autospec=True) as search_save, \
+                patch.object(EmployeeColumns, 'remove', autospec=True) as search_remove, \
+                patch.object(EmployeeNameIndex, 'save', autospec=True) as names_save, \
+                patch.object(EmployeeNameIndex, 'remove', autospec=True) as names_remove, \
+                patch.object(EmployeeNameIndex, 'invalidate', autospec=True) as names_invalidate:
+            response = self.client.post('/api/batch', json={'operations': [
+                {'action': 'create', 'entity': 'employee', 'data': {
+                    'name': 'Erin Dolton', 'salary': 4000, 'date_of_birth': '03.06.2002',
+                    'department': {'name': 'Research'}
+                }},
+                {'action': 'patch', 'entity': 'employee', 'id': 1, 'data': {'name': 'Lois Gordon'}},
+                {'action': 'delete', 'entity': 'employee', 'id': 2}
+            ]})
+        self.assert200(response)
+        search_save.assert_not_called()
+        search_remove.assert_not_called()
+        names_save.assert_not_called()
+        names_remove.assert_not_called()
+        names_invalidate.assert_called_once()
+
+        self.assertEqual([1], [employee.id for employee in
+                               EmployeeService.get_filtered_employee_rows({'name': 'Lois'})])
+
+    def test_batch_rollback(self):
+        response = self.client.post('/api/batch', json={'operations': [
+            {'action': 'patch', 'entity': 'employee', 'id': 1, 'data': {'name': 'Lois Gordon'}},
+            {'action': 'create', 'entity': 'department', 'data': {'name': 'Purchase'}},
+            {'action': 'delete', 'entity': 'department', 'id': 5},
+            {'action': 'delete', 'entity': 'employee', 'id': 1}
+        ]})
+
+        self.assert400(response)
+        self.assertFalse(response.json['committed'])
+        self.assertEqual([204, 201, 404],
+                         [result['status'] for result in response.json['results']])
+
+        self.assertEqual('Marty Maxwell', EmployeeService.get_employee_by_id(1).name)
+        self.assertIsNone(DepartmentService.get_department_id_by_name('Purchase'))
+        self.assertEqual([], EmployeeService.get_filtered_employee_rows({'name': 'Lois'}))
+
+    def test_batch_failure(self):
+        self.assert400(self.client.post('/api/batch', json={'operations': []}))
+        self.assert400(self.client.post('/api/batch', json=[]))
+
+        response = self.client.post('/api/batch', json={'operations': [
+            {'action': 'rename', 'entity': 'employee', 'id': 1}
+        ]})
+        self.assert400(response)
+        self.assertEqual(400, response.json['results'][0]['status'])
+
+        response = self.client.post('/api/batch', json={'operations': [
+            {'action': 'get', 'entity': 'employee'}
+        ]})
+        self.assertEqual('id should be given', response.json['results'][0]['data'])
@@ -0,0 +1,295 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring
+
+import threading
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from department_app import app, db
+from department_app.tests.base import BaseTestCase
+
+from department_app.service.cache import department_names, employee_names, SharedVersion
+from department_app.service.cache import ResultCache, search_results
+from department_app.service.department_service import DepartmentService
+from department_app.service.employee_service import EmployeeService
+
+
+class TestSharedVersion(BaseTestCase):
+    def test_bump(self):
+        version = SharedVersion('test')
+        old_version = version.get()
+        new_version = version.bump()
+
+        self.assertNotEqual(old_version, new_version)
+        self.assertEqual(new_version, version.get())
+
+    def test_lock(self):
+        # separate instances lock the version file like separate processes
+        version, other_version = SharedVersion('test'), SharedVersion('test')
+        bumped = []
+
+        with version.lock():
+            current_version = version.get()
+            thread = threading.Thread(target=lambda: bumped.append(other_version.bump()))
+            thread.start()
+            thread.join(0.2)
+
+            self.assertTrue(thread.is_alive())
+            self.assertEqual(current_version, version.get())
+            with version.lock():
+                new_version = version.bump()
+        thread.join()
+
+        self.assertEqual([version.get()], bumped)
+        self.assertNotEqual(new_version, bumped[0])
+
+
+class TestDepartmentNameIndex(BaseTestCase):
+    def test_get_id(self):
+        self.assertEqual(1, department_names.get_id('Research'))
+        self.assertIsNone(department_names.get_id('no_name'))
+
+        with patch(
+                'department_app.service.cache.db.session', autospec=True
+        ) as db_session_mock:
+            self.assertEqual(1, department_names.get_id('Research'))
+            db_session_mock.query.assert_not_called()
+
+    def test_find_ids(self):
+        self.assertEqual([1], department_names.find_ids('sea'))
+        self.assertEqual([], department_names.find_ids('no_name'))
+
+    def test_complete(self):
+        self.assertEqual(['Research'], department_names.complete('re', 10))
+        self.assertEqual([], department_names.complete('no_name', 10))
+
+    def test_invalidate_on_write(self):
+        self.assertIsNone(department_names.get_id('Finance'))
+
+        department = DepartmentService.add_department({'name': 'Finance'})
+        self.assertEqual(department.id, department_names.get_id('Finance'))
+
+        DepartmentService.update_department(department.id, {'name': 'Marketing'})
+        self.assertIsNone(department_names.get_id('Finance'))
+        self.assertEqual(department.id, department_names.get_id('Marketing'))
+
+        DepartmentService.delete_department(department.id)
+        self.assertIsNone(department_names.get_id('Marketing'))
+
+    def test_reload_on_version_change(self):
+        self.assertEqual(1, department_names.get_id('Research'))
+        # another worker changed departments
+        department_names.version.bump()
+
+        with patch(
+                'department_app.service.cache.db.session', autospec=True
+        ) as db_session_mock:
+            department_names.get_id('Research')
+            db_session_mock.query.assert_called_once()
+
+    def test_add_employee_with_resolved_department(self):
+        department = DepartmentService.add_department({'name': 'Finance'})
+        employee = EmployeeService.add_employee({
+            'name': 'Lois Gordon',
+            'salary': 1000,
+            'date_of_birth': '03.10.2002',
+            'department': {'name': 'Finance'}
+        })
+
+        self.assertEqual(department.id, employee.department_id)
+        self.assertEqual('Finance', employee.department.name)
+
+
+class TestEmployeeNameIndex(BaseTestCase):
+    def test_find_ids(self):
+        self.assertEqual({1}, employee_names.find_ids('Maxwell'))
+        self.assertEqual(set(), employee_names.find_ids('no_name'))
+        self.assertIsNone(employee_names.find_ids('Ma'))
+
+        with patch(
+                'department_app.service.cache.db.session', autospec=True
+        ) as db_session_mock:
+            self.assertEqual({1}, employee_names.find_ids('Marty'))
+            db_session_mock.query.assert_not_called()
+
+    def test_incremental_updates(self):
+        employee_names.find_ids('Marty')
+        employee = EmployeeService.add_employee({
+            'name': 'Lois Gordon',
+            'salary': 1000,
+            'date_of_birth': '03.10.2002',
+            'department': {'name': 'Research'}
+        })
+
+        with patch(
+                'department_app.service.cache.db.session', autospec=True
+        ) as db_session_mock:
+            self.assertEqual({employee.id}, employee_names.find_ids('Gordon'))
+            db_session_mock.query.assert_not_called()
+
+        EmployeeService.delete_employee(employee.id)
+        with patch(
+                'department_app.service.cache.db.session', autospec=True
+        ) as db_session_mock:
+            self.assertEqual(set(), employee_names.find_ids('Gordon'))
+            db_session_mock.query.assert_not_called()
+
+    def test_reload_on_version_change(self):
+        employee_names.find_ids('Marty')
+        # another worker changed employees
+        employee_names.version.bump()
+        employee_names.save(2, 'Lois Gordon')
+
+        self.assertEqual(set(), employee_names.find_ids('Gordon'))
+
+    def test_complete(self):
+        self.assertEqual([(1, 'Marty Maxwell')], employee_names.complete('mar', 10))
+
+        EmployeeService.update_employee(1, {
+            'name': 'Lois Gordon',
+            'salary': 1000,
+            'date_of_birth': '03.10.2002',
+            'department': {'name': 'Research'}
+        })
+        with patch(
+                'department_app.service.cache.db.session', autospec=True
+        ) as db_session_mock:
+            self.assertEqual([], employee_names.complete('mar', 10))
+            self.assertEqual([(1, 'Lois Gordon')], employee_names.complete('lo', 10))
+            db_session_mock.query.assert_not_called()
+
+    def test_name_filter_condition(self):
+        filter_params = {'name': 'Maxwell'}
+        self.assertIn('employees.id IN',
+                      str(EmployeeService.get_filter_conditions(filter_params)[0]))
+
+        with patch.object(employee_names, 'max_candidates', 0):
+            self.assertIn('employees.name LIKE',
+                          str(EmployeeService.get_filter_conditions(filter_params)[0]))
+
+
+class TestRequestCache(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.record_statement)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.record_statement)
+        super().tearDown()
+
+    def record_statement(self, conn, cursor, statement, *args):
+        # pylint: disable=unused-argument
+        self.statements.append(statement)
+
+    def count_statements(self, fragment):
+        return len([statement for statement in self.statements
+                    if statement.startswith('SELECT') and fragment in statement])
+
+    def test_disabled_outside_of_request(self):
+        DepartmentService.get_department_by_id(1)
+        DepartmentService.get_department_by_id(1)
+
+        self.assertEqual(2, self.count_statements('WHERE departments.id = ?'))
+
+    def test_delete_department_view(self):
+        self.client.get('/departments/1/delete')
+
+        self.assertEqual(1, self.count_statements('WHERE departments.id = ?'))
+        self.assertIsNone(DepartmentService.get_department_by_id(1))
+        self.assertEqual(2, self.count_statements('WHERE departments.id = ?'))
+
+    def test_edit_employee_view(self):
+        self.client.get('/employees/1/edit')
+
+        self.assertEqual(1, self.count_statements('WHERE employees.id = ?'))
+
+    def test_delete_employee_view(self):
+        self.client.get('/departments/1/employees/1/delete')
+
+        self.assertEqual(1, self.count_statements('WHERE employees.id = ?'))
+        self.assertEqual(1, self.count_statements('WHERE departments.id = ?'))
+        self.assertIsNone(EmployeeService.get_employee_by_id(1))
+        self.assertEqual(2, self.count_statements('WHERE employees.id = ?'))
+
+
+class TestResultCache(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.version = SharedVersion('test_results')
+        self.cache = ResultCache('test_search_results', self.version)
+
+    def test_make_key(self):
+        self.assertEqual(
+            ResultCache.make_key({'name': 'Ma', 'start_salary': 0, 'department': None}),
+            ResultCache.make_key({'fuzzy': False, 'start_salary': 0.0, 'name': 'Ma', 'sort': ''})
+        )
+        self.assertNotEqual(ResultCache.make_key({'name': 'Ma'}),
+                            ResultCache.make_key({'name': 'Ma', 'fuzzy': True}))
+
+    def test_get_or_load(self):
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return [1, 2]
+
+        self.assertEqual([1, 2], self.cache.get_or_load({'name': 'Ma'}, loader))
+        self.assertEqual([1, 2], self.cache.get_or_load({'name': 'Ma', 'fuzzy': False}, loader))
+        self.assertEqual(1, len(loads))
+
+        self.version.bump()
+        self.cache.get_or_load({'name': 'Ma'}, loader)
+        self.assertEqual(2, len(loads))
+
+        # unhashable params aren't cached
+        self.cache.get_or_load({'department': {'name': 'Research'}}, loader)
+        self.cache.get_or_load({'department': {'name': 'Research'}}, loader)
+        self.assertEqual(4, len(loads))
+
+    def test_eviction(self):
+        with patch.dict(app.config, {'SEARCH_CACHE_SIZE': 4}):
+            self.cache.get_or_load({'name': 'a'}, lambda: [1, 2])
+            self.cache.get_or_load({'name': 'b'}, lambda: [])
+            self.cache.get_or_load({'name': 'a'}, lambda: [])
+            self.cache.get_or_load({'name': 'c'}, lambda: [3, 4])
+            self.assertEqual(2, len(self.cache))
+            self.assertEqual([1, 2], self.cache.get_or_load({'name': 'a'}, lambda: []))
+            # the least recently used result was evicted
+            self.assertEqual([5], self.cache.get_or_load({'name': 'b'}, lambda: [5]))
+
+            self.cache.get_or_load({'name': 'd'}, lambda: [1, 2, 3, 4, 5])
+            self.assertEqual(0, len(self.cache.get_or_load({'name': 'd'}, lambda: [])))
+
+        with patch.dict(app.config, {'SEARCH_CACHE_SIZE': 0}):
+            self.cache.clear()
+            self.cache.get_or_load({'name': 'a'}, lambda: [1])
+            self.assertEqual(0, len(self.cache))
+
+    def test_filtered_employee_rows(self):
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            # pylint: disable=unused-argument
+            statements.append(statement)
+
+        filter_params = {'department': 'Research', 'start_salary': 100}
+        EmployeeService.get_filtered_employee_rows(filter_params)
+        event.listen(db.engine, 'before_cursor_execute', record_statement)
+        try:
+            result = EmployeeService.get_filtered_employee_rows(dict(filter_params, name=None))
+            self.assertEqual(['Marty Maxwell'], [employee.name for employee in result])
+            self.assertEqual([], statements)
+
+            EmployeeService.update_employee(1, {
+                'name': 'Lois Gordon',
+                'salary': 1000,
+                'date_of_birth': '03.10.2002',
+                'department': {'name': 'Research'}
+            })
+            result = EmployeeService.get_filtered_employee_rows(filter_params)
+            self.assertEqual(['Lois Gordon'], [employee.name for employee in result])
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record_statement)
+
+        self.assertGreater(len(search_results), 0)
@@ -0,0 +1,226 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring
+
+import os
+from datetime import date
+
+from unittest import skipIf
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from department_app import app, db
+from department_app.tests.base import SearchBaseTestCase
+
+from department_app.search.columnar import EmployeeColumns, employee_search, np
+from department_app.service.cache import EmployeeNameIndex
+from department_app.service.department_service import DepartmentService
+from department_app.service.employee_service import EmployeeService
+
+FILTER_PARAMS = [
+    {}, {'name': 'Ma'}, {'name': 'Marty'}, {'name': 'no_name'},
+    {'department': 'ch'}, {'department': 'Research'}, {'department': 'no_name'},
+    {'start_salary': 0}, {'end_salary': 700}, {'start_salary': 500, 'end_salary': 5000},
+    {'start_salary': 700, 'end_salary': 700}, {'start_salary': 5000},
+    {'in_date': date(2002, 5, 4)}, {'in_date': date(2002, 5, 5)},
+    {'start_date': date(1980, 6, 3)}, {'end_date': date(2002, 5, 4)},
+    {'start_date': date(1980, 6, 3), 'end_date': date(2002, 5, 4)},
+    {'name': 'Ma', 'department': 'ch', 'start_salary': 100, 'end_date': date(2000, 1, 1)},
+    {'name': 'marshmen', 'fuzzy': True}, {'name': 'Marty Marshman', 'fuzzy': True}
+]
+
+
+@skipIf(np is None, 'NumPy is not installed')
+class TestEmployeeColumns(SearchBaseTestCase):
+    def assert_same_as_database(self):
+        for filter_params in FILTER_PARAMS:
+            expected_employees = EmployeeService.get_filtered_employees(filter_params)
+            result = employee_search.search(filter_params)
+
+            self.assertCountEqual(EmployeeService.schema.dump(expected_employees, many=True),
+                                  EmployeeService.schema.dump(result, many=True))
+
+    def test_search(self):
+        self.assert_same_as_database()
+
+    def test_search_without_queries(self):
+        employee_search.search({})
+
+        with patch(
+                'department_app.search.columnar.db.session', autospec=True
+        ) as db_session_mock:
+            employee_search.search({'name': 'Ma'})
+            db_session_mock.execute.assert_not_called()
+
+    def test_fuzzy_search_ranked_once(self):
+        # a reload of the name index between two rankings would return other ids
+        with patch.object(EmployeeNameIndex, 'rank', autospec=True,
+                          side_effect=[[1], [3, 1]]) as rank_mock:
+            result = EmployeeService.get_filtered_employee_rows(
+                {'name': 'Marty Marshman', 'fuzzy': True}
+            )
+        rank_mock.assert_called_once()
+        self.assertEqual([1], [employee.id for employee in result])
+
+    def test_snapshot_shared_by_processes(self):
+        employee_search.search({})
+        # engine of another worker maps the snapshot instead of querying the database
+        other_search = EmployeeColumns()
+
+        with patch(
+                'department_app.search.columnar.db.session', autospec=True
+        ) as db_session_mock:
+            self.assertEqual(3, len(other_search.search({})))
+            db_session_mock.execute.assert_not_called()
+
+    def test_reload_on_version_change(self):
+        employee_search.search({})
+        # another worker changed employees without publishing a snapshot
+        employee_search.version.bump()
+
+        with patch(
+                'department_app.search.columnar.db.session', autospec=True
+        ) as db_session_mock:
+            db_session_mock.execute.return_value = []
+            self.assertEqual([], employee_search.search({}))
+            db_session_mock.execute.assert_called_once()
+
+    def test_incremental_updates(self):
+        employee_search.search({})
+        other_search = EmployeeColumns()
+        other_search.search({})
+
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            # pylint: disable=unused-argument
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record_statement)
+        try:
+            employee = EmployeeService.add_employee({
+                'name': 'Lois Gordon',
+                'salary': 1000,
+                'date_of_birth': '03.10.1995',
+                'department': {'name': 'Research'}
+            })
+            EmployeeService.update_employee(1, {
+                'name': 'Marty Maxwell Jr',
+                'salary': 300,
+                'date_of_birth': '04.05.2002',
+                'department': {'name': 'Purchase'}
+            })
+            EmployeeService.delete_employee(2)
+
+            self.assertEqual(
+                [(1, 'Marty Maxwell Jr', 300, date(2002, 5, 4).toordinal(), 2),
+                 (3, 'Alex Marshman', 250, date(1989, 11, 30).toordinal(), 2),
+                 (employee.id, 'Lois Gordon', 1000, date(1995, 10, 3).toordinal(), 1)],
+                other_search.search_records({})
+            )
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record_statement)
+        self.assertFalse([statement for statement in statements
+                          if 'ORDER BY employees.id' in statement])
+
+        self.assert_same_as_database()
+
+    def test_writes_appended_to_delta(self):
+        employee_search.search({})
+        generation = employee_search.version.get()
+
+        with patch(
+                'department_app.search.columnar.Snapshot.write', autospec=True
+        ) as write_mock:
+            EmployeeService.update_employee(1, {
+                'name': 'Marty Maxwell', 'salary': 900, 'date_of_birth': '04.05.2002',
+                'department': {'name': 'Research'}
+            })
+            EmployeeService.delete_employee(2)
+            write_mock.assert_not_called()
+
+        version = employee_search.version.get()
+        self.assertTrue(version.startswith(f'{generation}.'))
+        self.assert_same_as_database()
+
+    def test_delta_compaction(self):
+        employee_search.search({})
+        other_search = EmployeeColumns()
+        other_search.search({})
+        generation = employee_search.version.get()
+
+        with patch.object(EmployeeColumns, 'max_delta_size', 1):
+            EmployeeService.update_employee(1, {
+                'name': 'Marty Maxwell', 'salary': 900, 'date_of_birth': '04.05.2002',
+                'department': {'name': 'Research'}
+            })
+
+        new_generation = employee_search.version.get()
+        self.assertNotIn('.', new_generation)
+        self.assertNotEqual(generation, new_generation)
+        # the previous generation is kept for processes still loading it
+        self.assertTrue(os.path.exists(EmployeeColumns._get_path(generation)))
+
+        with patch(
+                'department_app.search.columnar.db.session', autospec=True
+        ) as db_session_mock:
+            self.assertIn(900, [record[2] for record in other_search.search_records({})])
+            db_session_mock.execute.assert_not_called()
+        self.assert_same_as_database()
+
+    def test_reload_of_removed_generation(self):
+        employee_search.search({})
+        old_version = employee_search.version.get()
+        os.remove(EmployeeColumns._get_path(old_version))
+        employee_search.invalidate()
+        employee_search.search({})
+        new_version = employee_search.version.get()
+
+        # another worker read the version right before the generation was replaced
+        other_search = EmployeeColumns()
+        with patch.object(
+                other_search.version, 'get', side_effect=[old_version] + [new_version] * 3
+        ), patch(
+            'department_app.search.columnar.db.session', autospec=True
+        ) as db_session_mock:
+            self.assertEqual(3, len(other_search.search_records({})))
+            db_session_mock.execute.assert_not_called()
+
+    def test_department_delete(self):
+        employee_search.search({})
+        DepartmentService.delete_department(2)
+
+        self.assert_same_as_database()
+
+    def test_bulk_transfer(self):
+        employee_search.search({})
+        EmployeeService.transfer_employees('Research', filter_params={'department': 'Purchase'})
+
+        self.assert_same_as_database()
+
+    def test_filtered_employee_rows(self):
+        with patch.dict(app.config, {'IN_MEMORY_SEARCH': True}):
+            self.assertTrue(employee_search.is_enabled())
+            result = EmployeeService.get_filtered_employee_rows({'department': 'Purchase'})
+
+            self.assertCountEqual(['Erin Dolton', 'Alex Marshman'],
+                                  [employee.name for employee in result])
+            self.assertRaises(ValueError, EmployeeService.get_filtered_employee_rows,
+                              {'start_salary': 500, 'end_salary': 100})
+
+    def test_sorted_employee_rows(self):
+        with patch.dict(app.config, {'IN_MEMORY_SEARCH': True}):
+            for sort in ('name', '-salary', 'date_of_birth', '-department'):
+                filter_params = {'sort': sort, 'limit': 2}
+                expected_employees = EmployeeService.get_filtered_employees(filter_params)
+                result = EmployeeService.get_filtered_employee_rows(filter_params)
+
+                self.assertEqual(EmployeeService.schema.dump(expected_employees, many=True),
+                                 EmployeeService.schema.dump(result, many=True))
+
+    def test_count_filtered_employees(self):
+        with patch.dict(app.config, {'IN_MEMORY_SEARCH': True}):
+            for filter_params in FILTER_PARAMS:
+                expected_count = len(EmployeeService.get_filtered_employees(filter_params))
+                result = EmployeeService.count_filtered_employees(filter_params)
+
+                self.assertEqual(str(expected_count), result)
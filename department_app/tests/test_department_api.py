@@ -19,7 +19,7 @@ class TestDepartmentApi(BaseTestCase):
         expected_json = departments_to_json(expected_departments)
 
         with patch(
-                'department_app.rest.department_api.DepartmentService.get_departments',
+                'department_app.rest.department_api.DepartmentService.get_department_rows',
                 autospec=True, return_value=expected_departments
         ) as get_departments_mock, patch(
             'department_app.rest.department_api.DepartmentListApi.schema.dump',
@@ -295,6 +295,27 @@ class TestDepartmentApi(BaseTestCase):
             logger_mock.debug.assert_called()
             logger_mock.error.assert_called_once()
 
+    def test_get_departments_by_ids(self):
+        response = self.client.get('/api/departments?ids=1,2')
+
+        self.assert200(response)
+        self.assertEqual(['Research'], [department['name'] for department in response.json])
+        self.assertEqual('2', response.headers['X-Missing-Ids'])
+
+        self.assert400(self.client.get('/api/departments?ids=1,,x'))
+
+    def test_patch_department(self):
+        response = self.client.patch('/api/department/1', json={'name': 'Laboratory'})
+
+        self.assertStatus(response, 204)
+        self.assertEqual('Laboratory', self.client.get('/api/department/1').json['name'])
+
+        response = self.client.patch('/api/department/1', json={})
+        self.assert400(response)
+
+        response = self.client.patch('/api/department/2', json={'name': 'Research'})
+        self.assert404(response)
+
     def test_delete_department_success(self):
         expected_message = ''
         department_id = 1
@@ -310,9 +331,15 @@ class TestDepartmentApi(BaseTestCase):
             self.assertStatus(response, 204)
             self.assertEqual(expected_message, response.get_data(as_text=True))
 
-            delete_department_mock.assert_called_once_with(department_id)
+            delete_department_mock.assert_called_once_with(department_id, None, None)
             logger_mock.debug.assert_called_once()
 
+            response = self.client.delete(
+                f'/api/department/{department_id}?orphans=reassign&reassign_to=Purchase'
+            )
+            self.assertStatus(response, 204)
+            delete_department_mock.assert_called_with(department_id, 'reassign', 'Purchase')
+
     def test_delete_department_failure(self):
         expected_message = 'Department not found'
         department_id = 1
@@ -328,6 +355,26 @@ class TestDepartmentApi(BaseTestCase):
             self.assert404(response)
             self.assertEqual(expected_message, response.json)
 
-            delete_department_mock.assert_called_once_with(department_id)
+            delete_department_mock.assert_called_once_with(department_id, None, None)
             logger_mock.debug.assert_called_once()
             logger_mock.error.assert_called_once()
+
+        response = self.client.delete(f'/api/department/{department_id}?orphans=keep')
+        self.assert400(response)
+
+        response = self.client.delete(
+            f'/api/department/{department_id}?orphans=reassign&reassign_to=Laboratory'
+        )
+        self.assert400(response)
+
+        response = self.client.delete(f'/api/department/{department_id}?orphans=reassign')
+        self.assert400(response)
+        self.assertEqual('reassign_to should be given for reassign policy', response.json)
+
+        response = self.client.delete(
+            f'/api/department/{department_id}?orphans=reassign&reassign_to=Research'
+        )
+        self.assert400(response)
+        self.assertEqual('Employees cannot be reassigned to the deleted department',
+                         response.json)
+        self.assert200(self.client.get(f'/api/department/{department_id}'))
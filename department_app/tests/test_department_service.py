@@ -1,12 +1,20 @@
 # pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring, no-self-use
 
+from datetime import date
 from unittest.mock import patch
 
+from marshmallow import ValidationError
+from sqlalchemy.exc import IntegrityError
+
+from department_app import app, db
+from department_app.models.department import Department
+from department_app.models.employee import Employee
 from department_app.tests.base import BaseTestCase
 
 from department_app.service.department_service import DepartmentService
 
-from department_app.service.exceptions import UniqueError
+from department_app.service.employee_service import EmployeeService
+from department_app.service.exceptions import ExistsError, PolicyError, UniqueError
 
 from department_app.tests.data import department_1, department_2
 from department_app.tests.data import department_to_json, departments_to_json
@@ -27,6 +35,17 @@ class TestDepartmentService(BaseTestCase):
             DepartmentService.get_departments()
             db_session_mock.query.assert_called_once()
 
+    def test_get_department_rows(self):
+        DepartmentService.add_department({'name': 'Finance'})
+        expected_departments = DepartmentService.schema.dump(DepartmentService.get_departments(),
+                                                             many=True)
+        result = DepartmentService.get_department_rows()
+
+        self.assertEqual(2, len(result))
+        self.assertFalse(hasattr(result[0], '__dict__'))
+        self.assertCountEqual(expected_departments,
+                              DepartmentService.schema.dump(result, many=True))
+
     def test_get_department_by_id_success(self):
         expected_department = department_to_json(department_1)
 
@@ -84,21 +103,29 @@ class TestDepartmentService(BaseTestCase):
         with patch(
                 'department_app.service.department_service.db.session', autospec=True
         ) as db_session_mock, patch(
+            'department_app.service.department_service.ON_CONFLICT_INSERTS', {}
+        ), patch(
             'department_app.service.department_service.DepartmentService.get_department_by_name',
-            autospec=True, return_value=None
+            autospec=True
         ) as get_department_mock, patch(
             'department_app.service.department_service.DepartmentService.schema.load',
             autospec=True, return_value=expected_department
         ) as schema_mock:
             result = DepartmentService.add_department(department_json)
 
-            get_department_mock.assert_called_once_with(department_json['name'])
+            get_department_mock.assert_not_called()
             schema_mock.assert_called_once_with(department_json)
             db_session_mock.add.assert_called_once_with(expected_department)
             db_session_mock.commit.assert_called_once()
 
             self.assertEqual(expected_department, result)
 
+        result = DepartmentService.add_department({'name': 'Finance'})
+
+        self.assertIsNotNone(result.id)
+        self.assertEqual('Finance', result.name)
+        self.assertEqual(result, DepartmentService.get_department_by_name('Finance'))
+
     def test_add_department_failure(self):
         expected_department = department_1
         department_json = department_to_json(expected_department)
@@ -106,24 +133,28 @@ class TestDepartmentService(BaseTestCase):
         with patch(
                 'department_app.service.department_service.db.session', autospec=True
         ) as db_session_mock, patch(
-            'department_app.service.department_service.DepartmentService.get_department_by_name',
-            autospec=True, return_value=(department_json.get('name', None))
-        ) as get_department_by_name_mock, patch(
+            'department_app.service.department_service.ON_CONFLICT_INSERTS', {}
+        ), patch(
             'department_app.service.department_service.DepartmentService.schema.load',
             autospec=True, return_value=expected_department
         ) as schema_mock:
+            db_session_mock.commit.side_effect = IntegrityError('INSERT', {}, None)
             self.assertRaises(UniqueError, DepartmentService.add_department, department_json)
 
-            get_department_by_name_mock.assert_called_once_with(department_json.get('name', None))
-            schema_mock.assert_not_called()
-            db_session_mock.add.assert_not_called()
-            db_session_mock.commit.assert_not_called()
+            schema_mock.assert_called_once_with(department_json)
+            db_session_mock.commit.assert_called_once()
+            db_session_mock.rollback.assert_called_once()
+
+        self.assertRaises(UniqueError, DepartmentService.add_department,
+                          {'name': department_1.name})
+        self.assertEqual(1, len(DepartmentService.get_departments()))
 
         department_json = {'name': 15}
         self.assertRaises(TypeError, DepartmentService.add_department, department_json)
 
     def test_update_department_success(self):
-        expected_department = department_1
+        # the version of the updated department is changed, so shared data isn't used
+        expected_department = Department('Research')
         department_id = 1
         department_json = department_to_json(expected_department)
 
@@ -131,7 +162,7 @@ class TestDepartmentService(BaseTestCase):
                 'department_app.service.department_service.db.session', autospec=True
         ) as db_session_mock, patch(
             'department_app.service.department_service.DepartmentService.get_department_by_name',
-            autospec=True, return_value=expected_department
+            autospec=True
         ) as get_department_by_name_mock, patch(
             'department_app.service.department_service.DepartmentService.get_department_by_id',
             autospec=True, return_value=expected_department
@@ -142,10 +173,11 @@ class TestDepartmentService(BaseTestCase):
             result = DepartmentService.update_department(department_id, department_json)
 
             get_department_by_id_mock.assert_called_once_with(department_id)
-            get_department_by_name_mock.assert_called_once_with(department_json['name'])
+            get_department_by_name_mock.assert_not_called()
             schema_mock.assert_called_once_with(department_json, instance=expected_department)
             db_session_mock.add.assert_called_once_with(expected_department)
             db_session_mock.commit.assert_called_once()
+            self.assertEqual(str(Department.version + 1), str(expected_department.version))
 
             self.assertEqual(expected_department, result)
 
@@ -160,9 +192,6 @@ class TestDepartmentService(BaseTestCase):
         with patch(
                 'department_app.service.department_service.db.session', autospec=True
         ) as db_session_mock, patch(
-            'department_app.service.department_service.DepartmentService.get_department_by_name',
-            autospec=True, return_value=expected_department
-        ) as get_department_by_name_mock, patch(
             'department_app.service.department_service.DepartmentService.get_department_by_id',
             autospec=True, return_value=None
         ) as get_department_by_id_mock, patch(
@@ -173,7 +202,6 @@ class TestDepartmentService(BaseTestCase):
                               department_id, department_json)
 
             get_department_by_id_mock.assert_called_once_with(department_id)
-            get_department_by_name_mock.assert_not_called()
             schema_mock.assert_not_called()
             db_session_mock.add.assert_not_called()
             db_session_mock.commit.assert_not_called()
@@ -181,56 +209,103 @@ class TestDepartmentService(BaseTestCase):
         with patch(
                 'department_app.service.department_service.db.session', autospec=True
         ) as db_session_mock, patch(
-            'department_app.service.department_service.DepartmentService.get_department_by_name',
-            autospec=True, return_value={'name': 'random'}
-        ) as get_department_by_name_mock, patch(
             'department_app.service.department_service.DepartmentService.get_department_by_id',
             autospec=True, return_value=expected_department
         ) as get_department_by_id_mock, patch(
             'department_app.service.department_service.DepartmentService.schema.load',
             autospec=True, return_value=expected_department
         ) as schema_mock:
+            db_session_mock.commit.side_effect = IntegrityError('UPDATE', {}, None)
             self.assertRaises(UniqueError, DepartmentService.update_department,
                               department_id, department_json)
 
             get_department_by_id_mock.assert_called_once_with(department_id)
-            get_department_by_name_mock.assert_called_once_with(department_json['name'])
-            schema_mock.assert_not_called()
-            db_session_mock.add.assert_not_called()
-            db_session_mock.commit.assert_not_called()
+            schema_mock.assert_called_once_with(department_json, instance=expected_department)
+            db_session_mock.commit.assert_called_once()
+            db_session_mock.rollback.assert_called_once()
+
+        DepartmentService.add_department({'name': 'Finance'})
+        self.assertRaises(UniqueError, DepartmentService.update_department,
+                          1, {'name': 'Finance'})
+        self.assertEqual(department_1.name, DepartmentService.get_department_by_id(1).name)
 
         department_json = {'name': 15}
         self.assertRaises(TypeError, DepartmentService.update_department,
                           1, department_json)
 
-    def test_delete_department_success(self):
-        expected_department = department_1
-        department_id = 1
-        with patch(
-                'department_app.service.department_service.db.session', autospec=True
-        ) as db_session_mock, patch(
-            'department_app.service.department_service.DepartmentService.get_department_by_id',
-            autospec=True, return_value=expected_department
-        ) as get_department_by_id_mock:
-            DepartmentService.delete_department(department_id)
+    def test_get_department_rows_by_ids(self):
+        self.add_purchase_department()
+        departments, missing_ids = DepartmentService.get_department_rows_by_ids([2, 3, 1])
 
-            get_department_by_id_mock.assert_called_once_with(department_id)
-            db_session_mock.delete.assert_called_once_with(expected_department)
-            db_session_mock.commit.assert_called_once()
+        self.assertEqual(['Purchase', 'Research'],
+                         [department.name for department in departments])
+        self.assertEqual(['Erin Dolton'], [employee.name for employee in departments[0].employees])
+        self.assertEqual([3], missing_ids)
 
-    def test_delete_department_failure(self):
-        self.assertRaises(TypeError, DepartmentService.delete_department, [1, ])
-        self.assertRaises(TypeError, DepartmentService.delete_department, True)
+        self.assertRaises(TypeError, DepartmentService.get_department_rows_by_ids, [True])
 
-        department_id = 0
-        with patch(
-                'department_app.service.department_service.db.session', autospec=True
-        ) as db_session_mock, patch(
-            'department_app.service.department_service.DepartmentService.get_department_by_id',
-            autospec=True, return_value=None
-        ) as get_department_by_id_mock:
-            self.assertRaises(ValueError, DepartmentService.delete_department, department_id)
+    def test_patch_department(self):
+        DepartmentService.patch_department(1, {'name': 'Laboratory'})
 
-            get_department_by_id_mock.assert_called_once_with(department_id)
-            db_session_mock.delete.assert_not_called()
-            db_session_mock.commit.assert_not_called()
+        department = DepartmentService.get_department_by_id(1)
+        self.assertEqual(('Laboratory', 2), (department.name, department.version))
+        self.assertEqual(1, DepartmentService.get_department_id_by_name('Laboratory'))
+
+    def test_patch_department_failure(self):
+        self.add_purchase_department()
+        patch_department = DepartmentService.patch_department
+        self.assertRaises(TypeError, patch_department, None, {'name': 'Laboratory'})
+        self.assertRaises(ValueError, patch_department, 3, {'name': 'Laboratory'})
+        self.assertRaises(ValidationError, patch_department, 1, {})
+        self.assertRaises(ValidationError, patch_department, 1, {'name': None})
+        self.assertRaises(UniqueError, patch_department, 1, {'name': 'Purchase'})
+        self.assertEqual('Research', DepartmentService.get_department_by_id(1).name)
+
+    def add_purchase_department(self):
+        department = Department('Purchase')
+        db.session.add(department)
+        db.session.add(Employee('Erin Dolton', 4000, date(2002, 6, 3), department))
+        db.session.commit()
+
+    def test_delete_department_success(self):
+        self.add_purchase_department()
+        DepartmentService.delete_department(1)
+
+        self.assertIsNone(DepartmentService.get_department_by_id(1))
+        self.assertIsNone(DepartmentService.get_department_id_by_name('Research'))
+        employee = EmployeeService.get_employee_by_id(1)
+        self.assertIsNone(employee.department)
+        self.assertEqual(2, employee.version)
+        self.assertEqual([], EmployeeService.get_filtered_employee_rows({'department': 'Res'}))
+
+    def test_delete_department_reassign(self):
+        self.add_purchase_department()
+        DepartmentService.delete_department(1, 'reassign', 'Purchase')
+
+        self.assertEqual('Purchase', EmployeeService.get_employee_by_id(1).department.name)
+        self.assertEqual(2, len(DepartmentService.get_department_by_id(2).employees))
+
+    def test_delete_department_cascade(self):
+        self.add_purchase_department()
+        with patch.dict(app.config, {'DEPARTMENT_ORPHAN_POLICY': 'cascade'}):
+            DepartmentService.delete_department('1')
+
+        self.assertIsNone(EmployeeService.get_employee_by_id(1))
+        self.assertEqual([], EmployeeService.get_filtered_employee_rows({'name': 'Marty'}))
+        self.assertEqual(['Erin Dolton'], [
+            employee.name for employee in EmployeeService.get_employee_rows()
+        ])
+
+    def test_delete_department_failure(self):
+        delete_department = DepartmentService.delete_department
+        self.assertRaises(TypeError, delete_department, [1, ])
+        self.assertRaises(TypeError, delete_department, True)
+        self.assertRaises(ValueError, delete_department, 'one')
+        self.assertRaises(PolicyError, delete_department, 1, 'keep')
+        self.assertRaises(PolicyError, delete_department, 1, 'reassign', 'Research')
+        self.assertRaises(ExistsError, delete_department, 1, 'reassign', 'Sales')
+        self.assertRaises(PolicyError, delete_department, 1, 'reassign')
+
+        self.assertRaises(ValueError, delete_department, 0, 'cascade')
+        self.assertEqual(1, len(EmployeeService.get_employee_rows()))
+        self.assertIsNotNone(DepartmentService.get_department_by_id(1))
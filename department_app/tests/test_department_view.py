@@ -3,6 +3,8 @@
 import json
 from unittest.mock import patch
 
+from department_app.service.exceptions import UniqueError
+
 from department_app.tests.base import BaseTestCase
 
 from department_app.tests.data import department_1
@@ -15,7 +17,7 @@ class TestDepartmentView(BaseTestCase):
         expected_json = departments_to_json(expected_departments, with_id=True)
 
         with patch(
-                'department_app.views.department_view.DepartmentService.get_departments',
+                'department_app.views.department_view.DepartmentService.get_department_rows',
                 autospec=True, return_value=expected_departments
         ) as get_departments_mock, patch(
             'department_app.views.department_view.departments_schema.dump',
@@ -27,14 +29,15 @@ class TestDepartmentView(BaseTestCase):
 
             self.assert200(response)
             self.assertTemplateUsed('departments.html')
-            self.assertContext('departments', expected_json)
+            for department in expected_json:
+                self.assertIn(department['name'], response.get_data(as_text=True))
 
             get_departments_mock.assert_called_once()
             schema_mock.assert_called_once_with(expected_departments)
             logger_mock.debug.assert_called()
 
         with patch(
-                'department_app.views.department_view.DepartmentService.get_departments',
+                'department_app.views.department_view.DepartmentService.get_department_rows',
                 autospec=True, return_value=expected_departments
         ) as get_departments_mock, patch(
             'department_app.views.department_view.departments_schema.dump',
@@ -46,7 +49,8 @@ class TestDepartmentView(BaseTestCase):
 
             self.assert200(response)
             self.assertTemplateUsed('departments.html')
-            self.assertContext('departments', expected_json)
+            for department in expected_json:
+                self.assertIn(department['name'], response.get_data(as_text=True))
 
             get_departments_mock.assert_called_once()
             schema_mock.assert_called_once_with(expected_departments)
@@ -144,7 +148,7 @@ class TestDepartmentView(BaseTestCase):
 
         with patch(
                 'department_app.views.department_view.DepartmentService.add_department',
-                autospec=True
+                autospec=True, side_effect=UniqueError('Test UniqueError message')
         ) as service_mock, patch(
             'department_app.views.department_view.app.logger', autospec=True
         ) as logger_mock:
@@ -160,7 +164,7 @@ class TestDepartmentView(BaseTestCase):
             self.assert_message_flashed('Name: Department with such name already exists',
                                         category='danger')
 
-            service_mock.assert_not_called()
+            service_mock.assert_called_once_with(expected_json)
             logger_mock.assert_not_called()
             logger_mock.error.assert_called_once()
 
@@ -255,9 +259,6 @@ class TestDepartmentView(BaseTestCase):
                 'department_app.views.department_view.DepartmentService.get_department_by_id',
                 autospec=True, return_value=expected_department
         ) as get_department_by_id_mock, patch(
-            'department_app.views.department_view.DepartmentService.get_department_by_name',
-            autospec=True, return_value=expected_department
-        ) as get_department_by_name_mock, patch(
             'department_app.views.department_view.DepartmentService.update_department',
             autospec=True, return_value=expected_department
         ) as update_department_mock, patch(
@@ -275,10 +276,9 @@ class TestDepartmentView(BaseTestCase):
                                         category='success')
 
             get_department_by_id_mock.assert_called_once_with(department_id)
-            get_department_by_name_mock.assert_called_once_with(expected_department.name)
-            update_department_mock.assert_not_called()
+            update_department_mock.assert_called_once_with(department_id, data)
             schema_mock.assert_not_called()
-            logger_mock.debug.assert_not_called()
+            logger_mock.debug.assert_called()
             logger_mock.error.assert_not_called()
 
     def test_edit_department_post_failure(self):
@@ -294,7 +294,7 @@ class TestDepartmentView(BaseTestCase):
                 autospec=True, return_value=expected_department
         ) as get_department_by_id_mock, patch(
             'department_app.views.department_view.DepartmentService.update_department',
-            autospec=True
+            autospec=True, side_effect=UniqueError('Test UniqueError message')
         ) as update_department_mock, patch(
             'department_app.views.department_view.department_schema.dump',
             autospec=True, return_value=expected_json
@@ -314,7 +314,7 @@ class TestDepartmentView(BaseTestCase):
                                         category='danger')
 
             get_department_by_id_mock.assert_called_once_with(department_id)
-            update_department_mock.assert_not_called()
+            update_department_mock.assert_called_once_with(department_id, data)
             schema_mock.assert_called_once_with(expected_department)
             logger_mock.debug.assert_called()
             logger_mock.error.assert_called_once()
@@ -8,7 +8,8 @@ from unittest.mock import patch
 from datetime import date
 from marshmallow import ValidationError
 
-from department_app.rest.employee_api import get_date_or_none
+from department_app.rest.employee_api import get_date_or_none, get_filter_params, get_ids
+from department_app.rest.employee_api import get_write_filter_params
 
 from department_app.service.exceptions import ExistsError
 
@@ -23,7 +24,7 @@ class TestEmployeeApi(BaseTestCase):
         expected_json = employees_to_json(expected_employees)
 
         with patch(
-                'department_app.rest.employee_api.EmployeeService.get_employees',
+                'department_app.rest.employee_api.EmployeeService.get_employee_rows',
                 autospec=True, return_value=expected_employees
         ) as get_employees_mock, patch(
             'department_app.rest.employee_api.EmployeeListApi.schema.dump',
@@ -305,6 +306,22 @@ class TestEmployeeApi(BaseTestCase):
             logger_mock.debug.assert_called()
             logger_mock.error.assert_called_once()
 
+    def test_patch_employee(self):
+        response = self.client.patch('/api/employee/1', json={'salary': 900})
+
+        self.assertStatus(response, 204)
+        self.assertEqual(900, self.client.get('/api/employee/1').json['salary'])
+
+        response = self.client.patch('/api/employee/1', json={'salary': 'a lot'})
+        self.assert400(response)
+        self.assertIn('salary', response.json)
+
+        response = self.client.patch('/api/employee/1', json={'department': {'name': 'Sales'}})
+        self.assert400(response)
+
+        response = self.client.patch('/api/employee/2', json={'salary': 900})
+        self.assert404(response)
+
     def test_delete_employee_success(self):
         expected_message = ''
         employee_id = 1
@@ -359,9 +376,12 @@ class TestEmployeeApi(BaseTestCase):
         parsed_data = data.copy()
         parsed_data['start_date'] = date(2002, 4, 12)
         parsed_data['end_date'] = date(2002, 5, 12)
+        parsed_data['fuzzy'] = False
+        parsed_data['sort'] = None
+        parsed_data['limit'] = None
 
         with patch(
-                'department_app.rest.employee_api.EmployeeService.get_filtered_employees',
+                'department_app.rest.employee_api.EmployeeService.get_filtered_employee_rows',
                 autospec=True, return_value=expected_employees
         ) as get_filtered_employees_mock, patch(
             'department_app.rest.employee_api.EmployeeApi.schema.dump',
@@ -396,9 +416,12 @@ class TestEmployeeApi(BaseTestCase):
         parsed_data = data.copy()
         parsed_data['start_date'] = date(2002, 4, 12)
         parsed_data['end_date'] = date(2002, 5, 12)
+        parsed_data['fuzzy'] = False
+        parsed_data['sort'] = None
+        parsed_data['limit'] = None
 
         with patch(
-                'department_app.rest.employee_api.EmployeeService.get_filtered_employees',
+                'department_app.rest.employee_api.EmployeeService.get_filtered_employee_rows',
                 autospec=True, side_effect=ValueError(expected_message)
         ) as get_filtered_employees_mock, patch(
             'department_app.rest.employee_api.EmployeeApi.schema.dump', autospec=True
@@ -417,6 +440,195 @@ class TestEmployeeApi(BaseTestCase):
             logger_mock.debug.assert_called_once()
             logger_mock.error.assert_called_once()
 
+    def test_search_facets(self):
+        response = self.client.get('/api/employees/search?facets=true')
+
+        self.assert200(response)
+        self.assertEqual(['Marty Maxwell'],
+                         [employee['name'] for employee in response.json['employees']])
+        self.assertEqual([{'name': 'Research', 'count': 1}],
+                         response.json['facets']['departments'])
+
+        response = self.client.get('/api/employees/search?facets=true&count=exact')
+        self.assertEqual('1', response.headers['X-Total-Count'])
+
+        response = self.client.get('/api/employees/search?facets=false')
+        self.assertEqual(['Marty Maxwell'], [employee['name'] for employee in response.json])
+
+    def test_search_sorted(self):
+        response = self.client.get('/api/employees/search?sort=-salary&limit=1&facets=true')
+
+        self.assert200(response)
+        self.assertEqual(['Marty Maxwell'],
+                         [employee['name'] for employee in response.json['employees']])
+        self.assertEqual([{'name': 'Research', 'count': 1}],
+                         response.json['facets']['departments'])
+
+        response = self.client.get('/api/employees/search?sort=id')
+        self.assert400(response)
+
+        response = self.client.get('/api/employees/search?limit=0&facets=true')
+        self.assert400(response)
+
+    def test_search_count(self):
+        response = self.client.get('/api/employees/search?count=exact')
+        self.assertEqual('1', response.headers['X-Total-Count'])
+
+        response = self.client.get('/api/employees/search')
+        self.assertNotIn('X-Total-Count', response.headers)
+
+        response = self.client.get('/api/employees/search?count=fast')
+        self.assert400(response)
+
+        with patch(
+                'department_app.rest.employee_api.EmployeeService.count_filtered_employees',
+                autospec=True, return_value='1000+'
+        ) as count_mock:
+            response = self.client.get('/api/employees/search?count=capped&limit=1')
+
+            self.assertEqual('1000+', response.headers['X-Total-Count'])
+            count_mock.assert_called_once()
+
+    def test_get_top_paid_employees(self):
+        response = self.client.get('/api/employees/top?n=1&department=Research')
+
+        self.assert200(response)
+        self.assertEqual(['Marty Maxwell'], [employee['name'] for employee in response.json])
+
+        response = self.client.get('/api/employees/top?n=0')
+        self.assert400(response)
+
+    def test_transfer_employees(self):
+        with patch(
+                'department_app.rest.employee_api.EmployeeService.transfer_employees',
+                autospec=True, return_value=1
+        ) as transfer_mock:
+            response = self.client.post('/api/employees/transfer', json={
+                'department': 'Purchase', 'filter': {'start_date': '01.01.2000'}
+            })
+
+            self.assert200(response)
+            self.assertEqual({'transferred': 1}, response.json)
+            transfer_mock.assert_called_once_with(
+                'Purchase', None, {'start_date': date(2000, 1, 1)}
+            )
+
+        response = self.client.post('/api/employees/transfer', json={
+            'department': 'Purchase', 'ids': [1]
+        })
+        self.assert400(response)
+
+        response = self.client.post('/api/employees/transfer', json={
+            'department': 'Research', 'filter': {'start_date': 'yesterday'}
+        })
+        self.assert400(response)
+
+    def test_delete_employees(self):
+        with patch(
+                'department_app.rest.employee_api.EmployeeService.delete_employees',
+                autospec=True, return_value=2
+        ) as delete_mock:
+            response = self.client.delete('/api/employees', json={'ids': [1, 2]})
+
+            self.assert200(response)
+            self.assertEqual({'deleted': 2}, response.json)
+            delete_mock.assert_called_once_with([1, 2], None)
+
+        response = self.client.delete('/api/employees', json={'filter': {}})
+        self.assert400(response)
+
+        response = self.client.delete('/api/employees', json={
+            'filter': {'department': 'Research'}
+        })
+        self.assertEqual({'deleted': 1}, response.json)
+        self.assertEqual([], self.client.get('/api/employees').json)
+
+    def test_adjust_salaries(self):
+        with patch(
+                'department_app.rest.employee_api.EmployeeService.adjust_salaries',
+                autospec=True, return_value={'employees': 1}
+        ) as adjust_mock:
+            response = self.client.post('/api/employees/salary-adjustment', json={
+                'percent': 5, 'filter': {'department': 'Research'}, 'dry_run': True
+            })
+
+            self.assert200(response)
+            self.assertEqual({'employees': 1}, response.json)
+            adjust_mock.assert_called_once_with(
+                5, None, None, {'department': 'Research'}, dry_run=True
+            )
+
+        response = self.client.post('/api/employees/salary-adjustment', json={
+            'delta': 100, 'ids': [1]
+        })
+        self.assert200(response)
+        self.assertEqual(800, response.json['adjusted_total_salary'])
+
+        response = self.client.post('/api/employees/salary-adjustment', json={'ids': [1]})
+        self.assert400(response)
+
+    def test_get_employees_by_ids(self):
+        response = self.client.get('/api/employees?ids=2,1')
+
+        self.assert200(response)
+        self.assertEqual(['Marty Maxwell'], [employee['name'] for employee in response.json])
+        self.assertEqual('2', response.headers['X-Missing-Ids'])
+        self.assertEqual('1', response.headers['X-Total-Count'])
+
+        self.assert400(self.client.get('/api/employees?ids=one'))
+        self.assertNotIn('X-Missing-Ids', self.client.get('/api/employees').headers)
+
+    def test_get_ids(self):
+        self.assertEqual([1, 2], get_ids('1, 2,'))
+        self.assertRaises(ValueError, get_ids, '1,two')
+        self.assertRaises(ValueError, get_ids, '')
+        self.assertRaises(ValueError, get_ids, '1,2,3', max_count=2)
+
+    def test_reconcile_employees(self):
+        roster = 'name,salary,date_of_birth,department\nMarty Maxwell,900,04.05.2002,Research\n'
+        response = self.client.post('/api/employees/reconcile?dry_run=true', data=roster,
+                                    content_type='text/csv')
+
+        self.assert200(response)
+        self.assertEqual(1, response.json['updated'])
+        self.assertEqual(700, self.client.get('/api/employee/1').json['salary'])
+
+        response = self.client.post('/api/employees/reconcile', data=roster,
+                                    content_type='text/csv')
+        self.assertEqual(1, response.json['updated'])
+        self.assertEqual(900, self.client.get('/api/employee/1').json['salary'])
+
+        response = self.client.post('/api/employees/reconcile', data='name\nMarty Maxwell\n',
+                                    content_type='text/csv')
+        self.assert400(response)
+
+        response = self.client.post('/api/employees/reconcile',
+                                    data=roster + 'a' * 200000 + ',1,,\n',
+                                    content_type='text/csv')
+        self.assert400(response)
+
+    def test_get_filter_params(self):
+        self.assertEqual(
+            {'name': 'Marty', 'fuzzy': True, 'start_salary': 500.0, 'in_date': date(2002, 5, 4)},
+            get_filter_params({'name': 'Marty', 'fuzzy': 'true',
+                               'start_salary': '500', 'in_date': '04.05.2002'})
+        )
+        self.assertRaises(ValueError, get_filter_params, [])
+        self.assertRaises(ValueError, get_filter_params, {'name': 1})
+        self.assertRaises(ValueError, get_filter_params, {'end_salary': 'a lot'})
+        self.assertRaises(ValueError, get_filter_params, {'end_date': '2002-05-04'})
+
+    def test_get_write_filter_params(self):
+        self.assertEqual({'name': 'Marty'}, get_write_filter_params({'name': 'Marty'}))
+        self.assertRaises(ValueError, get_write_filter_params,
+                          {'name': 'Marty Maxwel', 'fuzzy': True})
+
+        response = self.client.delete('/api/employees', json={
+            'filter': {'name': 'Marty Maxwel', 'fuzzy': True}
+        })
+        self.assert400(response)
+        self.assertEqual(1, len(self.client.get('/api/employees').json))
+
     def test_get_date_or_none_success(self):
         date_str = '11.10.2012'
         exepected_date = date(2012, 10, 11)
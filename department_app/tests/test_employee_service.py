@@ -6,8 +6,15 @@ from datetime import date
 
 from unittest.mock import patch
 
+from marshmallow import ValidationError
+from sqlalchemy import event, update
+
+from department_app import db
 from department_app.tests.base import BaseTestCase, SearchBaseTestCase
 
+from department_app.models.department import Department
+from department_app.models.employee import Employee
+from department_app.service.department_service import DepartmentService
 from department_app.service.employee_service import EmployeeService
 
 from department_app.service.exceptions import ExistsError
@@ -69,16 +76,18 @@ class TestEmployeeService(BaseTestCase):
         with patch(
                 'department_app.service.employee_service.db.session', autospec=True
         ) as db_session_mock, patch(
-            'department_app.service.employee_service.DepartmentService.get_department_by_name',
-            autospec=True, return_value=expected_department
+            'department_app.service.employee_service.DepartmentService.get_department_id_by_name',
+            autospec=True, return_value=2
         ) as get_department_mock, patch(
             'department_app.service.employee_service.EmployeeService.schema.load',
             autospec=True, return_value=expected_employee
         ) as schema_mock:
+            db_session_mock.get.return_value = expected_department
             result = EmployeeService.add_employee(employee_json)
 
             get_department_mock.assert_called_once_with(employee_json['department']['name'])
             schema_mock.assert_called_once_with(employee_json)
+            db_session_mock.get.assert_called_once_with(Department, 2)
             db_session_mock.add.assert_called_once_with(expected_employee)
             db_session_mock.commit.assert_called_once()
 
@@ -91,7 +100,7 @@ class TestEmployeeService(BaseTestCase):
         with patch(
                 'department_app.service.employee_service.db.session', autospec=True
         ) as db_session_mock, patch(
-            'department_app.service.employee_service.DepartmentService.get_department_by_name',
+            'department_app.service.employee_service.DepartmentService.get_department_id_by_name',
             autospec=True, return_value=None
         ) as get_department_mock, patch(
             'department_app.service.employee_service.EmployeeService.schema.load',
@@ -109,7 +118,7 @@ class TestEmployeeService(BaseTestCase):
         with patch(
                 'department_app.service.employee_service.db.session', autospec=True
         ) as db_session_mock, patch(
-            'department_app.service.employee_service.DepartmentService.get_department_by_name',
+            'department_app.service.employee_service.DepartmentService.get_department_id_by_name',
             autospec=True
         ) as get_department_mock, patch(
             'department_app.service.employee_service.EmployeeService.schema.load',
@@ -123,16 +132,17 @@ class TestEmployeeService(BaseTestCase):
             db_session_mock.commit.assert_not_called()
 
     def test_update_employee_success(self):
-        expected_employee = employee_1
-        expected_department = department_1
+        # the version of the updated employee is changed, so shared data isn't used
+        expected_department = Department('Research')
+        expected_employee = Employee('Marty Maxwell', 700, date(2002, 5, 4), expected_department)
         employee_id = 1
         employee_json = employee_to_json(expected_employee)
 
         with patch(
                 'department_app.service.employee_service.db.session', autospec=True
         ) as db_session_mock, patch(
-            'department_app.service.department_service.DepartmentService.get_department_by_name',
-            autospec=True, return_value=expected_department
+            'department_app.service.department_service.DepartmentService.get_department_id_by_name',
+            autospec=True, return_value=1
         ) as get_department_by_name_mock, patch(
             'department_app.service.employee_service.EmployeeService.get_employee_by_id',
             autospec=True, return_value=expected_employee
@@ -140,16 +150,34 @@ class TestEmployeeService(BaseTestCase):
             'department_app.service.employee_service.EmployeeService.schema.load',
             autospec=True, return_value=expected_employee
         ) as schema_mock:
+            db_session_mock.get.return_value = expected_department
             result = EmployeeService.update_employee(employee_id, employee_json)
 
             get_employee_by_id_mock.assert_called_once_with(employee_id)
             get_department_by_name_mock.assert_called_once_with(employee_json['department']['name'])
             schema_mock.assert_called_once_with(employee_json, instance=expected_employee)
+            db_session_mock.get.assert_called_once_with(Department, 1)
             db_session_mock.add.assert_called_once_with(expected_employee)
             db_session_mock.commit.assert_called_once()
+            self.assertEqual(str(Employee.version + 1), str(expected_employee.version))
 
             self.assertEqual(expected_employee, result)
 
+    def test_update_employee_concurrent_write(self):
+        employee = EmployeeService.get_employee_by_id(1)
+        # another writer changes the employee after it was loaded
+        with db.engine.begin() as connection:
+            connection.execute(update(Employee).values(salary=800,
+                                                       version=Employee.version + 1))
+
+        employee_json = employee_to_json(employee)
+        employee_json['salary'] = 900
+        EmployeeService.update_employee(1, employee_json)
+
+        db.session.expire_all()
+        employee = EmployeeService.get_employee_by_id(1)
+        self.assertEqual((900, 3), (employee.salary, employee.version))
+
     def test_update_employee_failure(self):
         expected_employee = employee_1
         expected_department = department_1
@@ -163,8 +191,8 @@ class TestEmployeeService(BaseTestCase):
         with patch(
                 'department_app.service.employee_service.db.session', autospec=True
         ) as db_session_mock, patch(
-            'department_app.service.department_service.DepartmentService.get_department_by_name',
-            autospec=True, return_value=expected_department
+            'department_app.service.department_service.DepartmentService.get_department_id_by_name',
+            autospec=True, return_value=1
         ) as get_department_by_name_mock, patch(
             'department_app.service.employee_service.EmployeeService.get_employee_by_id',
             autospec=True, return_value=None
@@ -184,7 +212,7 @@ class TestEmployeeService(BaseTestCase):
         with patch(
                 'department_app.service.employee_service.db.session', autospec=True
         ) as db_session_mock, patch(
-            'department_app.service.department_service.DepartmentService.get_department_by_name',
+            'department_app.service.department_service.DepartmentService.get_department_id_by_name',
             autospec=True, return_value=None
         ) as get_department_by_name_mock, patch(
             'department_app.service.employee_service.EmployeeService.get_employee_by_id',
@@ -207,7 +235,7 @@ class TestEmployeeService(BaseTestCase):
         with patch(
                 'department_app.service.employee_service.db.session', autospec=True
         ) as db_session_mock, patch(
-            'department_app.service.department_service.DepartmentService.get_department_by_name',
+            'department_app.service.department_service.DepartmentService.get_department_id_by_name',
             autospec=True
         ) as get_department_by_name_mock, patch(
             'department_app.service.employee_service.EmployeeService.get_employee_by_id',
@@ -225,6 +253,49 @@ class TestEmployeeService(BaseTestCase):
             db_session_mock.add.assert_not_called()
             db_session_mock.commit.assert_not_called()
 
+    def test_patch_employee(self):
+        statements = []
+
+        def record_statement(*args):
+            statements.append(args[2])
+
+        event.listen(db.engine, 'before_cursor_execute', record_statement)
+        try:
+            EmployeeService.patch_employee(1, {'salary': 900})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record_statement)
+        self.assertEqual(1, len(statements))
+        self.assertNotIn('name', statements[0].split('WHERE')[0])
+
+        employee = EmployeeService.get_employee_by_id(1)
+        self.assertEqual(('Marty Maxwell', 900, 2), (employee.name, employee.salary,
+                                                     employee.version))
+
+        EmployeeService.patch_employee('1', {'name': 'Lois Gordon', 'department': None,
+                                             'date_of_birth': '11.10.2012'})
+        employee = EmployeeService.get_employee_by_id(1)
+        self.assertEqual(('Lois Gordon', 900, date(2012, 10, 11), None), (
+            employee.name, employee.salary, employee.date_of_birth, employee.department
+        ))
+        result = EmployeeService.get_filtered_employee_rows({'name': 'Lois'})
+        self.assertEqual(['Lois Gordon'], [employee.name for employee in result])
+
+        EmployeeService.patch_employee(1, {'department': {'name': 'Research'}})
+        self.assertEqual('Research', EmployeeService.get_employee_by_id(1).department.name)
+
+    def test_patch_employee_failure(self):
+        self.assertRaises(TypeError, EmployeeService.patch_employee, [1], {'salary': 1})
+        self.assertRaises(ValueError, EmployeeService.patch_employee, 'one', {'salary': 1})
+        self.assertRaises(ValueError, EmployeeService.patch_employee, 2, {'salary': 1})
+        self.assertRaises(ValidationError, EmployeeService.patch_employee, 1, {})
+        self.assertRaises(ValidationError, EmployeeService.patch_employee, 1, [])
+        self.assertRaises(ValidationError, EmployeeService.patch_employee, 1, {'salary': 'a'})
+        self.assertRaises(ValidationError, EmployeeService.patch_employee, 1, {'name': None})
+        self.assertRaises(TypeError, EmployeeService.patch_employee, 1, {'department': 'Sales'})
+        self.assertRaises(ExistsError, EmployeeService.patch_employee,
+                          1, {'department': {'name': 'Sales'}})
+        self.assertEqual(1, EmployeeService.get_employee_by_id(1).version)
+
     def test_delete_employee_success(self):
         expected_employee = employee_1
         employee_id = 1
@@ -260,6 +331,252 @@ class TestEmployeeService(BaseTestCase):
 
 
 class TestEmployeeSearchService(SearchBaseTestCase):
+    def test_get_employee_rows(self):
+        expected_employees = EmployeeService.schema.dump(EmployeeService.get_employees(),
+                                                         many=True)
+        result = EmployeeService.get_employee_rows()
+
+        self.assertFalse(hasattr(result[0], '__dict__'))
+        self.assertCountEqual(expected_employees, EmployeeService.schema.dump(result, many=True))
+
+    def test_get_filtered_employee_rows(self):
+        for filter_params in [{}, {'name': 'Ma'}, {'department': 'ch'},
+                              {'start_salary': 500, 'end_salary': 5000},
+                              {'start_date': date(1980, 6, 3), 'end_date': date(2002, 5, 4)}]:
+            expected_employees = EmployeeService.get_filtered_employees(filter_params)
+            result = EmployeeService.get_filtered_employee_rows(filter_params)
+
+            self.assertCountEqual(EmployeeService.schema.dump(expected_employees, many=True),
+                                  EmployeeService.schema.dump(result, many=True))
+
+        filter_params = {'start_salary': 500, 'end_salary': 100}
+        self.assertRaises(ValueError, EmployeeService.get_filtered_employee_rows, filter_params)
+
+    def test_get_facets(self):
+        employees = EmployeeService.get_filtered_employee_rows({})
+        facets = EmployeeService.get_facets(employees)
+
+        self.assertEqual([{'name': 'Purchase', 'count': 2}, {'name': 'Research', 'count': 1}],
+                         facets['departments'])
+        self.assertEqual([
+            {'from': 0, 'to': 500, 'count': 1},
+            {'from': 500, 'to': 1000, 'count': 1},
+            {'from': 1000, 'to': 2000, 'count': 0},
+            {'from': 2000, 'to': 5000, 'count': 1},
+            {'from': 5000, 'to': None, 'count': 0}
+        ], facets['salaries'])
+
+        facets = EmployeeService.get_facets([])
+        self.assertEqual([], facets['departments'])
+        self.assertEqual([0] * 5, [salary['count'] for salary in facets['salaries']])
+
+    def test_count_facets(self):
+        for filter_params in [{}, {'name': 'Ma'}, {'department': 'ch'},
+                              {'start_salary': 500, 'end_salary': 5000, 'limit': 1}]:
+            employees = EmployeeService.get_filtered_employee_rows(dict(filter_params, limit=None))
+            self.assertEqual(EmployeeService.get_facets(employees),
+                             EmployeeService.count_facets(filter_params))
+
+        statements = []
+
+        def record_statement(*args):
+            statements.append(args[2])
+
+        event.listen(db.engine, 'before_cursor_execute', record_statement)
+        try:
+            EmployeeService.count_facets({'start_salary': 500})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record_statement)
+        # counts per department and per salary band by one query, employees aren't fetched
+        self.assertEqual(1, len(statements))
+        self.assertIn('GROUP BY', statements[0])
+
+        self.assertRaises(ValueError, EmployeeService.count_facets,
+                          {'start_salary': 500, 'end_salary': 100})
+
+    def test_get_filtered_employees_fuzzy(self):
+        filter_params = {'name': 'marshmen', 'fuzzy': True}
+        result = EmployeeService.get_filtered_employee_rows(filter_params)
+        self.assertEqual(['Alex Marshman'], [employee.name for employee in result])
+
+        filter_params = {'name': 'Marty Marshman', 'fuzzy': True}
+        result = EmployeeService.get_filtered_employees(filter_params)
+        self.assertEqual(['Alex Marshman', 'Marty Maxwell'],
+                         [employee.name for employee in result])
+
+        filter_params = {'name': 'Marty Marshman', 'department': 'Research', 'fuzzy': True}
+        result = EmployeeService.get_filtered_employee_rows(filter_params)
+        self.assertEqual(['Marty Maxwell'], [employee.name for employee in result])
+
+    def test_get_filtered_employees_sorted(self):
+        for get_employees in (EmployeeService.get_filtered_employees,
+                              EmployeeService.get_filtered_employee_rows):
+            result = get_employees({'sort': 'salary'})
+            self.assertEqual(['Alex Marshman', 'Marty Maxwell', 'Erin Dolton'],
+                             [employee.name for employee in result])
+
+            result = get_employees({'sort': '-date_of_birth', 'limit': 2})
+            self.assertEqual(['Erin Dolton', 'Marty Maxwell'],
+                             [employee.name for employee in result])
+
+            result = get_employees({'sort': 'department', 'start_salary': 0})
+            self.assertEqual(['Erin Dolton', 'Alex Marshman', 'Marty Maxwell'],
+                             [employee.name for employee in result])
+
+            result = get_employees({'name': 'Marty Marshman', 'fuzzy': True, 'limit': 1})
+            self.assertEqual(['Alex Marshman'], [employee.name for employee in result])
+
+            self.assertRaises(ValueError, get_employees, {'sort': 'id'})
+            self.assertRaises(ValueError, get_employees, {'limit': 0})
+
+    def test_count_filtered_employees(self):
+        for mode in EmployeeService.count_modes:
+            self.assertEqual('3', EmployeeService.count_filtered_employees({}, mode))
+            self.assertEqual('2', EmployeeService.count_filtered_employees(
+                {'department': 'Purchase', 'limit': 1}, mode
+            ))
+
+        with patch.object(EmployeeService, 'count_cap', 2):
+            self.assertEqual('2+', EmployeeService.count_filtered_employees({}, 'capped'))
+            self.assertEqual('2', EmployeeService.count_filtered_employees(
+                {'department': 'Purchase'}, 'capped'
+            ))
+            self.assertEqual('3', EmployeeService.format_count(3))
+
+        self.assertRaises(ValueError, EmployeeService.count_filtered_employees, {}, 'fast')
+
+    def test_get_top_paid_employee_rows(self):
+        result = EmployeeService.get_top_paid_employee_rows(1)
+        self.assertEqual(['Erin Dolton', 'Marty Maxwell'],
+                         [employee.name for employee in result])
+        self.assertEqual(['Purchase', 'Research'],
+                         [employee.department.name for employee in result])
+
+        result = EmployeeService.get_top_paid_employee_rows(5, 'Purchase')
+        self.assertEqual(['Erin Dolton', 'Alex Marshman'],
+                         [employee.name for employee in result])
+
+        self.assertRaises(ValueError, EmployeeService.get_top_paid_employee_rows, 0)
+
+    def test_get_employee_rows_by_ids(self):
+        employees, missing_ids = EmployeeService.get_employee_rows_by_ids([3, 5, 1, 3])
+
+        self.assertEqual(['Alex Marshman', 'Marty Maxwell'],
+                         [employee.name for employee in employees])
+        self.assertEqual(['Purchase', 'Research'],
+                         [employee.department.name for employee in employees])
+        self.assertEqual([5], missing_ids)
+
+        self.assertRaises(TypeError, EmployeeService.get_employee_rows_by_ids, '1,2')
+
+    def test_transfer_employees(self):
+        self.assertEqual(2, len(EmployeeService.get_filtered_employee_rows(
+            {'department': 'Purchase'}
+        )))
+
+        self.assertEqual(1, EmployeeService.transfer_employees('Purchase', employee_ids=[1]))
+        self.assertEqual(3, len(EmployeeService.get_filtered_employee_rows(
+            {'department': 'Purchase'}
+        )))
+        self.assertEqual(2, EmployeeService.get_employee_by_id(1).version)
+
+        self.assertEqual(0, EmployeeService.transfer_employees('Purchase', employee_ids=[1, 2]))
+        self.assertEqual(1, EmployeeService.get_employee_by_id(2).version)
+
+        self.assertEqual(2, EmployeeService.transfer_employees(
+            'Research', filter_params={'start_salary': 500}
+        ))
+        self.assertCountEqual(['Erin Dolton', 'Marty Maxwell'], [
+            employee.name for employee in
+            EmployeeService.get_filtered_employee_rows({'department': 'Research'})
+        ])
+
+    def test_transfer_employees_failure(self):
+        transfer = EmployeeService.transfer_employees
+        self.assertRaises(ExistsError, transfer, 'Laboratory', employee_ids=[1])
+        self.assertRaises(TypeError, transfer, 1, employee_ids=[1])
+        self.assertRaises(TypeError, transfer, 'Research', employee_ids=['1'])
+        self.assertRaises(TypeError, transfer, 'Research', employee_ids=1)
+        self.assertRaises(ValueError, transfer, 'Research')
+        self.assertRaises(ValueError, transfer, 'Research', [1], {'name': 'Erin Dolton'})
+        self.assertEqual('Research', EmployeeService.get_employee_by_id(1).department.name)
+
+    def test_delete_employees(self):
+        self.assertEqual(3, len(EmployeeService.get_filtered_employee_rows({})))
+
+        self.assertEqual(2, EmployeeService.delete_employees(
+            filter_params={'department': 'Purchase'}
+        ))
+        self.assertEqual(['Marty Maxwell'], [
+            employee.name for employee in EmployeeService.get_filtered_employee_rows({})
+        ])
+        self.assertEqual([], EmployeeService.get_filtered_employee_rows({'name': 'Erin'}))
+        self.assertEqual([], DepartmentService.get_department_by_id(2).employees)
+
+        self.assertEqual(1, EmployeeService.delete_employees(employee_ids=[1, 2]))
+        self.assertEqual([], EmployeeService.get_employee_rows())
+
+    def test_delete_employees_failure(self):
+        delete_employees = EmployeeService.delete_employees
+        self.assertRaises(ValueError, delete_employees)
+        self.assertRaises(ValueError, delete_employees, filter_params={})
+        self.assertRaises(ValueError, delete_employees, filter_params={'fuzzy': True})
+        self.assertRaises(ValueError, delete_employees,
+                          filter_params={'name': 'Marty Maxwel', 'fuzzy': True})
+        self.assertRaises(ValueError, EmployeeService.transfer_employees, 'Research',
+                          filter_params={'name': 'Erin', 'fuzzy': True})
+        self.assertRaises(TypeError, delete_employees, employee_ids=['1'])
+        self.assertEqual(3, len(EmployeeService.get_employee_rows()))
+
+    def test_adjust_salaries(self):
+        self.assertEqual(2, len(EmployeeService.get_filtered_employee_rows({'start_salary': 500})))
+
+        impact = EmployeeService.adjust_salaries(
+            percent=10, filter_params={'department': 'Purchase'}, dry_run=True
+        )
+        self.assertEqual({'employees': 2, 'total_salary': 4250,
+                          'adjusted_total_salary': 4675, 'difference': 425}, impact)
+        self.assertEqual(4000, EmployeeService.get_employee_by_id(2).salary)
+
+        statements = []
+
+        def record_statement(*args):
+            statements.append(args[2])
+
+        event.listen(db.engine, 'before_cursor_execute', record_statement)
+        try:
+            impact = EmployeeService.adjust_salaries(
+                percent=10, filter_params={'department': 'Purchase'}
+            )
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record_statement)
+        # impact aggregated over locked employees and the update itself
+        self.assertEqual(['SELECT', 'UPDATE'], [statement.split()[0] for statement in statements])
+        self.assertEqual(425, impact['difference'])
+        self.assertEqual(4400, EmployeeService.get_employee_by_id(2).salary)
+        self.assertEqual(275, EmployeeService.get_employee_by_id(3).salary)
+        self.assertEqual(2, EmployeeService.get_employee_by_id(2).version)
+
+        impact = EmployeeService.adjust_salaries(delta=-200, employee_ids=[1, 3])
+        self.assertEqual(-400, impact['difference'])
+        self.assertEqual(1, len(EmployeeService.get_filtered_employee_rows({'start_salary': 600})))
+
+        self.assertEqual(0, EmployeeService.adjust_salaries(
+            delta=100, filter_params={'name': 'no_name'}
+        )['employees'])
+
+    def test_adjust_salaries_failure(self):
+        adjust = EmployeeService.adjust_salaries
+        self.assertRaises(ValueError, adjust, employee_ids=[1])
+        self.assertRaises(ValueError, adjust, 10, 100, [1])
+        self.assertRaises(ValueError, adjust, -101, employee_ids=[1])
+        self.assertRaises(ValueError, adjust, float('nan'), employee_ids=[1])
+        self.assertRaises(TypeError, adjust, '10', employee_ids=[1])
+        self.assertRaises(TypeError, adjust, delta=10.5, employee_ids=[1])
+        self.assertRaises(ValueError, adjust, delta=10)
+        self.assertRaises(ValueError, adjust, delta=-300, filter_params={})
+        self.assertEqual(250, EmployeeService.get_employee_by_id(3).salary)
+
     def test_get_filtered_employees_with_no_params(self):
         expected_employees = employees_to_json([employee_1, employee_2, employee_3])
         filter_params = {}
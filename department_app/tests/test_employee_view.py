@@ -21,6 +21,7 @@ class TestEmployeeView(BaseTestCase):
 
         form_data = {
             'name': None,
+            'fuzzy': False,
             'department': None,
             'start_salary': None,
             'end_salary': None,
@@ -42,10 +43,10 @@ class TestEmployeeView(BaseTestCase):
         }
 
         with patch(
-                'department_app.views.employee_view.EmployeeService.get_employees',
+                'department_app.views.employee_view.EmployeeService.get_employee_rows',
                 autospec=True, return_value=expected_employees
         ) as get_employees_mock, patch(
-            'department_app.views.employee_view.EmployeeService.get_filtered_employees',
+            'department_app.views.employee_view.EmployeeService.get_filtered_employee_rows',
             autospec=True, return_value=expected_employees
         ) as get_filtered_employees_mock, patch(
             'department_app.views.employee_view.employees_schema.dump',
@@ -57,7 +58,8 @@ class TestEmployeeView(BaseTestCase):
 
             self.assert200(response)
             self.assertTemplateUsed('employees.html')
-            self.assertContext('employees', expected_json)
+            for employee in expected_json:
+                self.assertIn(employee['name'], response.get_data(as_text=True))
             self.assertContext('prev_input', form_data)
 
             get_employees_mock.assert_called_once()
@@ -67,6 +69,7 @@ class TestEmployeeView(BaseTestCase):
 
         form_data = {
             'name': '',
+            'fuzzy': False,
             'department': '',
             'start_salary': None,
             'end_salary': None,
@@ -82,17 +85,18 @@ class TestEmployeeView(BaseTestCase):
             'end_salary': None,
             'start_date': None,
             'end_date': None,
-            'in_date': None
+            'in_date': None,
+            'fuzzy': False
         }
 
         filter_data['name'] = form_data['name'] = form_input['name'] = 'test name'
         form_data['submit'] = False
 
         with patch(
-                'department_app.views.employee_view.EmployeeService.get_employees',
+                'department_app.views.employee_view.EmployeeService.get_employee_rows',
                 autospec=True, return_value=expected_employees
         ) as get_employees_mock, patch(
-            'department_app.views.employee_view.EmployeeService.get_filtered_employees',
+            'department_app.views.employee_view.EmployeeService.get_filtered_employee_rows',
             autospec=True, return_value=expected_employees
         ) as get_filtered_employees_mock, patch(
             'department_app.views.employee_view.employees_schema.dump',
@@ -106,10 +110,11 @@ class TestEmployeeView(BaseTestCase):
 
             self.assert200(response)
             self.assertTemplateUsed('employees.html')
-            self.assertContext('employees', expected_json)
+            for employee in expected_json:
+                self.assertIn(employee['name'], response.get_data(as_text=True))
             self.assertContext('prev_input', form_data)
 
-            get_employees_mock.assert_called_once()
+            get_employees_mock.assert_not_called()
             get_filtered_employees_mock.assert_called_once_with(filter_data)
             schema_mock.assert_called_once_with(expected_employees)
             logger_mock.debug.assert_called()
@@ -119,10 +124,10 @@ class TestEmployeeView(BaseTestCase):
         form_data['submit'] = False
 
         with patch(
-                'department_app.views.employee_view.EmployeeService.get_employees',
+                'department_app.views.employee_view.EmployeeService.get_employee_rows',
                 autospec=True, return_value=expected_employees
         ) as get_employees_mock, patch(
-            'department_app.views.employee_view.EmployeeService.get_filtered_employees',
+            'department_app.views.employee_view.EmployeeService.get_filtered_employee_rows',
             autospec=True, return_value=expected_employees
         ) as get_filtered_employees_mock, patch(
             'department_app.views.employee_view.employees_schema.dump',
@@ -136,10 +141,11 @@ class TestEmployeeView(BaseTestCase):
 
             self.assert200(response)
             self.assertTemplateUsed('employees.html')
-            self.assertContext('employees', expected_json)
+            for employee in expected_json:
+                self.assertIn(employee['name'], response.get_data(as_text=True))
             self.assertContext('prev_input', form_data)
 
-            get_employees_mock.assert_called_once()
+            get_employees_mock.assert_not_called()
             get_filtered_employees_mock.assert_called_once_with(filter_data)
             schema_mock.assert_called_once_with(expected_employees)
             logger_mock.debug.assert_called()
@@ -161,6 +167,7 @@ class TestEmployeeView(BaseTestCase):
 
         form_data = {
             'name': '',
+            'fuzzy': False,
             'department': '',
             'start_salary': None,
             'end_salary': None,
@@ -176,7 +183,8 @@ class TestEmployeeView(BaseTestCase):
             'end_salary': None,
             'start_date': None,
             'end_date': None,
-            'in_date': None
+            'in_date': None,
+            'fuzzy': False
         }
 
         filter_data['start_salary'] = form_data['start_salary'] = form_input['start_salary'] = 2000
@@ -184,10 +192,10 @@ class TestEmployeeView(BaseTestCase):
         form_data['submit'] = False
 
         with patch(
-                'department_app.views.employee_view.EmployeeService.get_employees',
+                'department_app.views.employee_view.EmployeeService.get_employee_rows',
                 autospec=True, return_value=expected_employees
         ) as get_employees_mock, patch(
-            'department_app.views.employee_view.EmployeeService.get_filtered_employees',
+            'department_app.views.employee_view.EmployeeService.get_filtered_employee_rows',
             autospec=True
         ) as get_filtered_employees_mock, patch(
             'department_app.views.employee_view.employees_schema.dump',
@@ -201,7 +209,8 @@ class TestEmployeeView(BaseTestCase):
 
             self.assert200(response)
             self.assertTemplateUsed('employees.html')
-            self.assertContext('employees', expected_json)
+            for employee in expected_json:
+                self.assertIn(employee['name'], response.get_data(as_text=True))
             self.assertContext('prev_input', form_data)
 
             self.assertMessageFlashed('End salary: end salary must be less than start salary'
@@ -0,0 +1,101 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring
+
+from unittest.mock import patch
+
+from department_app import app
+from department_app.tests.base import BaseTestCase
+
+from department_app.service.cache import fragment_cache
+from department_app.service.department_service import DepartmentService
+from department_app.service.employee_service import EmployeeService
+
+EMPLOYEE_JSON = {
+    'name': 'Marty Maxwell',
+    'salary': 1000,
+    'date_of_birth': '04.05.2002',
+    'department': {'name': 'Research'}
+}
+
+
+class TestFragments(BaseTestCase):
+    def test_version(self):
+        employee = EmployeeService.get_employee_by_id(1)
+        self.assertEqual(1, employee.version)
+
+        employee = EmployeeService.update_employee(1, EMPLOYEE_JSON)
+        self.assertEqual(2, employee.version)
+
+    def test_cached_employees(self):
+        expected_json = self.client.get('/api/employees').json
+        self.assertEqual(1, len(fragment_cache))
+
+        with patch(
+                'department_app.rest.employee_api.EmployeeListApi.schema.dump', autospec=True
+        ) as schema_mock:
+            self.assertEqual(expected_json, self.client.get('/api/employees').json)
+            self.assertEqual(expected_json, self.client.get('/api/employees/search').json)
+            self.assertEqual(expected_json[0], self.client.get('/api/employee/1').json)
+            schema_mock.assert_not_called()
+
+        EmployeeService.update_employee(1, EMPLOYEE_JSON)
+        self.assertEqual(1000, self.client.get('/api/employees').json[0]['salary'])
+
+        DepartmentService.update_department(1, {'name': 'Laboratory'})
+        self.assertEqual({'name': 'Laboratory'},
+                         self.client.get('/api/employee/1').json['department'])
+
+        DepartmentService.delete_department(1)
+        self.assertIsNone(self.client.get('/api/employees').json[0]['department'])
+
+    def test_cached_departments(self):
+        expected_json = self.client.get('/api/departments').json
+
+        with patch(
+                'department_app.rest.department_api.DepartmentListApi.schema.dump', autospec=True
+        ) as schema_mock:
+            self.assertEqual(expected_json, self.client.get('/api/departments').json)
+            self.assertEqual(expected_json[0], self.client.get('/api/department/1').json)
+            schema_mock.assert_not_called()
+
+        EmployeeService.update_employee(1, EMPLOYEE_JSON)
+        self.assertEqual(1000, self.client.get('/api/departments').json[0]['avg_salary'])
+
+        EmployeeService.delete_employee(1)
+        self.assertEqual([], self.client.get('/api/department/1').json['employees'])
+
+    def test_disabled(self):
+        with patch.dict(app.config, {'FRAGMENT_CACHE_SIZE': 0}):
+            self.client.get('/api/employees')
+            self.assertEqual(0, len(fragment_cache))
+
+    def test_cached_employee_rows(self):
+        expected_html = self.client.get('/employees/').get_data(as_text=True)
+        self.assertIn('Marty Maxwell', expected_html)
+
+        with patch(
+                'department_app.views.employee_view.employees_schema.dump', autospec=True
+        ) as schema_mock:
+            self.assertEqual(expected_html, self.client.get('/employees/').get_data(as_text=True))
+            schema_mock.assert_not_called()
+
+        EmployeeService.update_employee(1, dict(EMPLOYEE_JSON, name='Lois Gordon'))
+        html = self.client.get('/employees/').get_data(as_text=True)
+        self.assertIn('Lois Gordon', html)
+        self.assertNotIn('Marty Maxwell', html)
+
+    def test_cached_department_tables(self):
+        expected_html = self.client.get('/departments/').get_data(as_text=True)
+
+        with patch(
+                'department_app.views.department_view.departments_schema.dump', autospec=True
+        ) as schema_mock:
+            self.assertEqual(expected_html,
+                             self.client.get('/departments/').get_data(as_text=True))
+            schema_mock.assert_not_called()
+
+        EmployeeService.update_employee(1, dict(EMPLOYEE_JSON, name='Lois Gordon'))
+        self.assertIn('1000.0', self.client.get('/departments/').get_data(as_text=True))
+
+        self.client.get('/departments/1')
+        EmployeeService.update_employee(1, dict(EMPLOYEE_JSON, name='Erin Dolton'))
+        self.assertIn('Erin Dolton', self.client.get('/departments/1').get_data(as_text=True))
@@ -0,0 +1,53 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring
+
+from unittest import TestCase
+
+from department_app.search.ngram import NgramIndex
+
+
+class TestNgramIndex(TestCase):
+    def setUp(self):
+        self.index = NgramIndex()
+        self.index.add(1, 'Marty Maxwell')
+        self.index.add(2, 'Erin Dolton')
+        self.index.add(3, 'Alex Marshman')
+
+    def test_find_ids(self):
+        self.assertEqual({1, 3}, self.index.find_ids('Mar'))
+        self.assertEqual({1}, self.index.find_ids('Marty'))
+        self.assertEqual({3}, self.index.find_ids('shman'))
+        self.assertEqual(set(), self.index.find_ids('mar'))
+        self.assertEqual(set(), self.index.find_ids('MAR'))
+        self.assertEqual(set(), self.index.find_ids('no_name'))
+        self.assertIsNone(self.index.find_ids('Ma'))
+
+    def test_find_ids_checks_candidates(self):
+        self.index.add(4, 'abcd bcde')
+        # all trigrams of the substring occur in the name, but not together
+        self.assertEqual(set(), self.index.find_ids('abcde'))
+
+    def test_scan(self):
+        self.assertEqual({1, 3}, self.index.scan('Ma'))
+        self.assertEqual({1, 2, 3}, self.index.scan(''))
+        self.assertEqual({1, 3}, self.index.scan('Mar'))
+
+    def test_add_and_remove(self):
+        self.index.add(1, 'Lois Gordon')
+        self.assertEqual({3}, self.index.find_ids('Mar'))
+        self.assertEqual({1}, self.index.find_ids('Gor'))
+
+        self.index.remove(3)
+        self.index.remove(5)
+        self.assertEqual(set(), self.index.find_ids('Mar'))
+        self.assertEqual(2, len(self.index))
+
+    def test_rank(self):
+        self.index.add(4, 'Marsha Mann')
+
+        self.assertEqual([3, 4], self.index.rank('Marshmen'))
+        self.assertEqual([3, 4], self.index.rank('marshman'))
+        self.assertEqual([3], self.index.rank('Marshmen', limit=1))
+        self.assertEqual([3], self.index.rank('Marshmen', threshold=0.6))
+        self.assertEqual([2], self.index.rank('Dolten'))
+        self.assertEqual([], self.index.rank('no_name'))
+        self.assertEqual([], self.index.rank('Ma'))
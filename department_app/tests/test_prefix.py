@@ -0,0 +1,42 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring
+
+from unittest import TestCase
+
+from department_app.search.prefix import PrefixIndex
+
+
+class TestPrefixIndex(TestCase):
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.add(1, 'Marty Maxwell')
+        self.index.add(2, 'Erin Dolton')
+        self.index.add(3, 'Alex Marshman')
+        self.index.add(4, 'marsha Mann')
+
+    def test_complete(self):
+        self.assertEqual([(4, 'marsha Mann'), (1, 'Marty Maxwell')],
+                         self.index.complete('Mar', 10))
+        self.assertEqual([(4, 'marsha Mann')], self.index.complete('MARS', 10))
+        self.assertEqual([(3, 'Alex Marshman'), (2, 'Erin Dolton')],
+                         self.index.complete('', 2))
+        self.assertEqual([], self.index.complete('no_name', 10))
+
+    def test_add_and_remove(self):
+        self.index.add(1, 'Lois Gordon')
+        self.assertEqual([(4, 'marsha Mann')], self.index.complete('mar', 10))
+        self.assertEqual([(1, 'Lois Gordon')], self.index.complete('lo', 10))
+
+        self.index.remove(4)
+        self.index.remove(5)
+        self.assertEqual([], self.index.complete('mar', 10))
+        self.assertEqual(3, len(self.index))
+
+    def test_from_items(self):
+        index = PrefixIndex.from_items([(1, 'Marty Maxwell'), (2, 'Erin Dolton'),
+                                        (3, 'Alex Marshman'), (4, 'Lois Gordon'),
+                                        (4, 'marsha Mann')])
+        self.assertEqual(self.index.complete('', 10), index.complete('', 10))
+        self.assertEqual(4, len(index))
+
+        index.add(4, 'Lois Gordon')
+        self.assertEqual([(1, 'Marty Maxwell')], index.complete('mar', 10))
@@ -0,0 +1,103 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring
+
+from datetime import date
+
+from sqlalchemy import event
+
+from department_app import db
+from department_app.tests.base import SearchBaseTestCase
+
+from department_app.service.department_service import DepartmentService
+from department_app.service.employee_service import EmployeeService
+from department_app.service.roster_service import RosterService
+
+ROSTER = [
+    'name,salary,date_of_birth,department',
+    'Marty Maxwell,700,04.05.2002,Research',
+    'Erin Dolton,4500,03.06.2002,Purchase',
+    'Lois Gordon,1000,03.10.2002,Finance',
+]
+
+
+class TestRosterService(SearchBaseTestCase):
+    def test_read_csv(self):
+        self.assertEqual([
+            ('Marty Maxwell', 700, date(2002, 5, 4), 'Research'),
+            ('Lois Gordon', 1000, None, None)
+        ], list(RosterService.read_csv(ROSTER[:2] + [' Lois  Gordon ,1000,,'])))
+
+        self.assertRaises(ValueError, list, RosterService.read_csv(['name,salary']))
+        self.assertRaises(ValueError, list, RosterService.read_csv(ROSTER[:1] + [',1,,']))
+        self.assertRaises(ValueError, list, RosterService.read_csv(ROSTER[:1] + ['A,a lot,,']))
+        self.assertRaises(ValueError, list,
+                          RosterService.read_csv(ROSTER[:1] + ['A,1,2002-05-04,']))
+        self.assertRaises(ValueError, list,
+                          RosterService.read_csv(ROSTER[:1] + ['a' * 200000 + ',1,,']))
+
+    def test_reconcile(self):
+        report = RosterService.reconcile(RosterService.read_csv(ROSTER), dry_run=True)
+        self.assertEqual({'inserted': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1,
+                          'ambiguous': 0, 'departments_created': 1}, report)
+        self.assertEqual(3, len(EmployeeService.get_employee_rows()))
+
+        statements = []
+
+        def record_statement(*args):
+            statements.append(args[2])
+
+        event.listen(db.engine, 'before_cursor_execute', record_statement)
+        try:
+            self.assertEqual(report, RosterService.reconcile(RosterService.read_csv(ROSTER)))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record_statement)
+        # employees select, departments insert and select, employees insert, update and delete
+        self.assertEqual(6, len(statements))
+
+        self.assertEqual(['Erin Dolton', 'Lois Gordon', 'Marty Maxwell'], sorted(
+            employee.name for employee in EmployeeService.get_filtered_employee_rows({})
+        ))
+        employee = EmployeeService.get_employee_by_id(2)
+        self.assertEqual((4500, 2), (employee.salary, employee.version))
+        self.assertEqual(1, EmployeeService.get_employee_by_id(1).version)
+        self.assertEqual(['Lois Gordon'], [
+            employee.name for employee in DepartmentService.get_department_by_name(
+                'Finance'
+            ).employees
+        ])
+
+        self.assertEqual({'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 3,
+                          'ambiguous': 0, 'departments_created': 0},
+                         RosterService.reconcile(RosterService.read_csv(ROSTER)))
+
+    def test_reconcile_keep_missing(self):
+        report = RosterService.reconcile(RosterService.read_csv(ROSTER[:2]),
+                                         delete_missing=False)
+
+        self.assertEqual(0, report['deleted'])
+        self.assertEqual(3, len(EmployeeService.get_employee_rows()))
+
+    def test_reconcile_normalized_names(self):
+        EmployeeService.patch_employee(1, {'name': ' Marty  Maxwell'})
+        report = RosterService.reconcile(RosterService.read_csv(ROSTER[:2]),
+                                         delete_missing=False)
+
+        self.assertEqual((0, 1, 0), (report['inserted'], report['unchanged'], report['deleted']))
+
+    def test_reconcile_ambiguous(self):
+        report = RosterService.reconcile(RosterService.read_csv(ROSTER + ROSTER[3:]))
+
+        self.assertEqual(1, report['ambiguous'])
+        self.assertEqual(0, report['inserted'])
+        self.assertIsNone(DepartmentService.get_department_id_by_name('Finance'))
+        self.assertEqual(2, len(EmployeeService.get_employee_rows()))
+
+        EmployeeService.add_employee({'name': 'Erin Dolton', 'salary': 100,
+                                      'date_of_birth': '03.06.2002',
+                                      'department': {'name': 'Purchase'}})
+        report = RosterService.reconcile(RosterService.read_csv(ROSTER[:2]))
+
+        self.assertEqual((1, 1, 0), (report['ambiguous'], report['unchanged'],
+                                     report['deleted']))
+        self.assertEqual(['Erin Dolton', 'Erin Dolton', 'Marty Maxwell'], sorted(
+            employee.name for employee in EmployeeService.get_filtered_employee_rows({})
+        ))
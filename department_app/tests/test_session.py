@@ -0,0 +1,124 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring
+
+import json
+from unittest.mock import patch
+
+from flask import template_rendered
+from sqlalchemy import event
+
+from department_app import app, db
+from department_app.tests.base import BaseTestCase
+
+from department_app.service.cache import department_names
+from department_app.service.session import commit_without_expire, is_read_only
+
+
+class TestCommitWithoutExpire(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # warm name index, so only queries of the write path are recorded
+        department_names.get_id('Research')
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.record_statement)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.record_statement)
+        super().tearDown()
+
+    def record_statement(self, conn, cursor, statement, *args):
+        # pylint: disable=unused-argument
+        self.statements.append(statement)
+
+    def count_selects(self):
+        return len([statement for statement in self.statements if statement.startswith('SELECT')])
+
+    def test_expire_on_commit_restored(self):
+        commit_without_expire()
+        self.assertTrue(db.session().expire_on_commit)
+
+    def test_post_department(self):
+        response = self.client.post('/api/departments',
+                                    data=json.dumps({'name': 'Finance'}),
+                                    content_type='application/json')
+
+        self.assertStatus(response, 201)
+        self.assertEqual('Finance', response.json['name'])
+        self.assertEqual(0, self.count_selects())
+
+    def test_post_employee(self):
+        data = {
+            'name': 'Lois Gordon',
+            'salary': 1000,
+            'date_of_birth': '03.10.2002',
+            'department': {'name': 'Research'}
+        }
+        response = self.client.post('/api/employees',
+                                    data=json.dumps(data),
+                                    content_type='application/json')
+
+        self.assertStatus(response, 201)
+        self.assertEqual({'name': 'Research'}, response.json['department'])
+        # department lookup only, neither employee nor department are reloaded
+        self.assertEqual(1, self.count_selects())
+
+    def test_put_employee(self):
+        data = {
+            'name': 'Marty Maxwell',
+            'salary': 900,
+            'date_of_birth': '04.05.2002',
+            'department': {'name': 'Research'}
+        }
+        response = self.client.put('/api/employee/1',
+                                   data=json.dumps(data),
+                                   content_type='application/json')
+
+        self.assert200(response)
+        self.assertEqual(900, response.json['salary'])
+        # employee and department lookups and reload of the version incremented by the UPDATE
+        self.assertEqual(3, self.count_selects())
+
+
+class TestReadOnlySession(BaseTestCase):
+    def test_read_only_get(self):
+        states = []
+
+        def record_state(sender, **extra):
+            # pylint: disable=unused-argument
+            states.append((is_read_only(), db.session().autoflush, db.session().in_transaction()))
+
+        with template_rendered.connected_to(record_state, app):
+            response = self.client.get('/departments/')
+
+        self.assert200(response)
+        # read-only, no autoflush and the connection is released before rendering
+        self.assertEqual([(True, False, False)], states)
+        self.assertFalse(is_read_only())
+        self.assertTrue(db.session().autoflush)
+
+    def test_default_post(self):
+        with patch(
+                'department_app.views.department_view.DepartmentService.add_department',
+                autospec=True, side_effect=lambda data: self.assertFalse(is_read_only())
+        ) as add_department_mock:
+            self.client.post('/departments/new',
+                             data=json.dumps({'name': 'Finance'}),
+                             content_type='application/json')
+
+            add_department_mock.assert_called_once()
+
+    def test_read_write_get(self):
+        with patch(
+                'department_app.views.department_view.DepartmentService.delete_department',
+                autospec=True, side_effect=lambda department_id: self.assertFalse(is_read_only())
+        ) as delete_department_mock:
+            self.client.get('/departments/1/delete')
+
+            delete_department_mock.assert_called_once()
+
+        with patch(
+                'department_app.views.employee_view.EmployeeService.delete_employee',
+                autospec=True, side_effect=lambda employee_id: self.assertFalse(is_read_only())
+        ) as delete_employee_mock:
+            self.client.get('/departments/1/employees/1/delete')
+
+            delete_employee_mock.assert_called_once()
@@ -0,0 +1,50 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring
+
+import os
+import tempfile
+from unittest import TestCase, skipIf
+
+from department_app.search.snapshot import Snapshot, np
+
+
+@skipIf(np is None, 'NumPy is not installed')
+class TestSnapshot(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'test.snapshot')
+
+        strings, string_offsets = Snapshot.encode_strings(['Marty Maxwell', 'Erin Dolton',
+                                                           'Alex Marshman', 'Łukasz Mańka'])
+        Snapshot.write(self.path, 'generation', {
+            'ids': np.array([1, 2, 3, 4], dtype=np.int64),
+            'salaries': np.array([700, 4000, 250, 100], dtype=np.int64)
+        }, strings, string_offsets)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read(self):
+        snapshot = Snapshot(self.path)
+
+        self.assertEqual('generation', snapshot.generation)
+        self.assertEqual(4, snapshot.count)
+        self.assertEqual([1, 2, 3, 4], snapshot.arrays['ids'].tolist())
+        self.assertEqual([700, 4000, 250, 100], snapshot.arrays['salaries'].tolist())
+        self.assertFalse(snapshot.arrays['ids'].flags.writeable)
+        self.assertEqual('Erin Dolton', snapshot.string(1))
+        self.assertEqual('Łukasz Mańka', snapshot.string(3))
+
+    def test_find(self):
+        snapshot = Snapshot(self.path)
+
+        self.assertEqual([0, 2, 3], snapshot.find('Ma').tolist())
+        self.assertEqual([0], snapshot.find('ll').tolist())
+        self.assertEqual([3], snapshot.find('ń').tolist())
+        self.assertEqual([], snapshot.find('no_name').tolist())
+        self.assertEqual([], snapshot.find('ell\0Erin').tolist())
+
+    def test_not_snapshot(self):
+        with open(self.path, 'wb') as snapshot_file:
+            snapshot_file.write(b'\0' * 64)
+
+        self.assertRaises(ValueError, Snapshot, self.path)
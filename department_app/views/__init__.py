@@ -5,6 +5,7 @@ Modules:
 - `department_view.py`: defines department views
 - `employee_view.py`: defines employee views
 - `error_view.py`: defines error views
+- `fragments.py`: renders HTML tables from cached fragments of their rows
 
 Functions:
 - `init_blueprints`: register blueprints endpoints
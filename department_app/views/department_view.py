@@ -14,10 +14,15 @@ from flask import Blueprint, render_template, redirect, url_for, flash, abort
 from department_app import app
 
 from department_app.schemas.department_schema import DepartmentSchema
+from department_app.service.cache import fragment_cache
 from department_app.service.department_service import DepartmentService
 from department_app.forms.department_form import DepartmentForm
 
+from department_app.service.exceptions import UniqueError
+from department_app.service.session import read_write
+
 from department_app.views.employee_view import nested_employees_blueprint
+from department_app.views.fragments import render_rows
 
 departments_blueprint = Blueprint('departments', __name__, url_prefix='/departments')
 
@@ -26,30 +31,37 @@ departments_blueprint.register_blueprint(nested_employees_blueprint)
 department_schema = DepartmentSchema()
 departments_schema = DepartmentSchema(many=True)
 
+# form error shown in case of department with given name is already exists
+UNIQUE_NAME_MESSAGE = 'Department with such name already exists'
+
 
 @app.route('/')
 @departments_blueprint.route('/')
 def get_departments():
     """
     Fetches all departments via service
-    Renders 'departments.html' template
+    Renders 'departments.html' template, the table of departments is taken from cache
+    if none of the departments changed since it was rendered
 
     :return: rendered 'departments.html' template
     """
-    departments = DepartmentService.get_departments()
-    departments = departments_schema.dump(departments)
-
+    departments = DepartmentService.get_department_rows()
     app.logger.debug(f'Data: {departments}')
+
+    rows = render_rows('department_row.html', 'department', departments,
+                       fragment_cache.get_department_key, departments_schema.dump, table=True)
+
     app.logger.debug('departments.html was rendered')
 
-    return render_template('departments.html', departments=departments), 200
+    return render_template('departments.html', rows=rows), 200
 
 
 @departments_blueprint.route('/<int:department_id>')
 def get_department(department_id):
     """
     Fetches the department with given id via service
-    Renders 'department.html' template
+    Renders 'department.html' template, the table of department employees
+    is taken from cache if none of them changed since it was rendered
 
     :param int department_id: id of the department
     :return: rendered 'department.html' template
@@ -58,12 +70,19 @@ def get_department(department_id):
     if not department:
         app.logger.error(f'There is no department with given id({department_id})')
         abort(404)
+    employee_keys = {employee.id: fragment_cache.get_employee_key(employee)
+                     for employee in department.employees}
     department = department_schema.dump(department)
 
     app.logger.debug(f'Data: {department}')
+
+    rows = render_rows('department_employee_row.html', 'employee', department['employees'],
+                       lambda employee: employee_keys.get(employee['id'], None),
+                       lambda employees: employees, table=True, department_id=department['id'])
+
     app.logger.debug('department.html was rendered')
 
-    return render_template('department.html', department=department), 200
+    return render_template('department.html', department=department, rows=rows), 200
 
 
 @departments_blueprint.route('/new', methods=['GET', 'POST'])
@@ -83,9 +102,13 @@ def add_department():
     if form.validate_on_submit():
         department_json = {'name': form.name.data}
         app.logger.debug(f'Data: {department_json}')
-        DepartmentService.add_department(department_json)
-        flash('Department has been created successfully', category='success')
-        return redirect(url_for('.get_departments'))
+        try:
+            DepartmentService.add_department(department_json)
+        except UniqueError:
+            form.name.errors.append(UNIQUE_NAME_MESSAGE)
+        else:
+            flash('Department has been created successfully', category='success')
+            return redirect(url_for('.get_departments'))
 
     for field_name, error_messages in form.errors.items():
         for err in error_messages:
@@ -123,16 +146,13 @@ def edit_department(department_id):
     if form.validate_on_submit():
         department_json = {'name': form.name.data}
         app.logger.debug(f'Data: {department_json}')
-        DepartmentService.update_department(department_id, department_json)
-        flash('Department has been updated successfully', category='success')
-        return redirect(url_for('.get_department', department_id=department_id))
-
-    # allows to submit when nothing changes
-    if (len(form.errors) == 1 and len(form.errors['name']) == 1
-            and form.errors['name'][0] == 'Department with such name already exists'
-            and department == DepartmentService.get_department_by_name(form.name.data)):
-        flash('Department has been updated successfully', category='success')
-        return redirect(url_for('.get_department', department_id=department_id))
+        try:
+            DepartmentService.update_department(department_id, department_json)
+        except UniqueError:
+            form.name.errors.append(UNIQUE_NAME_MESSAGE)
+        else:
+            flash('Department has been updated successfully', category='success')
+            return redirect(url_for('.get_department', department_id=department_id))
 
     for field_name, error_messages in form.errors.items():
         for err in error_messages:
@@ -150,6 +170,7 @@ def edit_department(department_id):
 
 
 @departments_blueprint.route('/<int:department_id>/delete')
+@read_write
 def delete_department(department_id):
     """
     Uses service to delete the department with given id
@@ -18,7 +18,10 @@ from department_app.service.employee_service import EmployeeService
 from department_app.forms.employee_form import EmployeeForm, FilterForm
 
 from department_app.schemas.department_schema import DepartmentSchema
+from department_app.service.cache import fragment_cache
 from department_app.service.department_service import DepartmentService
+from department_app.service.session import read_write
+from department_app.views.fragments import render_rows
 
 employees_blueprint = Blueprint('employees', __name__, url_prefix='/employees')
 nested_employees_blueprint = Blueprint('employees', __name__,
@@ -48,17 +51,18 @@ def pull_department_id(endpoint, values):
 def get_employees():
     """
     Fetches all employees filtered by params via service
-    Renders 'employees.html' template
+    and counts them per department and salary band
+    Renders 'employees.html' template, rows of the employees that didn't change
+    since they were rendered are taken from cache
 
     :return: rendered 'employees.html' template
     """
     form = FilterForm()
 
-    employees = EmployeeService.get_employees()
-
     if form.validate_on_submit():
         filter_params = {
             'name': form.name.data.strip(),
+            'fuzzy': form.fuzzy.data,
             'department': form.department.data.strip(),
             'start_salary': (float(form.start_salary.data) if form.start_salary.data
                              else form.start_salary.data),
@@ -75,7 +79,7 @@ def get_employees():
             filter_params['start_date'] = form.start_date.data
             filter_params['end_date'] = form.end_date.data
 
-        employees = EmployeeService.get_filtered_employees(filter_params)
+        employees = EmployeeService.get_filtered_employee_rows(filter_params)
     else:
         for field_name, error_messages in form.errors.items():
             for err in error_messages:
@@ -83,12 +87,17 @@ def get_employees():
                       category='danger')
                 app.logger.error(f'{form[field_name].label.text}{err}')
 
+        employees = EmployeeService.get_employee_rows()
+
     app.logger.debug(f'Data: {employees}')
     app.logger.debug('employees.html was rendered')
 
-    employees = employees_schema.dump(employees)
+    facets = EmployeeService.get_facets(employees)
+    rows = render_rows('employee_row.html', 'employee', employees,
+                       fragment_cache.get_employee_key, employees_schema.dump)
 
-    return render_template('employees.html', employees=employees, form=form, prev_input=form.data)
+    return render_template('employees.html', rows=rows, count=len(employees), facets=facets,
+                           form=form, prev_input=form.data)
 
 
 @nested_employees_blueprint.route('/<int:employee_id>')
@@ -244,6 +253,7 @@ def edit_employee(employee_id):
 
 @nested_employees_blueprint.route('/<int:employee_id>/delete')
 @employees_blueprint.route('/<int:employee_id>/delete')
+@read_write
 def delete_employee(employee_id):
     """
     Uses service to delete the employee with given id
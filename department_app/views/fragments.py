@@ -0,0 +1,51 @@
+"""
+Rendering of HTML tables from cached pre-rendered fragments of their rows,
+every row is rendered once per version of the entity it shows,
+this module defines the following functions:
+
+- `render_rows`: renders the rows of a table from cached fragments
+"""
+
+from markupsafe import Markup
+
+from department_app import app
+from department_app.service.cache import fragment_cache
+
+
+def render_rows(template_name: str, name: str, items: list, key, dump,
+                table: bool = False, **context) -> Markup:
+    """
+    Renders the row template for each item, only the items which rows
+    aren't cached are serialized (with one call of `dump`) and rendered,
+    the whole table is cached as well if `table` is set, so rendering
+    the same table again only looks it up
+
+    :param template_name: name of the template of one row
+    :param name: name the serialized item is passed to the row template under
+    :param items: entities or records shown by the rows
+    :param key: function returning versioned identity of the item
+    (see `FragmentCache.get_employee_key`) or None if its row can't be cached
+    :param dump: function taking list of items and returning list of their serialized data
+    :param table: cache the whole table in addition to its rows
+    :param context: other variables passed to the row template, they are part of the keys
+    :return: rendered rows
+    """
+    template = app.jinja_env.get_template(template_name)
+    context_key = tuple(sorted(context.items()))
+
+    def get_row_key(item):
+        item_key = key(item)
+        return ('html', template_name, context_key, item_key) if item_key is not None else None
+
+    def render(missing):
+        return [template.render({name: data, **context}) for data in dump(missing)]
+
+    def render_table(_):
+        return [''.join(fragment_cache.render(items, get_row_key, render))]
+
+    if not table:
+        return Markup(render_table(None)[0])
+
+    row_keys = tuple(get_row_key(item) for item in items)
+    table_key = ('table', row_keys) if None not in row_keys else None
+    return Markup(fragment_cache.render([items], lambda _: table_key, render_table)[0])
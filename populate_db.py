@@ -12,6 +12,8 @@ from department_app import app, db
 
 from department_app.models.department import Department
 from department_app.models.employee import Employee
+from department_app.search.columnar import employee_search
+from department_app.service.cache import department_names, employee_names, fragment_cache
 
 
 def populate_db():
@@ -56,6 +58,10 @@ def populate_db():
 
     db.session.commit()
     db.session.close()
+    department_names.invalidate()
+    employee_names.invalidate()
+    employee_search.invalidate()
+    fragment_cache.invalidate()
     app.logger.info('Database was successfully populated')
 
 
@@ -0,0 +1,40 @@
+"""
+This module is used to reconcile employees with snapshot of external HR roster,
+it defines the following:
+
+Functions:
+- `reconcile_roster`: makes employees match roster snapshot CSV file
+"""
+
+import argparse
+
+from department_app import app
+
+from department_app.service.roster_service import RosterService
+
+
+def reconcile_roster(path: str, dry_run: bool = False, delete_missing: bool = True) -> dict:
+    """
+    Makes employees match roster snapshot CSV file (columns `name`, `salary`,
+    `date_of_birth` and `department`), the file is streamed row by row
+
+    :param path: path of the roster CSV file
+    :param dry_run: True to only count the changes
+    :param delete_missing: False to keep employees missing from the roster
+    :return: numbers of inserted, updated, deleted, unchanged employees,
+    skipped ambiguous keys and created departments
+    """
+    with app.app_context(), open(path, newline='', encoding='utf-8') as roster:
+        report = RosterService.reconcile(RosterService.read_csv(roster), dry_run, delete_missing)
+    app.logger.info(f'Roster was successfully reconciled: {report}')
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reconcile employees with HR roster CSV')
+    parser.add_argument('path', help='path of the roster CSV file')
+    parser.add_argument('--dry-run', action='store_true', help='only count the changes')
+    parser.add_argument('--keep-missing', action='store_true',
+                        help='keep employees missing from the roster')
+    args = parser.parse_args()
+    print(reconcile_roster(args.path, args.dry_run, not args.keep_missing))